@@ -0,0 +1,129 @@
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional: without it responses stay JSON
+    pa = None
+    pq = None
+
+# Typed, columnar response bodies of the bulk read endpoints
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+PARQUET_CONTENT_TYPE = "application/vnd.apache.parquet"
+CONTENT_TYPES = (ARROW_CONTENT_TYPE, PARQUET_CONTENT_TYPE)
+# Accept header of clients reading either, Arrow preferred, JSON from older servers
+ACCEPT = f"{ARROW_CONTENT_TYPE}, {PARQUET_CONTENT_TYPE};q=0.9, application/json;q=0.5"
+
+
+def is_available():
+    """Whether pyarrow is installed"""
+    return pa is not None
+
+
+def _media_type(content_type):
+    return (content_type or "").split(";")[0].strip().lower()
+
+
+def negotiate(accept):
+    """
+    Columnar format asked for by an Accept header.
+
+    Returns:
+        str: ARROW_CONTENT_TYPE or PARQUET_CONTENT_TYPE, whichever has the
+        highest quality, or None if JSON is preferred (or pyarrow missing).
+    """
+    if not is_available():
+        return None
+    best, best_quality, json_quality = None, 0.0, 0.0
+    for media_range in (accept or "").split(","):
+        media_type, *options = media_range.split(";")
+        media_type = _media_type(media_type)
+        quality = 1.0
+        for option in options:
+            name, _, value = option.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if media_type in CONTENT_TYPES and quality > best_quality:
+            best, best_quality = media_type, quality
+        elif media_type in ("application/json", "*/*"):
+            json_quality = max(json_quality, quality)
+    return best if best_quality >= json_quality else None
+
+
+def encode(rows, content_type, types=None, columns=None):
+    """
+    Encode rows as an Arrow IPC stream or a Parquet file.
+
+    Args:
+        rows (list): Row dicts, e.g. the rows of a DictCursor
+        content_type (str): ARROW_CONTENT_TYPE or PARQUET_CONTENT_TYPE
+        types (dict): Arrow type alias of columns (e.g. ``"int64"``,
+            ``"double"``, ``"timestamp[s]"``), the others are inferred
+        columns (list): Columns in order, defaults to the keys of the rows;
+            given, an empty result still carries the typed schema
+
+    Returns:
+        bytes: The body
+    """
+    types = types or {}
+    if columns is None:
+        columns = []
+        for row in rows:
+            for column in row:
+                if column not in columns:
+                    columns.append(column)
+    table = pa.table({
+        column: pa.array(
+            [row.get(column) for row in rows],
+            type=pa.type_for_alias(types[column]) if column in types else None
+        )
+        for column in columns
+    })
+
+    sink = pa.BufferOutputStream()
+    if content_type == PARQUET_CONTENT_TYPE:
+        pq.write_table(table, sink)
+    else:
+        with pa.ipc.new_stream(sink, table.schema) as writer:
+            writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def decode(data, content_type):
+    """
+    Decode a body made by ``encode``.
+
+    Returns:
+        pd.DataFrame: One typed column per Arrow column.
+    """
+    if _media_type(content_type) == PARQUET_CONTENT_TYPE:
+        table = pq.read_table(pa.BufferReader(data))
+    else:
+        table = pa.ipc.open_stream(data).read_all()
+    return table.to_pandas()
+
+
+async def get_frame(session, url, params=None, headers=None):
+    """
+    GET a list of rows with aiohttp as a DataFrame, columnar if possible.
+
+    Asks for Arrow when pyarrow is installed here and reads whatever the
+    server answers, so a JSON-only server still works.
+
+    Returns:
+        tuple: (status, DataFrame on 200 else response text, response headers)
+    """
+    headers = dict(headers or {})
+    headers['Accept'] = ACCEPT if is_available() else 'application/json'
+    async with session.get(url, params=params, headers=headers) as response:
+        if response.status != 200:
+            return response.status, await response.text(), response.headers
+        content_type = response.headers.get('Content-Type')
+        if _media_type(content_type) in CONTENT_TYPES:
+            frame = decode(await response.read(), content_type)
+        else:
+            frame = pd.DataFrame(await response.json())
+        return response.status, frame, response.headers
@@ -7,6 +7,8 @@ from dotenv import load_dotenv
 from statsmodels.tsa.seasonal import seasonal_decompose
 from sklearn.preprocessing import StandardScaler
 from src.logger import logger
+from src import columnar_codec
+from src.weather_sync import WeatherHistory
 import redis.asyncio as aioredis
 import json
 
@@ -22,6 +24,7 @@ class WeatherAnalysis:
         self.session = None
         self.scaler = StandardScaler()
         self.redis = None
+        self.history = WeatherHistory(self.db_api_url)
 
     async def connect(self):
         """Initialize HTTP session and Redis connection"""
@@ -71,16 +74,11 @@ class WeatherAnalysis:
     async def get_weather_data(self):
         """Get weather data from API"""
         try:
-            async with self.session.get(f"{self.db_api_url}/api/weather") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    df = pd.DataFrame(data)
-                    df = df.sort_values('dt')
-                    logger.info(f"Retrieved {len(df)} weather records")
-                    return df
-                else:
-                    error = await response.text()
-                    raise Exception(f"API error: {response.status}, {error}")
+            received = await self.history.sync(self.session)
+            df = self.history.frame()
+            df = df.sort_values('dt')
+            logger.info(f"Retrieved {len(df)} weather records ({received} new)")
+            return df
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
             raise
@@ -220,24 +218,15 @@ class WeatherAnalysis:
             if self.session is None:
                 await self.connect()
                 
-            # Gửi dữ liệu lên API
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }    
-            
-            async with self.session.post(
-                f"{self.db_api_url}/api/correlation/bulk",
-                headers=headers,
-                json=correlation_data  # Gửi dữ liệu dưới dạng JSON
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    logger.info(f"Received response: {result}")
-                    return correlation_matrix
-                else:
-                    error = await response.text()
-                    raise Exception(f"API error: {response.status}, {error}")
+            # Gửi dữ liệu lên API (columnar msgpack, JSON nếu không hỗ trợ)
+            status, result = await columnar_codec.post_bulk(
+                self.session, f"{self.db_api_url}/api/correlation/bulk", correlation_data
+            )
+            if status == 200:
+                logger.info(f"Received response: {result}")
+                return correlation_matrix
+            else:
+                raise Exception(f"API error: {status}, {result}")
         except Exception as e:
             logger.error(f"Error calculating correlation: {e}")
             raise
@@ -343,23 +332,15 @@ class WeatherAnalysis:
             if self.session is None:
                 await self.connect()
 
-            # Gửi dữ liệu lên API
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
-            async with self.session.post(
-                f"{self.db_api_url}/api/seasonal/bulk",
-                headers=headers,
-                json=seasonal_data  # Gửi dữ liệu dưới dạng JSON
-            ) as response:
-                if response.status == 200:
-                    result = await response.json()
-                    logger.info(f"API response: {result}")
-                    return seasonal_df
-                else:
-                    error = await response.text()
-                    raise Exception(f"API error: {response.status}, {error}")
+            # Gửi dữ liệu lên API (columnar msgpack, JSON nếu không hỗ trợ)
+            status, result = await columnar_codec.post_bulk(
+                self.session, f"{self.db_api_url}/api/seasonal/bulk", seasonal_data
+            )
+            if status == 200:
+                logger.info(f"API response: {result}")
+                return seasonal_df
+            else:
+                raise Exception(f"API error: {status}, {result}")
         except Exception as e:
             logger.error(f"Error calculating seasonal decomposition: {e}")
             raise
@@ -376,10 +357,10 @@ class WeatherAnalysis:
                 message = await pubsub.get_message(ignore_subscribe_messages=True)
                 if message:
                     try:
-                        # Parse new data
-                        data = json.loads(message['data'])
-                        current_time = datetime.fromtimestamp(data['dt'])
-                        logger.info(f"Received new weather data at {current_time}")
+                        # Parse new data: one batch per insert, analysed once
+                        rows = columnar_codec.decode_message(message['data'])
+                        current_time = datetime.fromtimestamp(max(row['dt'] for row in rows))
+                        logger.info(f"Received {len(rows)} new weather rows up to {current_time}")
                         
                         # Get latest data including new record
                         df = await self.get_weather_data()
@@ -8,6 +8,8 @@ from sklearn.preprocessing import StandardScaler
 from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
 from dotenv import load_dotenv
 from src.logger import logger
+from src import columnar_codec
+from src.weather_sync import WeatherHistory
 import os
 from typing import List, Dict, Any, Tuple
 
@@ -27,6 +29,7 @@ class WeatherCluster:
         self.temperature_model = RandomForestRegressor(n_estimators=100, random_state=42)
         self.season_model = RandomForestClassifier(n_estimators=100, random_state=42)
         self.features = ["temp", "pressure", "humidity", "clouds", "visibility", "wind_speed", "wind_deg"]
+        self.history = WeatherHistory(self.db_api_url)
 
     async def connect(self):
         """Initialize HTTP session if not exists or closed"""
@@ -41,23 +44,13 @@ class WeatherCluster:
     async def get_weather_data(self) -> pd.DataFrame:
         try:
             await self.connect()
-            headers = {
-                "Content-Type": "application/json",
-                "Accept": "application/json",
-            }
-
-            async with self.session.get(f"{self.db_api_url}/api/weather", headers=headers) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if not data:
-                        logger.warning("No weather data retrieved.")
-                        raise HTTPException(status_code=204, detail="No content retrieved from API.")
-                    df = pd.DataFrame(data)
-                    logger.info(f"Retrieved {len(df)} weather records.")
-                    return df
-                else:
-                    error = await response.text()
-                    raise Exception(f"API error: {error}")
+            received = await self.history.sync(self.session)
+            if self.history.data.empty:
+                logger.warning("No weather data retrieved.")
+                raise ValueError("No content retrieved from API.")
+            df = self.history.frame()
+            logger.info(f"Retrieved {len(df)} weather records ({received} new).")
+            return df
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
             raise
@@ -268,20 +261,15 @@ class WeatherCluster:
 
             # Thêm dữ liệu mới
             insert_url = f"{self.db_api_url}/api/cluster_data/bulk"
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
 
-            async with self.session.post(insert_url, json=cluster_data, headers=headers) as insert_response:
-                if insert_response.status == 200:
-                    result = await insert_response.json()
-                    logger.info(f"Successfully saved {result['count']} cluster data.")
-                    return True
-                else:
-                    insert_error = await insert_response.text()
-                    logger.error(f"Failed to save cluster data: {insert_response.status}, error: {insert_error}")
-                    return False
+            # Columnar msgpack body, JSON if either side lacks msgpack
+            status, result = await columnar_codec.post_bulk(self.session, insert_url, cluster_data)
+            if status == 200:
+                logger.info(f"Successfully saved {result['count']} cluster data.")
+                return True
+            else:
+                logger.error(f"Failed to save cluster data: {status}, error: {result}")
+                return False
 
         except Exception as e:
             logger.error(f"Error saving cluster data: {e}")
@@ -14,6 +14,7 @@ import os
 from dotenv import load_dotenv
 from datetime import datetime
 from .spider import SpiderProcessor
+from src import columnar_codec
 
 # Load environment variables
 load_dotenv()
@@ -98,10 +99,10 @@ async def start_redis_listener():
             message = await pubsub.get_message(ignore_subscribe_messages=True)
             if message:
                 try:
-                    # Parse new data
-                    data = json.loads(message['data'])
-                    current_time = datetime.fromtimestamp(data['dt'])
-                    logger.info(f"Received new weather data at {current_time}")
+                    # Parse new data: one batch per insert, clustered once
+                    rows = columnar_codec.decode_message(message['data'])
+                    current_time = datetime.fromtimestamp(max(row['dt'] for row in rows))
+                    logger.info(f"Received {len(rows)} new weather rows up to {current_time}")
                     
                     # Get latest data including new record
                     weather_data = await cluster.get_weather_data()
@@ -124,10 +125,10 @@ async def start_redis_listener():
                             logger.info("New cluster data saved successfully")
 
                         # Update spider data
-                        await spider.get_weather_data()
-                        await spider.process_data()
-                        await spider.save_spider_data()
-                        logger.info("Cập nhật dữ liệu spider thành công")
+                        if await spider.get_weather_data():
+                            await spider.process_data()
+                            await spider.save_spider_data()
+                            logger.info("Cập nhật dữ liệu spider thành công")
                         
                         logger.info("Completed clustering with new data")
                     else:
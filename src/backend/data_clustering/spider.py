@@ -7,6 +7,8 @@ import pandas as pd
 from typing import List, Dict, Any
 import redis.asyncio as aioredis
 from src.logger import logger
+from src import arrow_codec
+from src import columnar_codec
 
 class SpiderProcessor:
     def __init__(self):
@@ -15,6 +17,8 @@ class SpiderProcessor:
         self.redis = None
         self.dataframe = None
         self.processed_data = None
+        # Validator of self.dataframe, sent back as If-None-Match
+        self.etag = None
         self.label_to_season = {0: "Spring", 1: "Winter", 2: "Summer", 3: "Autumn"}
 
     async def connect(self):
@@ -27,23 +31,31 @@ class SpiderProcessor:
             self.redis = await aioredis.from_url('redis://redis:6379')
             logger.info("Connected to Redis")
 
-    async def get_weather_data(self):
-        """Fetch weather data from API"""
+    async def get_weather_data(self) -> bool:
+        """Fetch weather data from API; returns whether it changed since the last fetch"""
         try:
             if self.session is None or self.session.closed:
                 await self.connect()
 
-            async with self.session.get(f"{self.db_api_url}/api/data_cluster") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    self.dataframe = pd.DataFrame(data)
-                    self.dataframe["date"] = pd.to_datetime(self.dataframe["date"])
-                    logger.info(f"Retrieved {len(self.dataframe)} weather records")
-                else:
-                    error = await response.text()
-                    logger.error(f"Failed to fetch data: {error}")
+            headers = {"If-None-Match": self.etag} if self.etag and self.dataframe is not None else {}
+            # Arrow if available, typed columns straight into the DataFrame
+            status, body, response_headers = await arrow_codec.get_frame(
+                self.session, f"{self.db_api_url}/api/data_cluster", headers=headers
+            )
+            if status == 304:
+                logger.info("Cluster data unchanged")
+                return False
+            if status == 200:
+                self.dataframe = body
+                self.dataframe["date"] = pd.to_datetime(self.dataframe["date"])
+                self.etag = response_headers.get("ETag")
+                logger.info(f"Retrieved {len(self.dataframe)} weather records")
+                return True
+            else:
+                logger.error(f"Failed to fetch data: {body}")
         except Exception as e:
             logger.error(f"Error fetching data: {e}")
+        return False
 
     async def process_data(self):
         """Process data into spider chart format"""
@@ -126,18 +138,19 @@ class SpiderProcessor:
                 message = await pubsub.get_message(ignore_subscribe_messages=True)
                 if message:
                     try:
-                        data = json.loads(message['data'])
-                        current_time = datetime.fromtimestamp(data['dt'])
-                        logger.info(f"Received new weather data at: {current_time}")
+                        # One message per insert, however many rows it holds
+                        rows = columnar_codec.decode_message(message['data'])
+                        current_time = datetime.fromtimestamp(max(row['dt'] for row in rows))
+                        logger.info(f"Received {len(rows)} new weather rows up to: {current_time}")
 
                         # Đợi một chút để đảm bảo dữ liệu đã được xử lý bởi clustering
                         await asyncio.sleep(2)
 
                         # Cập nhật spider chart
-                        await self.get_weather_data()
-                        await self.process_data()
-                        await self.save_spider_data()
-                        logger.info("Spider data updated successfully")
+                        if await self.get_weather_data():
+                            await self.process_data()
+                            await self.save_spider_data()
+                            logger.info("Spider data updated successfully")
 
                     except json.JSONDecodeError as e:
                         logger.error(f"Error decoding JSON: {e}")
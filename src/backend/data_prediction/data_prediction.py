@@ -11,8 +11,9 @@ from sklearn.metrics import mean_squared_error, r2_score
 from lightgbm import LGBMRegressor, early_stopping, log_evaluation
 from sklearn.preprocessing import StandardScaler
 from src.logger import logger
+from src import columnar_codec
+from src.weather_sync import WeatherHistory
 import redis.asyncio as aioredis
-import json
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 
@@ -46,6 +47,7 @@ class WeatherPredictor:
         self.is_trained = False
         self.best_iteration = None
         self.redis = None
+        self.history = WeatherHistory(self.db_api_url)
 
     async def connect(self):
         """Initialize HTTP session and Redis"""
@@ -120,25 +122,19 @@ class WeatherPredictor:
     async def get_weather_data(self):
         """Get historical weather data from API"""
         try:
-            async with self.session.get(f"{self.db_api_url}/api/weather") as response:
-                if response.status == 200:
-                    data = await response.json()
-                    if not data:
-                        logger.warning("No historical data available")
-                        return pd.DataFrame()
-                    
-                    # Convert to DataFrame
-                    df = pd.DataFrame(data)
-                    
-                    # Convert timestamp to datetime
-                    df['dt'] = pd.to_datetime(df['dt'], unit='s')
-                    
-                    logger.info(f"Retrieved {len(df)} historical records")
-                    return df
-                else:
-                    error_text = await response.text()
-                    logger.error(f"Error response from API: {error_text}")
-                    raise Exception(f"API error: {response.status}, {error_text}")
+            received = await self.history.sync(self.session)
+            if self.history.data.empty:
+                logger.warning("No historical data available")
+                return pd.DataFrame()
+            
+            # Convert to DataFrame
+            df = self.history.frame()
+            
+            # Convert timestamp to datetime
+            df['dt'] = pd.to_datetime(df['dt'], unit='s')
+            
+            logger.info(f"Retrieved {len(df)} historical records ({received} new)")
+            return df
         except Exception as e:
             logger.error(f"Error fetching historical data: {e}")
             return pd.DataFrame()
@@ -292,11 +288,12 @@ class WeatherPredictor:
             while True:
                 message = await pubsub.get_message(ignore_subscribe_messages=True)
                 if message:
-                    data = json.loads(message['data'])
-                    logger.info(f"Received new data: dt={datetime.fromtimestamp(data['dt'])}")
+                    # One batch per insert; predict from its latest row
+                    rows = sorted(columnar_codec.decode_message(message['data']), key=lambda row: row['dt'])
+                    logger.info(f"Received {len(rows)} new rows: dt={datetime.fromtimestamp(rows[-1]['dt'])}")
                     
                     # Predict with new data
-                    predictions = await self.predict([data])
+                    predictions = await self.predict(rows)
                     if predictions:
                         await self.save_predictions(predictions)
                 
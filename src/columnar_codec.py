@@ -0,0 +1,191 @@
+import json
+from datetime import date, datetime
+
+try:
+    import msgpack
+except ImportError:  # msgpack is optional: without it bulk bodies stay JSON
+    msgpack = None
+
+# Bulk bodies encoded column by column with msgpack (see ``encode``)
+COLUMNAR_CONTENT_TYPE = "application/vnd.weather-columnar+msgpack"
+FORMAT_VERSION = 1
+# Table name of bodies that are a plain list of rows
+ROWS = "rows"
+
+# URLs that answered 415 to a columnar body; they get JSON from then on
+_json_only_urls = set()
+
+
+def is_available():
+    """Whether msgpack is installed"""
+    return msgpack is not None
+
+
+def is_columnar(content_type):
+    """Whether a Content-Type header announces a columnar body"""
+    return (content_type or "").split(";")[0].strip().lower() == COLUMNAR_CONTENT_TYPE
+
+
+def _default(value):
+    """Encode values msgpack does not know (datetimes, numpy/pandas scalars)"""
+    if isinstance(value, (datetime, date)):  # includes pandas.Timestamp
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalar
+        return value.item()
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def _to_columns(rows):
+    """A list of row dicts, or a DataFrame, as (column names, one value list per column)"""
+    if hasattr(rows, "columns") and hasattr(rows, "to_dict"):
+        columns = [str(column) for column in rows.columns]
+        return columns, [rows[column].tolist() for column in rows.columns]
+    columns = []
+    for row in rows:
+        for column in row:
+            if column not in columns:
+                columns.append(column)
+    return columns, [[row.get(column) for row in rows] for column in columns]
+
+
+def encode(body):
+    """
+    Encode a bulk body column by column.
+
+    Args:
+        body: A list of row dicts (or a DataFrame), or a dict mapping field
+            names to such lists, i.e. the shape the JSON body would have.
+
+    Returns:
+        bytes: msgpack ``{"version", "tables": {name: {"columns", "values"}}}``
+        where ``values`` holds one list per column. A plain list is stored
+        under the table name ``ROWS``.
+    """
+    tables = body if isinstance(body, dict) else {ROWS: body}
+    payload = {"version": FORMAT_VERSION, "tables": {}}
+    for name, rows in tables.items():
+        columns, values = _to_columns(rows)
+        payload["tables"][name] = {"columns": columns, "values": values}
+    return msgpack.packb(payload, use_bin_type=True, default=_default)
+
+
+class ColumnarTable:
+    """One decoded table: column names and one value list per column"""
+
+    def __init__(self, columns, values):
+        if len(columns) != len(values):
+            raise ValueError("Columnar table has a different number of names and value lists")
+        lengths = {len(column_values) for column_values in values}
+        if len(lengths) > 1:
+            raise ValueError("Columnar table has columns of different lengths")
+        self.columns = list(columns)
+        self.values = values
+        self.num_rows = lengths.pop() if lengths else 0
+
+    def column(self, name):
+        return self.values[self.columns.index(name)]
+
+    def rows(self, columns, defaults=None):
+        """
+        Row tuples in ``columns`` order, ready for ``executemany``.
+
+        Args:
+            columns (list): Columns to extract
+            defaults (dict): Value of columns the body may leave out, also used
+                for the missing (None) values of such a column
+
+        Raises:
+            ValueError: If a column is missing and has no default.
+        """
+        defaults = defaults or {}
+        selected = []
+        for name in columns:
+            if name in self.columns:
+                values = self.column(name)
+                if name in defaults and None in values:
+                    values = [defaults[name] if value is None else value for value in values]
+                selected.append(values)
+            elif name in defaults:
+                selected.append([defaults[name]] * self.num_rows)
+            else:
+                raise ValueError(f"Missing column {name}")
+        return list(zip(*selected))
+
+    def to_records(self):
+        """Row dicts, for callers that need the JSON shape"""
+        return [dict(zip(self.columns, row)) for row in zip(*self.values)]
+
+
+def decode(data):
+    """
+    Decode a body made by ``encode``.
+
+    Returns:
+        dict: Table name to ``ColumnarTable``.
+
+    Raises:
+        ValueError: If the body is not a columnar body of a known version.
+    """
+    try:
+        payload = msgpack.unpackb(data, raw=False)
+    except Exception as e:
+        raise ValueError(f"Invalid columnar body: {e}")
+    if not isinstance(payload, dict) or payload.get("version") != FORMAT_VERSION:
+        raise ValueError("Unsupported columnar body version")
+    return {
+        name: ColumnarTable(table["columns"], table["values"])
+        for name, table in payload["tables"].items()
+    }
+
+
+def encode_message(rows):
+    """
+    Encode a batch of rows as one pub/sub message: columnar like ``encode``,
+    a JSON list of rows if msgpack is missing.
+    """
+    if is_available():
+        return encode(rows)
+    return json.dumps(rows, default=_default)
+
+
+def decode_message(data):
+    """
+    Row dicts of a pub/sub message made by ``encode_message``. A JSON row
+    published on its own is read as a batch of one.
+    """
+    if is_available() and isinstance(data, bytes):
+        try:
+            return decode(data)[ROWS].to_records()
+        except (KeyError, ValueError):
+            pass  # JSON message
+    rows = json.loads(data)
+    return rows if isinstance(rows, list) else [rows]
+
+
+async def post_bulk(session, url, body, headers=None):
+    """
+    POST a bulk body with aiohttp, columnar if possible.
+
+    Falls back to JSON when msgpack is missing here, or for good when the
+    server answers 415 (it lacks msgpack). A 422 may come from a server that
+    predates the columnar encoding as well as from an invalid body, so only
+    that request is sent again as JSON, and the JSON answer is returned.
+
+    Returns:
+        tuple: (status, parsed JSON response on 200 else response text)
+    """
+    headers = dict(headers or {})
+    headers.setdefault('Accept', 'application/json')
+    if is_available() and url not in _json_only_urls:
+        columnar_headers = dict(headers, **{'Content-Type': COLUMNAR_CONTENT_TYPE})
+        async with session.post(url, data=encode(body), headers=columnar_headers) as response:
+            if response.status not in (415, 422):
+                result = await response.json() if response.status == 200 else await response.text()
+                return response.status, result
+            if response.status == 415:
+                _json_only_urls.add(url)
+
+    headers['Content-Type'] = 'application/json'
+    async with session.post(url, data=json.dumps(body, default=_default), headers=headers) as response:
+        result = await response.json() if response.status == 200 else await response.text()
+        return response.status, result
@@ -17,6 +17,7 @@ def load_config(config_file):
 
 # Load individual configurations from YAML files
 cfg_logger = load_config("configs/logger.yml")
+cfg_locations = load_config("configs/locations.yml")
 
 # Initialize the main configuration and allow new keys
 cfg = CN()
@@ -25,4 +26,8 @@ cfg.set_new_allowed(True)
 # Merge individual configurations into their respective sections in the main config
 cfg.logger = CN()
 cfg.logger.set_new_allowed(True)
-cfg.logger.merge_from_other_cfg(cfg_logger)
\ No newline at end of file
+cfg.logger.merge_from_other_cfg(cfg_logger)
+
+cfg.locations = CN()
+cfg.locations.set_new_allowed(True)
+cfg.locations.merge_from_other_cfg(cfg_locations)
\ No newline at end of file
@@ -0,0 +1,237 @@
+import os
+import sys
+import json
+from datetime import datetime, timezone
+
+sys.path.append(".")
+from src.logger import logger
+from src.crawl_data.slot_index import HourlySlotIndex, SLOT_SECONDS
+
+# 2020-12-31 17:00:00 UTC, first hour of the collected history
+HISTORY_START = 1609434000
+# Cap on failed hours remembered per range in the checkpoint
+MAX_FAILED_PER_RANGE = 100
+
+
+def _format_ts(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+class BackfillPlanner:
+    """
+    Plans historical fetches from the hourly slot index instead of a single
+    last_timestamp cursor.
+
+    Gaps are the unset slots of the index between ``history_start`` and now.
+    A plan is a list of ranges, each fetched in its own direction (newest-first
+    by default) and limited to the API calls left for the day. Every range keeps
+    a cursor in ``checkpoint_file``; the cursor only moves over contiguous
+    finished slots, so a restart resumes exactly where the previous run stopped.
+    Failed hours stay unset in the index and are simply planned again later.
+    """
+
+    def __init__(self, slot_index, checkpoint_file, history_start=HISTORY_START, order="newest"):
+        if order not in ("newest", "oldest"):
+            raise ValueError(f"Unknown backfill order: {order}")
+        self.slot_index = slot_index
+        self.checkpoint_file = checkpoint_file
+        self.history_start = history_start - history_start % SLOT_SECONDS
+        self.order = order
+        self.ranges = []
+        self.finished = {}
+
+    # ------------------------------------------------------------------ #
+    # Gap discovery
+    # ------------------------------------------------------------------ #
+    def find_gaps(self, end):
+        """
+        Find missing hourly slots.
+
+        Args:
+            end (int): Exclusive upper bound timestamp.
+
+        Returns:
+            list: ``(start, stop)`` tuples of missing slots, ``stop`` exclusive, oldest first.
+        """
+        gaps = []
+        gap_start = None
+        timestamp = self.history_start
+        while timestamp < end:
+            if self.slot_index.contains(timestamp):
+                if gap_start is not None:
+                    gaps.append((gap_start, timestamp))
+                    gap_start = None
+            elif gap_start is None:
+                gap_start = timestamp
+            timestamp += SLOT_SECONDS
+        if gap_start is not None:
+            gaps.append((gap_start, timestamp))
+        return gaps
+
+    def gap_report(self, end):
+        """Summary of the gaps that remain before ``end``"""
+        gaps = self.find_gaps(end)
+        failed = sorted({ts for r in self.ranges for ts in r["failed"] if not self.slot_index.contains(ts)})
+        return {
+            "generated_at": _format_ts(int(datetime.now(timezone.utc).timestamp())),
+            "history_start": _format_ts(self.history_start),
+            "end": _format_ts(end),
+            "stored_hours": len(self.slot_index),
+            "missing_hours": sum((stop - start) // SLOT_SECONDS for start, stop in gaps),
+            "failed_hours": [_format_ts(ts) for ts in failed],
+            "ranges": [
+                {
+                    "start": _format_ts(start),
+                    "end": _format_ts(stop - SLOT_SECONDS),
+                    "hours": (stop - start) // SLOT_SECONDS
+                }
+                for start, stop in gaps
+            ]
+        }
+
+    # ------------------------------------------------------------------ #
+    # Planning and checkpoints
+    # ------------------------------------------------------------------ #
+    def _load_checkpoint(self):
+        if not os.path.exists(self.checkpoint_file):
+            return []
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                return json.load(f).get("ranges", [])
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Cannot read backfill checkpoint {self.checkpoint_file}: {e}")
+            return []
+
+    def save_checkpoint(self):
+        """Atomically persist range cursors"""
+        tmp_file = f"{self.checkpoint_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({"order": self.order, "ranges": self.ranges}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.checkpoint_file)
+
+    @staticmethod
+    def _is_exhausted(plan_range):
+        if plan_range["direction"] < 0:
+            return plan_range["cursor"] < plan_range["start"]
+        return plan_range["cursor"] >= plan_range["stop"]
+
+    def _range_slots(self, plan_range):
+        """Slots of a range from its cursor onwards, in fetch order"""
+        if plan_range["direction"] < 0:
+            return range(plan_range["cursor"], plan_range["start"] - 1, -SLOT_SECONDS)
+        return range(plan_range["cursor"], plan_range["stop"], SLOT_SECONDS)
+
+    def plan(self, end, budget):
+        """
+        Build a new plan covering at most ``budget`` missing slots.
+
+        Args:
+            end (int): Exclusive upper bound timestamp.
+            budget (int): Number of API calls that may be spent.
+        """
+        gaps = self.find_gaps(end)
+        if self.order == "newest":
+            gaps.reverse()
+
+        self.ranges = []
+        for start, stop in gaps:
+            if budget <= 0:
+                break
+            hours = (stop - start) // SLOT_SECONDS
+            take = min(hours, budget)
+            budget -= take
+            if self.order == "newest":
+                start = stop - take * SLOT_SECONDS
+                cursor, direction = stop - SLOT_SECONDS, -1
+            else:
+                stop = start + take * SLOT_SECONDS
+                cursor, direction = start, 1
+            self.ranges.append({
+                "start": start,
+                "stop": stop,
+                "cursor": cursor,
+                "direction": direction,
+                "failed": []
+            })
+        self.save_checkpoint()
+
+    def resume_or_plan(self, end, budget):
+        """
+        Resume unfinished ranges from the checkpoint, or plan new ones.
+
+        Returns:
+            list: Timestamps to fetch, in order, at most ``budget`` of them.
+        """
+        self.ranges = self._load_checkpoint()
+        unfinished = [r for r in self.ranges if not self._is_exhausted(r)]
+        if unfinished:
+            logger.info(f"Resuming {len(unfinished)} backfill ranges from checkpoint")
+        elif budget > 0:
+            self.plan(end, budget)
+            unfinished = self.ranges
+
+        self.finished = {index: set() for index in range(len(self.ranges))}
+        slots = []
+        for plan_range in unfinished:
+            for timestamp in self._range_slots(plan_range):
+                if len(slots) >= budget:
+                    return slots
+                if not self.slot_index.contains(timestamp):
+                    slots.append(timestamp)
+        return slots
+
+    def mark_done(self, timestamp, success, save=True):
+        """
+        Record a finished slot and advance its range cursor over contiguous finished slots.
+
+        Returns:
+            bool: Whether a cursor moved. With ``save=False`` the caller saves the checkpoint.
+        """
+        for index, plan_range in enumerate(self.ranges):
+            if plan_range["start"] <= timestamp < plan_range["stop"]:
+                break
+        else:
+            return False
+
+        if not success and len(plan_range["failed"]) < MAX_FAILED_PER_RANGE:
+            plan_range["failed"].append(timestamp)
+
+        finished = self.finished.setdefault(index, set())
+        finished.add(timestamp)
+        moved = False
+        while not self._is_exhausted(plan_range):
+            cursor = plan_range["cursor"]
+            if cursor not in finished and not self.slot_index.contains(cursor):
+                break
+            finished.discard(cursor)
+            plan_range["cursor"] = cursor + plan_range["direction"] * SLOT_SECONDS
+            moved = True
+        if moved and save:
+            self.save_checkpoint()
+        return moved
+
+
+def main():
+    """Print the gap report of every location's observation log"""
+    data_dir = os.getenv('DATA_PATH', 'data')
+    observations_dir = os.path.join(data_dir, "observations")
+    now = int(datetime.now(timezone.utc).timestamp())
+    reports = {}
+    for name in sorted(os.listdir(observations_dir)) if os.path.isdir(observations_dir) else []:
+        log_dir = os.path.join(observations_dir, name)
+        slot_index = HourlySlotIndex.load(os.path.join(log_dir, "slot_index.bin"))
+        if slot_index is None:
+            continue
+        planner = BackfillPlanner(slot_index, os.path.join(log_dir, "backfill_checkpoint.json"))
+        planner.ranges = planner._load_checkpoint()
+        reports[name] = planner.gap_report(now - now % SLOT_SECONDS)
+    if not reports:
+        print("Slot index not found; start the crawler once to build it.")
+        return
+    print(json.dumps(reports, indent=4))
+
+
+if __name__ == "__main__":
+    main()
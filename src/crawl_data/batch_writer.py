@@ -0,0 +1,112 @@
+import time
+import asyncio
+
+from src.logger import logger
+
+
+class BatchWriter:
+    """
+    Buffers fetched observations and writes them in batches.
+
+    A flush is triggered when ``max_records`` observations are pending or
+    ``max_delay`` seconds after the oldest pending one arrived. Each flush
+    writes every location's share with one fsync (``LocationStore.save_batch``)
+    and only then calls ``on_flush(store, timestamps)``, so checkpoints never
+    get ahead of what is on disk. A share that fails to write goes back to the
+    pending observations and is retried with the next flush.
+
+    Use as an async context manager: the delay timer runs inside the block and
+    whatever is still pending is flushed on exit. Observations that still
+    cannot be written then are passed to ``on_error(store, timestamps)``.
+    """
+
+    def __init__(self, max_records, max_delay, on_flush=None, on_error=None):
+        self.max_records = max(1, max_records)
+        self.max_delay = max_delay
+        self.on_flush = on_flush
+        self.on_error = on_error
+        self.pending = []
+        self.first_pending_at = None
+        self.has_pending = asyncio.Event()
+        self.flush_lock = asyncio.Lock()
+        self.timer_task = None
+        self.batches = 0
+
+    async def __aenter__(self):
+        self.timer_task = asyncio.create_task(self._run_timer())
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.timer_task.cancel()
+        try:
+            await self.timer_task
+        except asyncio.CancelledError:
+            pass
+        self.timer_task = None
+        await self.flush()
+
+        batch, self.pending, self.first_pending_at = self.pending, [], None
+        by_store = {}
+        for store, data in batch:
+            by_store.setdefault(store, []).append(int(data['data'][0]['dt']))
+        for store, timestamps in by_store.items():
+            logger.error(f"[{store.name}] Giving up on writing {len(timestamps)} observations")
+            if self.on_error:
+                self.on_error(store, timestamps)
+
+    async def add(self, store, data):
+        """Buffer one observation of ``store``, flushing if the batch is full"""
+        self.pending.append((store, data))
+        if self.first_pending_at is None:
+            self.first_pending_at = time.monotonic()
+            self.has_pending.set()
+        if len(self.pending) >= self.max_records:
+            await self.flush()
+
+    async def flush(self):
+        """
+        Durably write everything pending.
+
+        Returns:
+            int: Number of observations newly stored.
+        """
+        async with self.flush_lock:
+            batch, self.pending, self.first_pending_at = self.pending, [], None
+            self.has_pending.clear()
+            if not batch:
+                return 0
+
+            by_store = {}
+            for store, data in batch:
+                by_store.setdefault(store, []).append(data)
+
+            stored = 0
+            for store, records in by_store.items():
+                try:
+                    stored += len(await store.save_batch(records))
+                except Exception as e:
+                    # Not acknowledged: kept for the next flush, max_delay from now
+                    logger.error(f"[{store.name}] Error writing batch of {len(records)} observations: {e}")
+                    self.pending[0:0] = [(store, data) for data in records]
+                    if self.first_pending_at is None:
+                        self.first_pending_at = time.monotonic()
+                        self.has_pending.set()
+                    continue
+                if self.on_flush:
+                    self.on_flush(store, [int(data['data'][0]['dt']) for data in records])
+
+            self.batches += 1
+            logger.info(f"Flushed batch of {len(batch)} observations ({stored} new)")
+            return stored
+
+    async def _run_timer(self):
+        """Flush batches that have waited ``max_delay`` seconds"""
+        while True:
+            await self.has_pending.wait()
+            if self.first_pending_at is None:
+                continue
+            wait = self.first_pending_at + self.max_delay - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            else:
+                await self.flush()
@@ -0,0 +1,177 @@
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import tempfile
+
+sys.path.append(".")
+from src.logger import logger
+from src.locations import Location
+from src.crawl_data.fake_owm_server import FakeOneCallServer
+
+HOURS_PER_YEAR = 8760
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark WeatherCrawler against a local fake One Call server"
+    )
+    parser.add_argument("--years", type=float, default=2.0, help="history to backfill per location")
+    parser.add_argument("--locations", type=int, default=1, help="number of synthetic locations")
+    parser.add_argument("--concurrency", type=int, default=8, help="backfill workers")
+    parser.add_argument("--batch-size", type=int, default=50, help="records per backfill write batch")
+    parser.add_argument("--latency", type=float, default=0.02, help="server latency per request, seconds")
+    parser.add_argument("--jitter", type=float, default=0.01, help="extra random server latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    parser.add_argument("--server-per-minute", type=int, default=0,
+                        help="server-side limit answered with 429 (0 = unlimited)")
+    parser.add_argument("--client-per-minute", type=int, default=1000000,
+                        help="crawler MAX_REQUESTS_PER_MINUTE")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="also delete the observation logs and time the rebuild from the response cache")
+    parser.add_argument("--data-dir", help="keep crawler data here instead of a temporary directory")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="keep the crawler's per-request logs")
+    return parser.parse_args(argv)
+
+
+def configure_environment(args, backfill_start):
+    """Crawler settings are read from the environment when its module is imported"""
+    os.environ.update({
+        "API_KEY": "benchmark",
+        "MAX_API_CALLS_PER_DAY": str(10 ** 9),
+        "MAX_REQUESTS_PER_MINUTE": str(args.client_per_minute),
+        "MAX_RETRIES": "3",
+        "RETRY_DELAY": "0.1",
+        "BACKFILL_START": str(backfill_start),
+        "BACKFILL_DAILY_RESERVE": "0",
+        "BACKFILL_BATCH_SIZE": str(args.batch_size),
+    })
+
+
+def stored_hours(crawler):
+    return sum(len(store.slot_index) for store in crawler.stores.values())
+
+
+async def timed_backfill(crawler, concurrency):
+    """Run one backfill; returns (new records, seconds, crawler stats delta)"""
+    before_records = stored_hours(crawler)
+    before_stats = dict(crawler.stats)
+    started_at = time.monotonic()
+    await crawler.crawl_historical_data(concurrency=concurrency)
+    elapsed = time.monotonic() - started_at
+    stats = {key: crawler.stats[key] - before_stats[key] for key in crawler.stats}
+    return stored_hours(crawler) - before_records, elapsed, stats
+
+
+def phase_report(records, elapsed, stats):
+    return {
+        "records": records,
+        "wall_time_s": round(elapsed, 3),
+        "records_per_s": round(records / elapsed, 1) if elapsed > 0 else None,
+        "api_calls": stats["api_calls"],
+        # Calls that returned nothing usable (429s and failures)
+        "api_calls_wasted": stats["rate_limited"] + stats["errors"],
+        "rate_limited": stats["rate_limited"],
+        "errors": stats["errors"],
+        "cache_hits": stats["cache_hits"],
+    }
+
+
+async def run(args):
+    now = int(time.time())
+    now -= now % 3600
+    backfill_start = now - int(args.years * HOURS_PER_YEAR) * 3600
+    configure_environment(args, backfill_start)
+    # Imported only now so the module picks up the benchmark settings
+    from src.crawl_data.weather_crawler import WeatherCrawler
+
+    server = FakeOneCallServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        per_minute=args.server_per_minute,
+        retry_after=args.retry_after
+    )
+    base_url = await server.start()
+    locations = [
+        Location(f"bench_{i}", round(16.0544 + 0.05 * i, 4), round(108.2022 - 0.05 * i, 4))
+        for i in range(args.locations)
+    ]
+
+    temp_dir = None
+    data_dir = args.data_dir
+    if data_dir is None:
+        temp_dir = tempfile.TemporaryDirectory(prefix="crawler-benchmark-")
+        data_dir = temp_dir.name
+
+    report = {
+        "locations": args.locations,
+        "years": args.years,
+        "hours_per_location": (now - backfill_start) // 3600,
+        "concurrency": args.concurrency,
+        "batch_size": args.batch_size,
+    }
+    crawler = WeatherCrawler(data_dir=data_dir, base_url=base_url, locations=locations, publish=False)
+    try:
+        report["backfill"] = phase_report(*await timed_backfill(crawler, args.concurrency))
+
+        before_records, before_stats = stored_hours(crawler), dict(crawler.stats)
+        started_at = time.monotonic()
+        await crawler.hourly_job()
+        stats = {key: crawler.stats[key] - before_stats[key] for key in crawler.stats}
+        report["hourly_job"] = phase_report(stored_hours(crawler) - before_records, time.monotonic() - started_at, stats)
+        await crawler.close_session()
+
+        if args.rebuild:
+            shutil.rmtree(os.path.join(data_dir, "observations"))
+            shutil.rmtree(os.path.join(data_dir, "archive"), ignore_errors=True)
+            crawler = WeatherCrawler(data_dir=data_dir, base_url=base_url, locations=locations, publish=False)
+            report["rebuild_from_cache"] = phase_report(*await timed_backfill(crawler, args.concurrency))
+            await crawler.close_session()
+    finally:
+        await crawler.close_session()
+        await server.stop()
+        if temp_dir is not None:
+            temp_dir.cleanup()
+
+    report["server"] = dict(server.stats)
+    return report
+
+
+def print_report(report):
+    print(
+        f"Backfill of {report['hours_per_location']} hours x {report['locations']} locations "
+        f"({report['years']} years), concurrency {report['concurrency']}, batch {report['batch_size']}"
+    )
+    for phase in ("backfill", "hourly_job", "rebuild_from_cache"):
+        if phase not in report:
+            continue
+        result = report[phase]
+        print(
+            f"  {phase:<19} {result['records']:>8} records in {result['wall_time_s']:>9.2f}s "
+            f"({result['records_per_s'] or 0:>8.1f} records/s), "
+            f"{result['api_calls']} API calls, {result['api_calls_wasted']} wasted "
+            f"({result['rate_limited']} rate limited, {result['errors']} errors), "
+            f"{result['cache_hits']} cache hits"
+        )
+    print(f"  server              {report['server']}")
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if not args.verbose:
+        logger.disable("src")
+    report = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(report, indent=4))
+    else:
+        print_report(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+import sys
+import math
+import time
+import random
+import asyncio
+import argparse
+from collections import deque
+from datetime import datetime, timezone
+
+from aiohttp import web
+
+sys.path.append(".")
+from src.logger import logger
+
+TIMEMACHINE_PATH = "/data/3.0/onecall/timemachine"
+VIETNAM_OFFSET = 25200  # 7 hours * 3600 seconds
+
+WEATHER_TYPES = (
+    (800, "Clear", "clear sky", "01"),
+    (801, "Clouds", "few clouds", "02"),
+    (803, "Clouds", "broken clouds", "04"),
+    (500, "Rain", "light rain", "10"),
+    (501, "Rain", "moderate rain", "10"),
+)
+
+
+def synthetic_observation(lat, lon, timestamp):
+    """
+    Deterministic One Call 3.0 timemachine response for ``(lat, lon, timestamp)``.
+
+    Temperature follows a yearly and a daily cycle around a coastal central
+    Vietnam climate, plus noise seeded by the request, so the same request
+    always returns the same response.
+    """
+    rng = random.Random(f"{lat:.4f},{lon:.4f},{timestamp}")
+    moment = datetime.fromtimestamp(timestamp, timezone.utc)
+    day_of_year = moment.timetuple().tm_yday
+    local_hour = (moment.hour + VIETNAM_OFFSET // 3600) % 24
+
+    yearly = math.sin(2 * math.pi * (day_of_year - 105) / 365.25)
+    daily = math.sin(2 * math.pi * (local_hour - 9) / 24)
+    temp = 299.5 - 0.3 * abs(lat - 16) + 3.5 * yearly + 2.5 * daily + rng.gauss(0, 0.8)
+    humidity = min(100, max(40, round(80 - 10 * daily - 5 * yearly + rng.gauss(0, 4))))
+    clouds = min(100, max(0, round(45 - 20 * yearly + rng.gauss(0, 25))))
+    weather_id, main, description, icon = WEATHER_TYPES[min(len(WEATHER_TYPES) - 1, clouds // 21)]
+    day_start = timestamp - timestamp % 86400
+
+    observation = {
+        "dt": timestamp,
+        "sunrise": day_start - VIETNAM_OFFSET + 5 * 3600 + 40 * 60,
+        "sunset": day_start - VIETNAM_OFFSET + 17 * 3600 + 50 * 60,
+        "temp": round(temp, 2),
+        "feels_like": round(temp + 0.05 * (humidity - 60), 2),
+        "pressure": round(1010 - 4 * yearly + rng.gauss(0, 2)),
+        "humidity": humidity,
+        "dew_point": round(temp - (100 - humidity) / 5, 2),
+        "clouds": clouds,
+        "visibility": 10000 if clouds < 80 else rng.choice((6000, 8000, 10000)),
+        "wind_speed": round(abs(rng.gauss(2.5, 1.2)), 2),
+        "wind_deg": rng.randrange(0, 360),
+        "weather": [{"id": weather_id, "main": main, "description": description, "icon": f"{icon}d"}]
+    }
+    if main == "Rain":
+        observation["rain"] = {"1h": round(abs(rng.gauss(1.0, 0.8)), 2)}
+
+    return {
+        "lat": lat,
+        "lon": lon,
+        "timezone": "Asia/Ho_Chi_Minh",
+        "timezone_offset": VIETNAM_OFFSET,
+        "data": [observation]
+    }
+
+
+class FakeOneCallServer:
+    """
+    Local stand-in for the OpenWeatherMap One Call 3.0 timemachine endpoint.
+
+    Behaviour knobs:
+        latency         seconds added to every response (plus up to ``jitter`` more)
+        error_rate      fraction of requests answered with HTTP 500
+        per_minute      server-side limit; requests above it get HTTP 429
+        retry_after     Retry-After seconds sent with a 429
+
+    Request counters are available on ``stats`` and at ``GET /stats``.
+    """
+
+    def __init__(self, latency=0.0, jitter=0.0, error_rate=0.0, per_minute=0, retry_after=1, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.per_minute = per_minute
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.recent = deque()
+        self.stats = {"requests": 0, "ok": 0, "errors": 0, "rate_limited": 0, "bad_requests": 0}
+        self.runner = None
+
+    def create_app(self):
+        app = web.Application()
+        app.router.add_get(TIMEMACHINE_PATH, self.handle_timemachine)
+        app.router.add_get("/stats", self.handle_stats)
+        return app
+
+    def _over_limit(self):
+        if not self.per_minute:
+            return False
+        now = time.monotonic()
+        while self.recent and now - self.recent[0] >= 60:
+            self.recent.popleft()
+        if len(self.recent) >= self.per_minute:
+            return True
+        self.recent.append(now)
+        return False
+
+    async def handle_timemachine(self, request):
+        self.stats["requests"] += 1
+        if self._over_limit():
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"cod": 429, "message": "Too many requests"},
+                status=429,
+                headers={"Retry-After": str(self.retry_after)}
+            )
+
+        try:
+            lat = float(request.query["lat"])
+            lon = float(request.query["lon"])
+            timestamp = int(request.query["dt"])
+        except (KeyError, ValueError):
+            self.stats["bad_requests"] += 1
+            return web.json_response({"cod": 400, "message": "Invalid parameters"}, status=400)
+
+        delay = self.latency + self.rng.random() * self.jitter
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+        if self.rng.random() < self.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response({"cod": 500, "message": "Internal error"}, status=500)
+
+        self.stats["ok"] += 1
+        return web.json_response(synthetic_observation(lat, lon, timestamp - timestamp % 3600))
+
+    async def handle_stats(self, request):
+        return web.json_response(self.stats)
+
+    async def start(self, host="127.0.0.1", port=0):
+        """Serve in the running event loop; returns the timemachine URL"""
+        self.runner = web.AppRunner(self.create_app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, host, port)
+        await site.start()
+        bound_port = site._server.sockets[0].getsockname()[1]
+        return f"http://{host}:{bound_port}{TIMEMACHINE_PATH}"
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Fake OpenWeatherMap One Call 3.0 timemachine server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of HTTP 500 responses")
+    parser.add_argument("--per-minute", type=int, default=0, help="server-side limit (0 = unlimited)")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+async def main(argv=None):
+    args = parse_args(argv)
+    server = FakeOneCallServer(
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        per_minute=args.per_minute,
+        retry_after=args.retry_after,
+        seed=args.seed
+    )
+    url = await server.start(args.host, args.port)
+    logger.info(f"Fake One Call server listening on {url} (set BASE_URL to this)")
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await server.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,241 @@
+import os
+import json
+import asyncio
+
+import aiofiles
+
+from src.logger import logger
+from src.locations import observation_dir
+from src.observation_log import ObservationLog
+from src.crawl_data.slot_index import HourlySlotIndex, SLOT_SECONDS
+from src.crawl_data.backfill_planner import BackfillPlanner, HISTORY_START
+
+# Files of the single-location layout, relative to the data directory
+LEGACY_LOG_FILES = ("manifest.json", "slot_index.bin", "log.lock")
+LEGACY_STATE_FILES = ("backfill_checkpoint.json", "gap_report.json")
+
+
+def migrate_single_location_layout(data_dir, location_name):
+    """
+    Move the single-location layout (``data/observations/*`` plus the backfill
+    checkpoint and gap report in ``data/``) into the directory of ``location_name``.
+    Runs once; does nothing when the partitioned layout already exists.
+    """
+    root = os.path.join(data_dir, "observations")
+    target = observation_dir(data_dir, location_name)
+    if not os.path.exists(os.path.join(root, "manifest.json")) or os.path.exists(target):
+        return
+
+    os.makedirs(target)
+    moved = 0
+    for name in os.listdir(root):
+        if name in LEGACY_LOG_FILES or name.startswith("segment-"):
+            os.replace(os.path.join(root, name), os.path.join(target, name))
+            moved += 1
+    for name in LEGACY_STATE_FILES:
+        path = os.path.join(data_dir, name)
+        if os.path.exists(path):
+            os.replace(path, os.path.join(target, name))
+    logger.info(f"Moved {moved} observation log files into partition {target}")
+
+
+class LocationStore:
+    """
+    Crawl state of one location: its observation log, hourly slot index,
+    backfill planner and gap report, all under ``data/observations/<name>/``,
+    plus its partition of the columnar archive and the observation stream
+    publisher when they are given.
+    """
+
+    def __init__(self, location, data_dir, legacy_file=None,
+                 history_start=HISTORY_START, order="newest", archive=None, publisher=None):
+        self.location = location
+        self.name = location.name
+        self.log_dir = observation_dir(data_dir, location.name)
+        self.observation_log = ObservationLog(self.log_dir, legacy_file=legacy_file)
+        self.slot_index_file = os.path.join(self.log_dir, "slot_index.bin")
+        self.gap_report_file = os.path.join(self.log_dir, "gap_report.json")
+        self.archive_pending_file = os.path.join(self.log_dir, "archive_pending.json")
+        self.save_lock = asyncio.Lock()
+        self.publisher = publisher
+        self.observation_log.open()
+        self.slot_index = self._load_slot_index()
+        self.archive = archive
+        if self.archive is not None and self.archive.is_empty(self.name) and not self.observation_log.is_empty():
+            self.archive.rebuild(self.name, self.observation_log.iter_records())
+            self._save_archive_pending([])
+        self._archive_pending()
+        self.planner = BackfillPlanner(
+            self.slot_index,
+            os.path.join(self.log_dir, "backfill_checkpoint.json"),
+            history_start=history_start,
+            order=order
+        )
+
+    def _load_slot_index(self):
+        """Load the hourly slot index, rebuilding it from the log only if it is missing"""
+        slot_index = HourlySlotIndex.load(self.slot_index_file)
+        if slot_index is None:
+            logger.info(f"[{self.name}] Slot index not found, rebuilding from observation log...")
+            slot_index = HourlySlotIndex(self.slot_index_file)
+
+        # Replay what the log holds past the position the index was saved at. A crash
+        # between a log append and the index save may have sealed segments since then,
+        # so this is not only the active segment. Indexes without a position replay it all.
+        position = slot_index.position
+        for entry, position in self.observation_log.iter_since(slot_index.position):
+            if isinstance(entry, dict) and entry.get('data'):
+                timestamp = entry['data'][0].get('dt')
+                if timestamp:
+                    slot_index.add(int(timestamp))
+        slot_index.set_position(position)
+        slot_index.save()
+        logger.info(f"[{self.name}] Slot index ready with {len(slot_index)} stored hours")
+        return slot_index
+
+    async def save(self, data):
+        """Append one raw One Call response unless its hour is already stored"""
+        return bool(await self.save_batch([data]))
+
+    async def save_batch(self, records):
+        """
+        Append raw One Call responses whose hours are not stored yet.
+
+        The batch is written with a single fsync and the slot index is saved once.
+        Stored observations are then announced on the observation stream.
+
+        Returns:
+            list: Timestamps that were newly stored.
+        """
+        async with self.save_lock:
+            fresh, timestamps = [], []
+            for data in records:
+                timestamp = int(data['data'][0]['dt'])
+                if self.slot_index.contains(timestamp) or timestamp in timestamps:
+                    logger.info(f"[{self.name}] Data for timestamp {timestamp} already exists, skipping save...")
+                    continue
+                fresh.append(data)
+                timestamps.append(timestamp)
+            if not fresh:
+                return []
+
+            # File I/O runs in a worker thread so the event loop never blocks on fsync.
+            # The log is written first: an index lagging behind the log is repaired on open.
+            start = self.slot_index.position
+            position = await asyncio.to_thread(self.observation_log.append_many, fresh)
+            for timestamp in timestamps:
+                self.slot_index.add(timestamp)
+            self.slot_index.set_position(position)
+            await asyncio.to_thread(self.slot_index.save)
+
+            if self.archive is not None:
+                try:
+                    await asyncio.to_thread(self.archive.write, self.name, fresh)
+                except Exception as e:
+                    # The log is the source of truth: the range is archived again from it
+                    # on the next open or compaction
+                    logger.error(f"[{self.name}] Error archiving {len(fresh)} observations: {e}")
+                    await asyncio.to_thread(self._add_archive_pending, start, position)
+
+        if self.publisher is not None:
+            await self.publisher.publish(self.name, fresh)
+        return timestamps
+
+    async def restore_from_cache(self, cache, end_timestamp, batch_size=500):
+        """
+        Store cached responses for every missing hour before ``end_timestamp``.
+
+        Rebuilding a lost log this way costs disk reads instead of API calls.
+
+        Returns:
+            int: Number of hours restored.
+        """
+        lat, lon = self.location.lat, self.location.lon
+
+        def load(timestamps):
+            records = (cache.get(lat, lon, timestamp) for timestamp in timestamps)
+            return [data for data in records if data and data.get('data')]
+
+        restored = 0
+        gaps = await asyncio.to_thread(self.planner.find_gaps, end_timestamp)
+        for start, stop in gaps:
+            for chunk_start in range(start, stop, batch_size * SLOT_SECONDS):
+                chunk_stop = min(stop, chunk_start + batch_size * SLOT_SECONDS)
+                records = await asyncio.to_thread(load, range(chunk_start, chunk_stop, SLOT_SECONDS))
+                if records:
+                    restored += len(await self.save_batch(records))
+        if restored:
+            logger.info(f"[{self.name}] Restored {restored} hours from the response cache")
+        return restored
+
+    def _load_archive_pending(self):
+        """Log ranges (``{"start", "end"}`` positions) whose archive write failed"""
+        if not os.path.exists(self.archive_pending_file):
+            return []
+        try:
+            with open(self.archive_pending_file, 'r') as file:
+                return json.load(file)
+        except (OSError, ValueError) as e:
+            logger.error(f"[{self.name}] Cannot read {self.archive_pending_file}: {e}")
+            return []
+
+    def _save_archive_pending(self, pending):
+        if not pending:
+            if os.path.exists(self.archive_pending_file):
+                os.remove(self.archive_pending_file)
+            return
+        tmp_file = f"{self.archive_pending_file}.tmp"
+        with open(tmp_file, 'w') as file:
+            json.dump(pending, file)
+        os.replace(tmp_file, self.archive_pending_file)
+
+    def _add_archive_pending(self, start, end):
+        self._save_archive_pending(self._load_archive_pending() + [{"start": start, "end": end}])
+
+    def _archive_pending(self):
+        """
+        Archive again the log ranges whose archive write failed.
+
+        Returns:
+            int: Number of observations archived.
+        """
+        if self.archive is None:
+            return 0
+        pending = self._load_archive_pending()
+        archived = 0
+        while pending:
+            start, end = pending[0]["start"], pending[0]["end"]
+            records = []
+            for record, position in self.observation_log.iter_since(start):
+                records.append(record)
+                if position == end:
+                    break
+            try:
+                archived += self.archive.write(self.name, records)
+            except Exception as e:
+                logger.error(f"[{self.name}] Error archiving {len(records)} pending observations: {e}")
+                break
+            pending.pop(0)
+            self._save_archive_pending(pending)
+        if archived:
+            logger.info(f"[{self.name}] Archived {archived} observations of earlier failed writes")
+        return archived
+
+    async def compact_archive(self):
+        """Archive the ranges of failed writes, then merge small archive part files of this location"""
+        if self.archive is None:
+            return
+        try:
+            async with self.save_lock:
+                await asyncio.to_thread(self._archive_pending)
+            await asyncio.to_thread(self.archive.compact, self.name)
+        except Exception as e:
+            logger.error(f"[{self.name}] Error compacting archive: {e}")
+
+    async def save_gap_report(self, end_timestamp):
+        """Write the report of remaining gaps next to the location's log"""
+        report = await asyncio.to_thread(self.planner.gap_report, end_timestamp)
+        report["location"] = self.name
+        async with aiofiles.open(self.gap_report_file, 'w') as file:
+            await file.write(json.dumps(report, indent=4))
+        return report
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import asyncio
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+
+from src.logger import logger
+
+WINDOW_SECONDS = 60
+
+
+def parse_retry_after(value):
+    """
+    Parse a Retry-After header value.
+
+    Args:
+        value (str): Either a number of seconds or an HTTP date.
+
+    Returns:
+        float: Seconds to wait, or None if the header is missing or invalid.
+    """
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimiter:
+    """
+    API call budget enforced *before* each request.
+
+    - Per-minute limit: sliding window over the timestamps of recent calls, so no
+      60 second window ever holds more than ``per_minute`` calls.
+    - Per-day limit: counter reset at 00:00 UTC, when the OpenWeatherMap quota resets.
+    - Server back-off: ``penalize`` blocks all callers until a Retry-After deadline.
+
+    State is persisted to ``state_file`` so a restart neither re-spends calls
+    already made today nor forgets an active back-off.
+    """
+
+    def __init__(self, state_file, per_minute, per_day):
+        self.state_file = state_file
+        self.per_minute = per_minute
+        self.per_day = per_day
+        self.recent_calls = deque()
+        self.day = self._utc_day(time.time())
+        self.calls_today = 0
+        self.blocked_until = 0.0
+        self.lock = asyncio.Lock()
+        self._load_state()
+
+    @staticmethod
+    def _utc_day(timestamp):
+        return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _seconds_until_next_utc_day(timestamp):
+        now = datetime.fromtimestamp(timestamp, timezone.utc)
+        tomorrow = (now + timedelta(days=1)).replace(hour=0, minute=0, second=0, microsecond=0)
+        return (tomorrow - now).total_seconds()
+
+    def _load_state(self):
+        """Restore limiter state saved by a previous run"""
+        if not os.path.exists(self.state_file):
+            return
+        try:
+            with open(self.state_file, 'r') as f:
+                state = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Cannot read rate limiter state {self.state_file}: {e}")
+            return
+
+        now = time.time()
+        self.recent_calls = deque(t for t in state.get("recent_calls", []) if now - t < WINDOW_SECONDS)
+        self.blocked_until = float(state.get("blocked_until", 0.0))
+        if state.get("day") == self._utc_day(now):
+            self.calls_today = int(state.get("calls_today", 0))
+        logger.info(
+            f"Restored rate limiter state: {self.calls_today}/{self.per_day} calls today, "
+            f"{len(self.recent_calls)} calls in the last minute"
+        )
+
+    def _save_state(self):
+        tmp_file = f"{self.state_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump({
+                "day": self.day,
+                "calls_today": self.calls_today,
+                "recent_calls": list(self.recent_calls),
+                "blocked_until": self.blocked_until
+            }, f)
+        os.replace(tmp_file, self.state_file)
+
+    def _wait_time(self, now):
+        """Seconds until the next call is allowed (0 if allowed now)"""
+        if now < self.blocked_until:
+            return self.blocked_until - now
+
+        if self._utc_day(now) != self.day:
+            self.day = self._utc_day(now)
+            self.calls_today = 0
+            logger.info("Reset daily API call counter")
+        if self.calls_today >= self.per_day:
+            return self._seconds_until_next_utc_day(now)
+
+        while self.recent_calls and now - self.recent_calls[0] >= WINDOW_SECONDS:
+            self.recent_calls.popleft()
+        if len(self.recent_calls) >= self.per_minute:
+            return WINDOW_SECONDS - (now - self.recent_calls[0])
+        return 0.0
+
+    async def acquire(self):
+        """Wait until one API call fits in both budgets, then reserve it"""
+        async with self.lock:
+            while True:
+                now = time.time()
+                wait = self._wait_time(now)
+                if wait <= 0:
+                    break
+                if self.calls_today >= self.per_day:
+                    logger.warning(f"Daily API call limit reached. Waiting {wait:.0f}s until reset...")
+                elif wait > 1:
+                    logger.info(f"Sleeping for {wait:.1f} seconds to respect rate limit...")
+                await asyncio.sleep(wait)
+
+            self.recent_calls.append(now)
+            self.calls_today += 1
+            self._save_state()
+
+    def penalize(self, retry_after):
+        """Block every caller for ``retry_after`` seconds (server asked us to back off)"""
+        self.blocked_until = max(self.blocked_until, time.time() + retry_after)
+        self._save_state()
+        logger.warning(f"API rate limit reached. Backing off for {retry_after:.1f} seconds...")
+
+    def remaining_today(self):
+        """Calls still available in the current UTC day"""
+        if self._utc_day(time.time()) != self.day:
+            return self.per_day
+        return max(0, self.per_day - self.calls_today)
@@ -0,0 +1,59 @@
+import os
+import gzip
+import json
+import hashlib
+
+from src.logger import logger
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw One Call responses.
+
+    A response is stored under the SHA-256 of its request key ``(lat, lon, dt)``
+    as ``<cache_dir>/<first two hex digits>/<digest>.json.gz``. The cache lives
+    apart from the observation logs, so a lost or damaged log can be rebuilt
+    from it without spending API calls. Entries are written atomically and
+    never change; an unreadable entry is dropped and fetched again.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def key(lat, lon, timestamp):
+        request = f"{float(lat):.4f},{float(lon):.4f},{int(timestamp)}"
+        return hashlib.sha256(request.encode("ascii")).hexdigest()
+
+    def path(self, lat, lon, timestamp):
+        digest = self.key(lat, lon, timestamp)
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.json.gz")
+
+    def contains(self, lat, lon, timestamp):
+        return os.path.exists(self.path(lat, lon, timestamp))
+
+    def get(self, lat, lon, timestamp):
+        """Return the cached response, or None on a miss"""
+        path = self.path(lat, lon, timestamp)
+        try:
+            with gzip.open(path, 'rt', encoding='utf-8') as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, EOFError, json.JSONDecodeError) as e:
+            logger.warning(f"Dropping unreadable cache entry {path}: {e}")
+            os.remove(path)
+            return None
+        return data
+
+    def put(self, lat, lon, timestamp, data):
+        """Store a response (no-op if it is already cached)"""
+        path = self.path(lat, lon, timestamp)
+        if os.path.exists(path):
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_file = f"{path}.tmp"
+        with gzip.open(tmp_file, 'wt', encoding='utf-8') as f:
+            json.dump(data, f, separators=(',', ':'))
+        os.replace(tmp_file, path)
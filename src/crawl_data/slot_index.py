@@ -0,0 +1,129 @@
+import os
+import json
+import struct
+
+from src.logger import logger
+
+SLOT_SECONDS = 3600
+
+
+class HourlySlotIndex:
+    """
+    Persistent bitmap of hourly slots already stored in the observation log.
+
+    Bit ``h - base_hour`` is set when the observation for hour ``h`` (hours since
+    epoch) exists, so lookups and inserts are O(1) and the file stays tiny
+    (about 1 KB per year of hourly data). The file is replaced atomically on save.
+
+    ``position`` is the observation log position (see ``ObservationLog.iter_since``)
+    the index is up to date with: the records after it are replayed on open.
+    """
+
+    MAGIC = b"HSI2"
+    HEADER = struct.Struct("<4sqqI")  # magic, base_hour, count, length of the JSON position
+    # Indexes written before the position was stored
+    LEGACY_MAGIC = b"HSI1"
+    LEGACY_HEADER = struct.Struct("<4sqq")
+
+    def __init__(self, path):
+        self.path = path
+        self.base_hour = None
+        self.bits = bytearray()
+        self.count = 0
+        self.position = None
+        self.dirty = False
+
+    @classmethod
+    def load(cls, path):
+        """Load index from disk, returning None if it is missing or unreadable"""
+        index = cls(path)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                content = f.read()
+            magic = content[:4]
+            if magic == cls.LEGACY_MAGIC:
+                _, base_hour, count = cls.LEGACY_HEADER.unpack_from(content)
+                start = cls.LEGACY_HEADER.size
+            elif magic == cls.MAGIC:
+                _, base_hour, count, length = cls.HEADER.unpack_from(content)
+                start = cls.HEADER.size + length
+                if length:
+                    index.position = json.loads(content[cls.HEADER.size:start])
+            else:
+                raise ValueError(f"unexpected magic {magic!r}")
+        except (OSError, struct.error, ValueError) as e:
+            logger.error(f"Cannot read slot index {path}: {e}")
+            return None
+
+        index.bits = bytearray(content[start:])
+        index.base_hour = base_hour if index.bits else None
+        index.count = count
+        return index
+
+    def save(self):
+        """Atomically write the index to disk if it changed"""
+        if not self.dirty:
+            return
+        position = json.dumps(self.position).encode() if self.position else b""
+        tmp_file = f"{self.path}.tmp"
+        with open(tmp_file, 'wb') as f:
+            f.write(self.HEADER.pack(self.MAGIC, self.base_hour or 0, self.count, len(position)))
+            f.write(position)
+            f.write(self.bits)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.path)
+        self.dirty = False
+
+    def _position(self, timestamp):
+        hour = int(timestamp) // SLOT_SECONDS
+        if self.base_hour is None:
+            return None
+        offset = hour - self.base_hour
+        if offset < 0 or offset >= len(self.bits) * 8:
+            return None
+        return offset
+
+    def _grow(self, hour):
+        """Extend the bitmap so that ``hour`` is addressable"""
+        aligned = hour - hour % 8
+        if self.base_hour is None:
+            self.base_hour = aligned
+            self.bits = bytearray(1)
+        elif aligned < self.base_hour:
+            self.bits[0:0] = bytes((self.base_hour - aligned) // 8)
+            self.base_hour = aligned
+        last_hour = self.base_hour + len(self.bits) * 8
+        if hour >= last_hour:
+            self.bits.extend(bytes((hour - last_hour) // 8 + 1))
+
+    def contains(self, timestamp):
+        offset = self._position(timestamp)
+        if offset is None:
+            return False
+        return bool(self.bits[offset >> 3] & (1 << (offset & 7)))
+
+    def add(self, timestamp):
+        """Mark the slot of ``timestamp`` as stored; returns False if it already was"""
+        if self.contains(timestamp):
+            return False
+        self._grow(int(timestamp) // SLOT_SECONDS)
+        offset = self._position(timestamp)
+        self.bits[offset >> 3] |= 1 << (offset & 7)
+        self.count += 1
+        self.dirty = True
+        return True
+
+    def set_position(self, position):
+        """Record the log position the index now covers"""
+        if position and position != self.position:
+            self.position = position
+            self.dirty = True
+
+    def __len__(self):
+        return self.count
+
+    def __contains__(self, timestamp):
+        return self.contains(timestamp)
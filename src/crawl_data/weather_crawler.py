@@ -1,17 +1,25 @@
 from dotenv import load_dotenv
 import os
-import json
-from datetime import datetime, timedelta, timezone
+from datetime import datetime, timedelta
 import aiohttp
 import asyncio
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
-import aiofiles
 import sys
-from filelock import FileLock
+import time
+from itertools import zip_longest
 
 sys.path.append(".")
 from src.logger import logger
+from src.locations import get_locations
+from src import observation_archive
+from src.observation_archive import ObservationArchive
+from src.observation_stream import ObservationPublisher
+from src.crawl_data.rate_limiter import RateLimiter, parse_retry_after
+from src.crawl_data.backfill_planner import HISTORY_START
+from src.crawl_data.location_store import LocationStore, migrate_single_location_layout
+from src.crawl_data.batch_writer import BatchWriter
+from src.crawl_data.response_cache import ResponseCache
 
 # Load environment variables
 load_dotenv()
@@ -19,113 +27,103 @@ load_dotenv()
 # Load constants from environment variables
 API_KEY = os.getenv('API_KEY')
 BASE_URL = os.getenv('BASE_URL')
-LAT = float(os.getenv('LAT'))
-LON = float(os.getenv('LON'))
 MAX_API_CALLS_PER_DAY = int(os.getenv('MAX_API_CALLS_PER_DAY'))
 MAX_REQUESTS_PER_MINUTE = int(os.getenv('MAX_REQUESTS_PER_MINUTE'))
 MAX_RETRIES = int(os.getenv('MAX_RETRIES'))
+# Seconds to wait before retrying a failed (non-429) request
+RETRY_DELAY = float(os.getenv('RETRY_DELAY', '5'))
+# Number of concurrent fetch workers used by the historical backfill
+BACKFILL_CONCURRENCY = int(os.getenv('BACKFILL_CONCURRENCY', '8'))
+# Seconds between backfill progress reports
+PROGRESS_LOG_INTERVAL = 30
+# First hour of history to backfill and the order gaps are filled in ("newest" or "oldest")
+BACKFILL_START = int(os.getenv('BACKFILL_START', str(HISTORY_START)))
+BACKFILL_ORDER = os.getenv('BACKFILL_ORDER', 'newest')
+# API calls per day kept out of the backfill budget for the hourly job and its retries
+BACKFILL_DAILY_RESERVE = int(os.getenv('BACKFILL_DAILY_RESERVE', '48'))
+# Backfilled observations are written in batches of this many records, or after this many seconds
+BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', '50'))
+BACKFILL_BATCH_SECONDS = float(os.getenv('BACKFILL_BATCH_SECONDS', '10'))
 
 class WeatherCrawler:
-    def __init__(self):
+    def __init__(self, data_dir="data", base_url=BASE_URL, locations=None, publish=True):
+        """
+        Args:
+            data_dir (str): Directory of the observation logs and crawler state
+            base_url (str): One Call timemachine endpoint
+            locations (list): Location tuples, defaults to configs/locations.yml
+            publish (bool): Announce stored observations on the Redis stream
+        """
         self.scheduler = AsyncIOScheduler()
-        self.total_calls_today = 0
-        self.calls_in_current_minute = 0
-        self.minute_start_time = datetime.now()
-        self.data_dir = "data"
+        self.data_dir = data_dir
+        self.base_url = base_url
         self.data_file = os.path.join(self.data_dir, "weather_data.json")
-        self.timestamp_file = os.path.join(self.data_dir, "last_timestamp.json")
+        self.locations = locations or get_locations()
+        self.stores = {}
+        self.archive = None
+        # Newly stored observations are announced to ingestion on a Redis stream
+        self.publisher = ObservationPublisher() if publish else None
+        # One session and one API budget are shared by every location
         self.session = None
+        # Request counters, reported by the benchmark
+        self.stats = {"api_calls": 0, "cache_hits": 0, "rate_limited": 0, "errors": 0}
         self._init_data_file()
-        self._init_timestamp_file()
+        # Raw responses by (lat, lon, dt), kept apart from the observation logs
+        self.response_cache = ResponseCache(os.path.join(self.data_dir, "response_cache"))
+        self.rate_limiter = RateLimiter(
+            os.path.join(self.data_dir, "rate_limiter.json"),
+            per_minute=MAX_REQUESTS_PER_MINUTE,
+            per_day=MAX_API_CALLS_PER_DAY
+        )
 
     def _init_data_file(self):
-        """Initialize data directory and file if they don't exist"""
+        """Initialize data directory and one observation log per location"""
         # Create data directory if it does not exist
         os.makedirs(self.data_dir, exist_ok=True)
-        
-        # Create JSON file if it does not exist
-        if not os.path.exists(self.data_file):
-            with open(self.data_file, 'w') as f:
-                json.dump([], f)
-
-    def _init_timestamp_file(self):
-        """Initialize timestamp file if it doesn't exist"""
-        if not os.path.exists(self.timestamp_file):
-            with open(self.timestamp_file, 'w') as f:
-                # Set initial timestamp to 2020-12-31 17:00:00
-                initial_date = datetime(2020, 12, 31, 17, 0, 0, tzinfo=timezone.utc)
-                initial_timestamp = int(initial_date.timestamp())
-                json.dump({"last_timestamp": initial_timestamp}, f)
-                logger.info(f"Initialized timestamp file with date: {initial_date.strftime('%Y-%m-%d %H:%M:%S')}")
-
-    async def load_weather_data(self):
-        """Load existing weather data"""
-        try:
-            async with aiofiles.open(self.data_file, 'r') as file:
-                content = await file.read()
-                data = json.loads(content)
-                logger.info(f"Loaded {len(data)} existing records")
-                return data
-        except FileNotFoundError:
-            logger.warning(f"Data file not found: {self.data_file}")
-            return []
-        except json.JSONDecodeError as e:
-            # Backup corrupted file instead of losing data
-            backup_file = f"{self.data_file}.corrupted"
-            logger.error(f"JSON decode error. Backing up to {backup_file}")
-            os.rename(self.data_file, backup_file)
-            return []
-
-    async def save_weather_data(self, data):
-        """Save raw weather data to JSON file"""
-        backup_file = None
-        lock = FileLock(f"{self.data_file}.lock")
-        
+
+        # The default location (listed first) inherits the single-location data
+        default_location = self.locations[0]
+        migrate_single_location_layout(self.data_dir, default_location.name)
+        # Resume point of the single-cursor crawler, replaced by the slot index and range checkpoints
+        legacy_timestamp_file = os.path.join(self.data_dir, "last_timestamp.json")
+        if os.path.exists(legacy_timestamp_file):
+            os.remove(legacy_timestamp_file)
+            logger.info(f"Removed {legacy_timestamp_file}, backfill resumes from the range checkpoints")
+
+        # Columnar copy of the observations, kept only when pyarrow is installed
+        if observation_archive.is_available():
+            self.archive = ObservationArchive(os.path.join(self.data_dir, "archive"))
+        else:
+            logger.warning("pyarrow is not installed, observation archive disabled")
+
+        for location in self.locations:
+            self.stores[location.name] = LocationStore(
+                location,
+                self.data_dir,
+                # Migrates a legacy weather_data.json on first run
+                legacy_file=self.data_file if location is default_location else None,
+                history_start=BACKFILL_START,
+                order=BACKFILL_ORDER,
+                archive=self.archive,
+                publisher=self.publisher
+            )
+        logger.info(f"Crawling {len(self.stores)} locations: {', '.join(self.stores)}")
+
+    async def load_weather_data(self, location_name):
+        """Load existing weather data of one location (compatibility reader over its log)"""
+        data = await asyncio.to_thread(self.stores[location_name].observation_log.load_all)
+        logger.info(f"Loaded {len(data)} existing records for {location_name}")
+        return data
+
+    async def save_weather_data(self, store, data):
+        """Append raw weather data to the observation log of a location"""
         try:
-            with lock:
-                # Load existing data
-                weather_data = await self.load_weather_data()
-                
-                # Check duplicate before saving
-                new_timestamp = data['data'][0]['dt']
-                exists = any(
-                    entry.get('data', [{}])[0].get('dt') == new_timestamp 
-                    for entry in weather_data
-                )
-                
-                if exists:
-                    logger.info(f"Data for timestamp {new_timestamp} already exists, skipping save...")
-                    return True
-                
-                # Create backup before saving new data
-                if os.path.exists(self.data_file):
-                    backup_file = f"{self.data_file}.bak"
-                    async with aiofiles.open(self.data_file, 'r') as src, \
-                              aiofiles.open(backup_file, 'w') as dst:
-                        content = await src.read()
-                        await dst.write(content)
-                
-                # Add new data and sort by timestamp
-                weather_data.append(data)
-                weather_data.sort(key=lambda x: x['data'][0]['dt'])
-                
-                # Save to file
-                async with aiofiles.open(self.data_file, 'w') as file:
-                    await file.write(json.dumps(weather_data, indent=4))
-                
-                # Remove backup if save successful    
-                if backup_file and os.path.exists(backup_file):
-                    os.remove(backup_file)
-                
-                logger.info(f"Successfully saved new data. Total records: {len(weather_data)}")
-                return True
-                
+            if await store.save(data):
+                logger.info(f"[{store.name}] Successfully saved new data. Total records: {len(store.slot_index)}")
+            return True
+
         except Exception as e:
             logger.error(f"Error saving weather data: {e}")
-            # Restore from backup if save failed
-            if backup_file and os.path.exists(backup_file):
-                os.replace(backup_file, self.data_file)
-                logger.info("Restored from backup file")
             return False
 
     async def init_session(self):
@@ -134,10 +132,12 @@ class WeatherCrawler:
             self.session = aiohttp.ClientSession()
 
     async def close_session(self):
-        """Close aiohttp session"""
+        """Close aiohttp session and the stream connection"""
         if self.session:
             await self.session.close()
             self.session = None
+        if self.publisher:
+            await self.publisher.close()
             
     @staticmethod
     def get_historical_timestamp():
@@ -152,107 +152,193 @@ class WeatherCrawler:
         now = datetime.now()
         return int(now.replace(minute=0, second=0, microsecond=0).timestamp())
 
-    async def fetch_weather_data(self, timestamp):
+    async def fetch_weather_data(self, store, timestamp):
+        lat, lon = store.location.lat, store.location.lon
+        cached = await asyncio.to_thread(self.response_cache.get, lat, lon, timestamp)
+        if cached and cached.get('data'):
+            self.stats["cache_hits"] += 1
+            logger.info(f"[{store.name}] Served timestamp {timestamp} from the response cache")
+            return cached
+
         retries = 0
         while retries < MAX_RETRIES:
             try:
                 await self.init_session()
                 params = {
-                    "lat": LAT,
-                    "lon": LON,
+                    "lat": lat,
+                    "lon": lon,
                     "dt": timestamp,
                     "appid": API_KEY
                 }
 
-                async with self.session.get(BASE_URL, params=params) as response:
+                # Every attempt is a billable call: reserve it before sending
+                await self.rate_limiter.acquire()
+                self.stats["api_calls"] += 1
+                async with self.session.get(self.base_url, params=params) as response:
                     if response.status == 429:  # Too Many Requests
-                        logger.warning("API rate limit reached. Sleeping for 1 minute...")
-                        await asyncio.sleep(60)
+                        self.stats["rate_limited"] += 1
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        self.rate_limiter.penalize(retry_after if retry_after is not None else 60)
                         continue
 
                     response.raise_for_status()
                     data = await response.json()
-                    logger.info(f"Successfully fetched weather data for timestamp: {timestamp}")
+                    logger.info(f"[{store.name}] Successfully fetched weather data for timestamp: {timestamp}")
                     
-                    # Only save if fetch was successful
+                    # Callers save valid data: directly or through a batch
                     if data and 'data' in data and data['data']:
-                        await self.save_weather_data(data)
+                        await asyncio.to_thread(self.response_cache.put, lat, lon, timestamp, data)
                         return data
                     else:
-                        logger.error(f"Invalid data format for timestamp: {timestamp}")
+                        logger.error(f"[{store.name}] Invalid data format for timestamp: {timestamp}")
+                        self.stats["errors"] += 1
                         return None
 
             except aiohttp.ClientError as http_err:
                 logger.error(f"HTTP error occurred: {http_err}")
                 if getattr(http_err, 'status', None) == 429:
-                    logger.warning("API rate limit hit. Sleeping for 1 minute...")
-                    await asyncio.sleep(60)
+                    self.stats["rate_limited"] += 1
+                    retry_after = parse_retry_after((getattr(http_err, 'headers', None) or {}).get('Retry-After'))
+                    self.rate_limiter.penalize(retry_after if retry_after is not None else 60)
                 else:
+                    self.stats["errors"] += 1
                     retries += 1
                     logger.warning(f"Retrying... ({retries}/{MAX_RETRIES})")
-                    await asyncio.sleep(5)
-
-    async def handle_rate_limits(self):
-        """Handle API rate limits"""
-        self.calls_in_current_minute += 1
-        self.total_calls_today += 1
-
-        if self.calls_in_current_minute >= MAX_REQUESTS_PER_MINUTE:
-            elapsed_time = (datetime.now() - self.minute_start_time).total_seconds()
-            if elapsed_time < 60:
-                sleep_time = 60 - elapsed_time
-                logger.info(f"Sleeping for {sleep_time} seconds to respect rate limit...")
-                await asyncio.sleep(sleep_time)
-            self.calls_in_current_minute = 0
-            self.minute_start_time = datetime.now()
-
-        if self.total_calls_today >= MAX_API_CALLS_PER_DAY:
-            logger.warning("Daily API call limit reached. Waiting until reset...")
-            # Wait until midnight
-            tomorrow = datetime.now() + timedelta(days=1)
-            tomorrow = tomorrow.replace(hour=0, minute=0, second=0, microsecond=0)
-            wait_seconds = (tomorrow - datetime.now()).total_seconds()
-            await asyncio.sleep(wait_seconds)
-            self.total_calls_today = 0
-
-    async def crawl_historical_data(self):
-        """Crawl historical weather data until the current time"""
-        last_timestamp = await self.load_last_timestamp()
-        current_timestamp = self.get_historical_timestamp()
+                    await asyncio.sleep(RETRY_DELAY)
+
+    async def crawl_historical_data(self, concurrency=BACKFILL_CONCURRENCY):
+        """
+        Backfill missing historical hours up to the current time.
+
+        Today's remaining API budget is shared evenly across locations. Each
+        location's planner derives its missing hours from its slot index and
+        orders them (newest-first by default). The per-location lists are
+        interleaved into one queue so every location progresses, and a bounded
+        pool of workers fetches them through the shared session and rate limiter.
+        Fetched observations are buffered and written in fsync'd batches; a
+        range's checkpoint only advances over hours whose batch is on disk, so a
+        restart resumes where this run stopped without losing buffered data.
+
+        Args:
+            concurrency (int): Maximum number of requests in flight.
+        """
+        end_timestamp = self.get_historical_timestamp()
+        budget = max(0, self.rate_limiter.remaining_today() - BACKFILL_DAILY_RESERVE)
 
         logger.info("Starting to crawl historical weather data...")
+        logger.info(f"API calls left today: {self.rate_limiter.remaining_today()}/{MAX_API_CALLS_PER_DAY}")
+
+        # Hours already fetched once (e.g. before the log was lost) cost no API calls
+        for store in self.stores.values():
+            await store.restore_from_cache(self.response_cache, end_timestamp)
+
+        stores = list(self.stores.values())
+        plans = []
+        for position, store in enumerate(stores):
+            # Even share of what is left, so calls a location does not need go to the next ones
+            location_budget = budget // (len(stores) - position)
+            slots = await asyncio.to_thread(store.planner.resume_or_plan, end_timestamp, location_budget)
+            budget -= len(slots)
+            if slots:
+                logger.info(f"[{store.name}] {len(slots)} missing hours planned")
+            plans.append([(store, timestamp) for timestamp in slots])
+
+        # Round-robin across locations
+        pending = [item for batch in zip_longest(*plans) for item in batch if item is not None]
+        if not pending:
+            logger.info("No missing historical data within today's budget.")
+            await self.save_gap_reports(end_timestamp)
+            return
 
-        # Load existing data to check for duplicates
-        weather_data = await self.load_weather_data()
-        existing_timestamps = set()
-        
-        # Lấy tất cả timestamps từ dữ liệu hiện có
-        for entry in weather_data:
-            if isinstance(entry, dict) and 'data' in entry and entry['data']:
-                timestamp = entry['data'][0].get('dt')
-                if timestamp:
-                    existing_timestamps.add(int(timestamp))
-
-        while last_timestamp < current_timestamp:
-            if last_timestamp in existing_timestamps:
-                logger.info(f"Data for timestamp {last_timestamp} already exists, skipping...")
-                last_timestamp += 3600  # Tăng timestamp sau khi kiểm tra
-                continue
-
-            logger.info(f"Fetching weather data for timestamp: {last_timestamp}")
-            data = await self.fetch_weather_data(last_timestamp)
-            if data:
-                await self.save_last_timestamp(last_timestamp)
-                logger.info(f"Successfully saved data for timestamp: {last_timestamp}")
-                existing_timestamps.add(last_timestamp)
-            else:
-                logger.error(f"Failed to fetch data for timestamp: {last_timestamp}")
+        workers = max(1, min(concurrency, MAX_REQUESTS_PER_MINUTE, len(pending)))
+        logger.info(f"Backfilling {len(pending)} missing hours ({BACKFILL_ORDER} first) with {workers} workers")
+
+        queue = asyncio.Queue()
+        for item in pending:
+            queue.put_nowait(item)
 
-            last_timestamp += 3600  # Tăng timestamp sau khi fetch
-            await self.handle_rate_limits()
+        progress = {"succeeded": 0, "failed": 0}
+        started_at = time.monotonic()
+        last_report = started_at
 
+        def record_result(store, timestamp, success, save=True):
+            nonlocal last_report
+            moved = store.planner.mark_done(timestamp, success, save=save)
+            progress["succeeded" if success else "failed"] += 1
+
+            now = time.monotonic()
+            done = progress["succeeded"] + progress["failed"]
+            if now - last_report >= PROGRESS_LOG_INTERVAL or done == len(pending):
+                last_report = now
+                self._log_backfill_progress(done, len(pending), progress["failed"], now - started_at)
+            return moved
+
+        async def worker():
+            while True:
+                try:
+                    store, timestamp = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+
+                logger.info(f"[{store.name}] Fetching weather data for timestamp: {timestamp}")
+                data = await self.fetch_weather_data(store, timestamp)
+                if data:
+                    # Counted as done once its batch is flushed
+                    await writer.add(store, data)
+                else:
+                    logger.error(f"[{store.name}] Failed to fetch data for timestamp: {timestamp}")
+                    record_result(store, timestamp, False)
+
+        def record_flushed(store, timestamps):
+            # One checkpoint write per flushed batch
+            moved = [record_result(store, timestamp, True, save=False) for timestamp in timestamps]
+            if any(moved):
+                store.planner.save_checkpoint()
+
+        def record_unwritten(store, timestamps):
+            # Fetched but never stored: failed hours, like failed fetches
+            moved = [record_result(store, timestamp, False, save=False) for timestamp in timestamps]
+            if any(moved):
+                store.planner.save_checkpoint()
+
+        async with BatchWriter(
+            BACKFILL_BATCH_SIZE, BACKFILL_BATCH_SECONDS, on_flush=record_flushed, on_error=record_unwritten
+        ) as writer:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+        logger.info(f"Wrote backfilled observations in {writer.batches} batches")
+
+        for store in self.stores.values():
+            await store.compact_archive()
+
+        await self.save_gap_reports(end_timestamp)
         logger.info("Finished crawling historical data.")
 
+    async def save_gap_reports(self, end_timestamp):
+        """Write the report of remaining gaps of every location next to its log"""
+        reports = {}
+        for store in self.stores.values():
+            try:
+                report = await store.save_gap_report(end_timestamp)
+                logger.info(
+                    f"[{store.name}] Gap report: {report['missing_hours']} missing hours in "
+                    f"{len(report['ranges'])} ranges, {len(report['failed_hours'])} failed hours"
+                )
+                reports[store.name] = report
+            except Exception as e:
+                logger.error(f"[{store.name}] Error saving gap report: {e}")
+        return reports
+
+    @staticmethod
+    def _log_backfill_progress(done, total, failed, elapsed):
+        """Log backfill progress with throughput and ETA"""
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = total - done
+        eta = timedelta(seconds=int(remaining / rate)) if rate > 0 else "unknown"
+        logger.info(
+            f"Backfill progress: {done}/{total} hours ({done / total:.1%}), "
+            f"{failed} failed, {rate:.2f} hours/s, ETA {eta}"
+        )
+
     @staticmethod
     def get_current_hour_timestamp():
         now = datetime.now()
@@ -264,22 +350,30 @@ class WeatherCrawler:
         previous_hour = now - timedelta(hours=1)
         return int(previous_hour.replace(minute=0, second=0, microsecond=0).timestamp())
 
+    async def crawl_hour(self, timestamp):
+        """Fetch one hour for every location that does not have it yet"""
+        stores = []
+        for store in self.stores.values():
+            # Kiểm tra dữ liệu đã tồn tại chưa
+            if store.slot_index.contains(timestamp):
+                logger.info(f"[{store.name}] Data for timestamp {timestamp} already exists, skipping crawl...")
+            else:
+                stores.append(store)
+
+        results = await asyncio.gather(*(self.fetch_and_save(store, timestamp) for store in stores))
+        return all(results)
+
+    async def fetch_and_save(self, store, timestamp):
+        """Fetch one hour of a location and save it immediately"""
+        data = await self.fetch_weather_data(store, timestamp)
+        if data and await self.save_weather_data(store, data):
+            return data
+        return None
+
     async def crawl_current_hour(self):
         current_timestamp = self.get_current_hour_timestamp()
-        
-        # Kiểm tra dữ liệu đã tồn tại chưa
-        weather_data = await self.load_weather_data()
-        exists = any(
-            entry.get('data', [{}])[0].get('dt') == current_timestamp 
-            for entry in weather_data
-        )
-        
-        if exists:
-            logger.info(f"Data for timestamp {current_timestamp} already exists, skipping crawl...")
-            return
-        
         logger.info(f"Crawling data for current hour: {current_timestamp}")
-        await self.fetch_weather_data(current_timestamp)
+        await self.crawl_hour(current_timestamp)
 
     async def start(self):
         """Main function to start crawling and scheduling"""
@@ -290,7 +384,7 @@ class WeatherCrawler:
             if now.minute < 5:
                 # Nếu chưa đến phút thứ 5, cào dữ liệu của giờ trước
                 previous_timestamp = self.get_previous_hour_timestamp()
-                await self.fetch_weather_data(previous_timestamp)
+                await self.crawl_hour(previous_timestamp)
             elif now.minute > 5:
                 # Nếu đã qua phút thứ 5, cào dữ liệu của giờ hiện tại
                 await self.crawl_current_hour()
@@ -317,23 +411,16 @@ class WeatherCrawler:
             current_timestamp = self.get_current_hour_timestamp()
             
             logger.info(f"Fetching weather data for current timestamp: {current_timestamp}")
-            data = await self.fetch_weather_data(current_timestamp)
-            if data:
-                await self.save_last_timestamp(current_timestamp)
+            if await self.crawl_hour(current_timestamp):
+                for store in self.stores.values():
+                    await store.compact_archive()
                 logger.info("Hourly weather data fetch completed successfully")
             else:
                 logger.error("Failed to fetch hourly weather data")
 
-            await self.handle_rate_limits()
-
         except Exception as e:
             logger.error(f"Error in hourly job: {e}")
 
-    async def reset_daily_counter(self):
-        """Reset the daily API call counter"""
-        self.total_calls_today = 0
-        logger.info("Reset daily API call counter")
-
     def start_scheduler(self):
         """Start the scheduler for hourly jobs"""
         # Xóa tất cả các job cũ nếu có
@@ -347,33 +434,17 @@ class WeatherCrawler:
         )
         logger.info("Added hourly job to scheduler")
 
+        # Continue the backfill once the daily API quota resets
         self.scheduler.add_job(
-            self.reset_daily_counter,
-            CronTrigger(hour='0', minute='0'),  # Run at midnight
-            id='reset_daily_counter'
+            self.crawl_historical_data,
+            CronTrigger(hour='0', minute='15', timezone='UTC'),
+            id='weather_crawler_backfill'
         )
-        logger.info("Added daily counter reset job to scheduler")
+        logger.info("Added daily backfill job to scheduler")
 
         logger.info("Starting the scheduler...")
         self.scheduler.start()
 
-    async def load_last_timestamp(self):
-        """Load the last processed timestamp"""
-        async with aiofiles.open(self.timestamp_file, 'r') as file:
-            content = await file.read()
-            data = json.loads(content)
-            return data.get("last_timestamp")
-
-    async def save_last_timestamp(self, timestamp):
-        """Save the last processed timestamp"""
-        try:
-            async with aiofiles.open(self.timestamp_file, 'w') as file:
-                await file.write(json.dumps({"last_timestamp": timestamp}))
-            logger.info(f"Saved last timestamp: {timestamp}")
-            return True
-        except Exception as e:
-            logger.error(f"Error saving last timestamp: {e}")
-            return False
 
 async def main():
     crawler = WeatherCrawler()
@@ -1,29 +1,67 @@
 import os
 import sys
 import json
+import hashlib
 import aiohttp
 import asyncio
+from itertools import islice
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 import aiofiles
 import pandas as pd
-from filelock import FileLock
 from dotenv import load_dotenv
 
 sys.path.append(".")
 from src.logger import logger
+from src.observation_log import ObservationLog
+from src.quantile_sketch import ColumnQuantiles
+from src.observation_stream import ObservationConsumer
+from src import columnar_codec
+from src.locations import DEFAULT_LOCATION, get_locations, observation_dir
 
 # Load environment variables
 load_dotenv()
 
+# Columns whose missing values are filled with the (estimated) median of the location's history
+HISTORY_COLUMNS = ["temp", "pressure", "humidity", "clouds", "visibility", "wind_speed", "wind_deg"]
+
+# Log records read (and imputed with the same medians) at a time
+INGEST_BATCH_SIZE = int(os.getenv('INGEST_BATCH_SIZE', 5000))
+# Log records per bulk request; the checkpoint advances chunk by chunk
+UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 500))
+# Bulk requests in flight at once
+UPLOAD_CONCURRENCY = int(os.getenv('UPLOAD_CONCURRENCY', 4))
+# Attempts per bulk request, with exponential backoff from UPLOAD_RETRY_DELAY seconds
+UPLOAD_MAX_RETRIES = int(os.getenv('UPLOAD_MAX_RETRIES', 3))
+UPLOAD_RETRY_DELAY = float(os.getenv('UPLOAD_RETRY_DELAY', 2))
+
+# Consumer group on the crawler's observation stream
+STREAM_GROUP = "data_ingestion"
+STREAM_CONSUMER = "data_ingestion"
+# Stream entries handled per ingestion run
+STREAM_BATCH_SIZE = 500
+# Fallback poll in case stream messages were lost (e.g. Redis was down)
+POLL_INTERVAL_MINUTES = 30
+
 class DataIngestion:
     def __init__(self):
         """Initialize DataIngestion"""
         self.api_url = os.getenv('DB_API_URL')
         self.scheduler = AsyncIOScheduler()
         self.data_path = os.getenv('DATA_PATH', 'data')
-        self.data_file = f"{self.data_path}/weather_data.json"
+        self.locations = [location.name for location in get_locations()]
+        self.observation_logs = {
+            name: ObservationLog(observation_dir(self.data_path, name))
+            for name in self.locations
+        }
         self.processed_file = f"{self.data_path}/processed_data.json"
+        self.imputation_file = f"{self.data_path}/imputation_state.json"
+        self.quantiles = None
         self.session = None
+        self.ingest_lock = asyncio.Lock()
+        self.consumer = ObservationConsumer(STREAM_GROUP, STREAM_CONSUMER)
+        self.stream_task = None
+        # Whether db_api acknowledged the end of the initial ingest (readiness watermark)
+        self.ingest_completed = False
         
         # Create the data directory if it does not exist
         os.makedirs(self.data_path, exist_ok=True)
@@ -34,52 +72,96 @@ class DataIngestion:
     def _init_files(self):
         if not os.path.exists(self.processed_file):
             with open(self.processed_file, 'w') as f:
-                json.dump({"last_processed_dt": 0}, f)
+                json.dump({"locations": {}}, f)
+
+    async def load_weather_data(self, location=DEFAULT_LOCATION, position=None, limit=INGEST_BATCH_SIZE):
+        """
+        Load up to ``limit`` records appended to a location's observation log after ``position``.
+
+        Returns:
+            list: ``(raw record, log position just after it)`` tuples
+        """
+        def read_batch():
+            return list(islice(self.observation_logs[location].iter_since(position), limit))
 
-    async def load_weather_data(self):
-        """Load weather data from file"""
-        lock = FileLock(f"{self.data_file}.lock")
-        
         try:
-            with lock:
-                if not os.path.exists(self.data_file):
-                    logger.warning(f"Data file {self.data_file} not found")
-                    return []
-
-                async with aiofiles.open(self.data_file, 'r', encoding='utf-8') as f:
-                    content = await f.read()
-                    if not content:
-                        logger.warning("Data file is empty")
-                        return []
-                        
-                    data = json.loads(content)
-                    logger.info(f"Loaded {len(data)} weather records")
-                    return data
-
-        except json.JSONDecodeError as e:
-            logger.error(f"Invalid JSON format: {e}")
-            return []
+            return await asyncio.to_thread(read_batch)
         except Exception as e:
             logger.error(f"Error loading weather data: {e}")
             return []
 
+    def _load_quantiles(self) -> dict:
+        """Median sketches of every location, loaded once from the imputation state file"""
+        if self.quantiles is None:
+            self.quantiles = {}
+            try:
+                if os.path.exists(self.imputation_file):
+                    with open(self.imputation_file, 'r') as f:
+                        state = json.load(f)
+                    self.quantiles = {
+                        location: ColumnQuantiles.from_dict(data)
+                        for location, data in state.get("locations", {}).items()
+                    }
+            except Exception as e:
+                logger.error(f"Error loading imputation state, rebuilding it: {e}")
+        return self.quantiles
+
+    async def _save_quantiles(self):
+        """Atomically save the median sketches (inspectable JSON)"""
+        state = {
+            "columns": HISTORY_COLUMNS,
+            "locations": {location: q.to_dict() for location, q in self._load_quantiles().items()}
+        }
+        tmp_file = f"{self.imputation_file}.tmp"
+        async with aiofiles.open(tmp_file, 'w') as f:
+            await f.write(json.dumps(state, indent=2))
+            await f.flush()
+        os.replace(tmp_file, self.imputation_file)
+
+    @staticmethod
+    def _same_position(a, b) -> bool:
+        """Whether two log positions point at the same record (offsets are optional)"""
+        if not a or not b:
+            return not a and not b
+        return a.get("segment") == b.get("segment") and a.get("records") == b.get("records")
+
+    def _seed_quantiles(self, location: str, position) -> ColumnQuantiles:
+        """
+        Build the median sketches of a location from its log up to ``position``.
+
+        Only needed when there is no state yet or it does not match the
+        checkpoint (e.g. a crash between saving the two); afterwards the
+        sketches are updated batch by batch.
+        """
+        quantiles = ColumnQuantiles(HISTORY_COLUMNS, position=position)
+        if not position:
+            return quantiles
+
+        count = 0
+        for record, record_position in self.observation_logs[location].iter_since():
+            quantiles.update([record.get("data", [{}])[0]])
+            count += 1
+            if self._same_position(record_position, position):
+                break
+        logger.info(f"[{location}] Built median sketches from {count} logged observations")
+        return quantiles
+
+    def imputation_values(self, location: str) -> dict:
+        """Estimated median of each history column of a location"""
+        quantiles = self._load_quantiles().get(location)
+        return quantiles.values() if quantiles else {}
+
     @staticmethod
     def convert_to_vietnam_time(utc_timestamp: int) -> int:
         VIETNAM_OFFSET = 25200  # 7 hours * 3600 seconds
         return utc_timestamp + VIETNAM_OFFSET
 
-    def handle_missing_data(self, weather_data: dict) -> dict:
+    def handle_missing_data(self, weather_data: dict, location: str = DEFAULT_LOCATION) -> dict:
         """
-        Handle missing values using median from entire dataset
+        Handle missing values using the estimated median of the location's history
         """
         try:
-            # Load all weather data
-            with open(self.data_file, 'r') as f:
-                all_data = json.load(f)
-            
-            # Extract all entries and convert to DataFrame
-            all_entries = [entry.get("data", [{}])[0] for entry in all_data]
-            df_all = pd.DataFrame(all_entries)
+            medians = self.imputation_values(location)
             
             # Create DataFrame for current entry
             df_current = pd.DataFrame([weather_data])
@@ -95,26 +177,19 @@ class DataIngestion:
                 "wind_deg": "int64"
             }
 
-            # Calculate medians from all data and fill missing values
+            # Fill missing values with the medians
             for col, dtype in column_types.items():
-                if col in df_all.columns:
-                    # Convert all data to numeric for median calculation
-                    df_all[col] = pd.to_numeric(df_all[col], errors='coerce')
-                    # Calculate median from all data
-                    median_value = df_all[col].median()
+                if col in medians and col in df_current.columns:
+                    df_current[col] = pd.to_numeric(df_current[col], errors='coerce')
+                    df_current[col] = df_current[col].fillna(medians[col])
                     
-                    # Convert and fill current entry
-                    if col in df_current.columns:
-                        df_current[col] = pd.to_numeric(df_current[col], errors='coerce')
-                        df_current[col] = df_current[col].fillna(median_value)
-                        
-                        # Convert to correct type
-                        if dtype == "int64":
-                            df_current[col] = df_current[col].round().astype(dtype)
-                        else:
-                            df_current[col] = df_current[col].astype(dtype)
-
-            logger.debug(f"Processed entry with medians from full dataset")
+                    # Convert to correct type
+                    if dtype == "int64":
+                        df_current[col] = df_current[col].round().astype(dtype)
+                    else:
+                        df_current[col] = df_current[col].astype(dtype)
+
+            logger.debug(f"Processed entry with medians of the location's history")
             return df_current.iloc[0].to_dict()
 
         except Exception as e:
@@ -122,7 +197,7 @@ class DataIngestion:
             logger.exception("Full traceback:")
             return weather_data
 
-    def filter_data(self, raw_data):
+    def filter_data(self, raw_data, location=DEFAULT_LOCATION):
         """Only filter necessary fields while preserving null values"""
         try:
             weather_data = raw_data.get("data", [{}])[0]
@@ -137,7 +212,8 @@ class DataIngestion:
                 "clouds": weather_data.get("clouds"),
                 "visibility": weather_data.get("visibility"),
                 "wind_speed": weather_data.get("wind_speed"),
-                "wind_deg": weather_data.get("wind_deg")
+                "wind_deg": weather_data.get("wind_deg"),
+                "location": location
             }
 
             return filtered_data
@@ -148,15 +224,20 @@ class DataIngestion:
 
     async def _load_processed_data(self):
         """
-        Load the last processed timestamp from file
+        Load the per-location checkpoints (last processed timestamp and log position) from file
         """
         try:
             async with aiofiles.open(self.processed_file, 'r') as f:
                 content = await f.read()
-                return json.loads(content)
+                processed_data = json.loads(content)
         except Exception as e:
             logger.error(f"Error loading processed data: {e}")
-            return {"last_processed_dt": 0}
+            return {"locations": {}}
+
+        if "locations" not in processed_data:
+            # Single-location checkpoint: it belongs to the default location
+            processed_data = {"locations": {DEFAULT_LOCATION: processed_data}}
+        return processed_data
 
     async def _save_processed_data(self, data: dict):
         """
@@ -170,61 +251,131 @@ class DataIngestion:
             logger.error(f"Error saving processed data: {e}")
             raise
 
-    async def send_to_api(self, raw_data_list: list, processed_data_list: list):
-        """Send bulk data to API"""
+    @staticmethod
+    def _idempotency_key(raw_data_list: list, processed_data_list: list) -> str:
+        """Key of a bulk request, derived from its content so a retry reuses it"""
+        payload = json.dumps([raw_data_list, processed_data_list], sort_keys=True, separators=(',', ':'))
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    async def send_to_api(self, raw_data_list: list, processed_data_list: list, idempotency_key: str = None):
+        """
+        Send bulk data to API
+
+        The body is sent in the columnar msgpack encoding when possible, else as
+        JSON. Network errors, 5xx and 429 responses are retried up to
+        ``UPLOAD_MAX_RETRIES`` times with the same idempotency key, so a request
+        that was committed before its response got lost is not inserted twice.
+        """
         if self.session is None:
             self.session = aiohttp.ClientSession()
 
-        try:
-            if not self.api_url:
-                raise ValueError("API URL is not set")
+        if not self.api_url:
+            logger.error("Error sending bulk data to API: API URL is not set")
+            return False
 
-            headers = {
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
+        headers = {'Accept': 'application/json'}
+        if idempotency_key:
+            headers['Idempotency-Key'] = idempotency_key
+        body = {
+            "raw_data_list": raw_data_list,
+            "processed_data_list": processed_data_list
+        }
 
-            logger.info(f"Sending bulk data with {len(raw_data_list)} entries")
+        for attempt in range(1, UPLOAD_MAX_RETRIES + 1):
+            try:
+                logger.info(f"Sending bulk data with {len(raw_data_list)} entries (attempt {attempt})")
+
+                status, result = await columnar_codec.post_bulk(
+                    self.session, f"{self.api_url}/api/weather/bulk", body, headers
+                )
+                if status == 200:
+                    if result.get("replayed"):
+                        logger.info(f"Bulk request was already committed ({result['count']} entries)")
+                    else:
+                        logger.info(f"Successfully saved {result['count']} entries")
+                    return True
+
+                logger.error(f"Failed to send bulk data: {status}, error: {result}")
+                if 400 <= status < 500 and status != 429:
+                    # The request itself is wrong, sending it again will not help
+                    return False
+
+            except Exception as e:
+                logger.error(f"Error sending bulk data to API: {e}")
+
+            if attempt < UPLOAD_MAX_RETRIES:
+                await asyncio.sleep(UPLOAD_RETRY_DELAY * 2 ** (attempt - 1))
+
+        return False
+
+    async def send_ingest_complete(self) -> bool:
+        """
+        Tell db_api every location is up to date: it writes the readiness
+        watermark, and signals the services waiting for the initial load once
+        its binlog consumer has caught up with it.
+
+        Returns:
+            bool: Whether db_api acknowledged it
+        """
+        if self.session is None:
+            self.session = aiohttp.ClientSession()
 
+        try:
+            body = {"raw_data_list": [], "processed_data_list": []}
             async with self.session.post(
-                f"{self.api_url}/api/weather/bulk",
-                json={
-                    "raw_data_list": raw_data_list,
-                    "processed_data_list": processed_data_list
-                },
-                headers=headers
+                f"{self.api_url}/api/weather/bulk", params={"complete": "true"}, json=body
             ) as response:
                 if response.status == 200:
-                    result = await response.json()
-                    logger.info(f"Successfully saved {result['count']} entries")
+                    logger.info("Initial ingest complete, data is ready")
                     return True
-                else:
-                    error = await response.text()
-                    logger.error(f"Failed to send bulk data: {response.status}, error: {error}")
-                    return False
-
+                logger.error(f"Failed to mark the ingest complete: {response.status}, error: {await response.text()}")
         except Exception as e:
-            logger.error(f"Error sending bulk data to API: {e}")
-            return False
+            logger.error(f"Error marking the ingest complete: {e}")
+        return False
 
-    def handle_missing_data_bulk(self, weather_data_list: list) -> list:
+    async def _upload_chunk(self, location: str, chunk: list, since_dt, medians: dict,
+                            semaphore: asyncio.Semaphore):
+        """
+        Filter, impute and send one chunk of log records.
+
+        Args:
+            since_dt (int): Only send entries after this timestamp (legacy checkpoints), or None
+
+        Returns:
+            tuple: (number of entries sent, or None if sending failed; latest entry timestamp)
+        """
+        raw_data_list = []
+        for record, _ in chunk:
+            raw_data = self.filter_data(record, location)
+            if raw_data and (since_dt is None or raw_data["dt"] > since_dt):
+                raw_data_list.append(raw_data)
+        if not raw_data_list:
+            return 0, 0
+
+        processed_data_list = self.handle_missing_data_bulk(raw_data_list, location, medians)
+        idempotency_key = self._idempotency_key(raw_data_list, processed_data_list)
+        async with semaphore:
+            sent = await self.send_to_api(raw_data_list, processed_data_list, idempotency_key)
+        latest_dt = max(raw_data["dt"] for raw_data in raw_data_list)
+        return (len(raw_data_list) if sent else None), latest_dt
+
+    def handle_missing_data_bulk(self, weather_data_list: list, location: str = DEFAULT_LOCATION,
+                                 medians: dict = None) -> list:
         """
-        Handle missing values for multiple entries using median from entire dataset
+        Handle missing values for multiple entries using the estimated median of the location's history
         
         Args:
             weather_data_list (list): List of weather data entries to process
+            location (str): Location the entries belong to
+            medians (dict): Median of each column, defaults to ``imputation_values``;
+                columns without a median are filled with 0
             
         Returns:
             list: List of processed weather data entries with missing values filled
         """
         try:
-            # Load all historical data for median calculation
-            with open(self.data_file, 'r') as f:
-                all_data = json.load(f)
-            
-            # Extract all entries and convert to DataFrame
-            all_entries = [entry.get("data", [{}])[0] for entry in all_data]
-            df_all = pd.DataFrame(all_entries)
+            if medians is None:
+                medians = self.imputation_values(location)
             
             # Convert current entries to DataFrame
             df_current = pd.DataFrame(weather_data_list)
@@ -240,15 +391,6 @@ class DataIngestion:
                 "wind_deg": "int64"
             }
 
-            # Calculate medians once for all columns
-            medians = {}
-            for col, dtype in column_types.items():
-                if col in df_all.columns:
-                    df_all[col] = pd.to_numeric(df_all[col], errors='coerce')
-                    medians[col] = df_all[col].median()
-
-            logger.debug(f"Calculated medians from {len(df_all)} historical entries")
-
             # Fill missing values for all current entries at once
             for col, dtype in column_types.items():
                 if col in df_current.columns:
@@ -268,79 +410,166 @@ class DataIngestion:
             logger.exception("Full traceback:")
             return weather_data_list
 
-    async def ingest(self, is_initial_run: bool = False):
-        try:
-            weather_data = await self.load_weather_data()
-            if not weather_data:
-                if is_initial_run:
-                    logger.info("No weather data found during initial run")
-                else:
-                    logger.info("No weather data found during scheduled check")
-                return
-
-            # Get last processed timestamp
-            processed_data = await self._load_processed_data()
-            last_processed_dt = processed_data.get("last_processed_dt", 0)
-
-            if is_initial_run:
-                logger.info(f"Initial run - Last processed timestamp: {last_processed_dt}")
-            else:
-                logger.info(f"Checking for data newer than: {last_processed_dt}")
-
-            # Filter only new data
-            raw_data_list = []
-            latest_dt = last_processed_dt
-
-            for entry in weather_data:
-                raw_data = self.filter_data(entry)
-                if raw_data and raw_data["dt"] > last_processed_dt:
-                    raw_data_list.append(raw_data)
-                    latest_dt = max(latest_dt, raw_data["dt"])
-
-            if raw_data_list:
-                count = len(raw_data_list)
+    async def ingest(self, is_initial_run: bool = False) -> bool:
+        """
+        Process new data of every location, each with its own checkpoint.
+
+        Runs triggered by the stream and by the fallback poll are serialized.
+
+        Returns:
+            bool: True if every location is up to date.
+        """
+        async with self.ingest_lock:
+            try:
+                processed_data = await self._load_processed_data()
+                success = True
+                for location in self.locations:
+                    if not await self.ingest_location(location, processed_data, is_initial_run):
+                        success = False
+                # Until acknowledged, every successful run offers the completion again
+                if success and not self.ingest_completed:
+                    self.ingest_completed = await self.send_ingest_complete()
+                return success
+
+            except Exception as e:
                 if is_initial_run:
-                    logger.info(f"Initial run - Found {count} entries to process")
-                else:
-                    logger.info(f"Found {count} new entries to process")
-
-                processed_data_list = self.handle_missing_data_bulk(raw_data_list)
-                success = await self.send_to_api(raw_data_list, processed_data_list)
-                
-                if success:
-                    await self._save_processed_data({"last_processed_dt": latest_dt})
-                    if is_initial_run:
-                        logger.info(f"Initial run - Successfully processed {count} entries")
-                    else:
-                        logger.info(f"Successfully processed {count} new entries")
+                    logger.error(f"Error during initial ingestion: {e}")
                 else:
-                    logger.error("Failed to send bulk data")
-            else:
-                if is_initial_run:
-                    logger.info("Initial run - No new data to process")
+                    logger.error(f"Error during scheduled ingestion: {e}")
+                logger.exception("Full traceback:")
+                return False
+
+    async def ingest_location(self, location: str, processed_data: dict, is_initial_run: bool = False) -> bool:
+        """
+        Send the data appended to one location's log since its checkpoint.
+
+        The log is read lazily from the checkpointed byte offset, in batches of
+        ``INGEST_BATCH_SIZE`` records. Each batch is uploaded in chunks of
+        ``UPLOAD_CHUNK_SIZE`` records, ``UPLOAD_CONCURRENCY`` at a time, and the
+        checkpoint advances over every leading chunk the API committed. Missing
+        values are filled from median sketches, so imputation costs O(batch),
+        not O(history).
+
+        Args:
+            location (str): Location name
+            processed_data (dict): Checkpoints of every location, updated in place
+            is_initial_run (bool): Whether this is the first run after start-up
+
+        Returns:
+            bool: False if a chunk could not be sent (the checkpoint stops before it)
+        """
+        state = processed_data["locations"].get(location, {})
+        last_processed_dt = state.get("last_processed_dt", 0)
+        log_position = state.get("log_position")
+        # Checkpoints written before log positions existed only know the timestamp
+        since_dt = None if log_position else last_processed_dt
+
+        if is_initial_run:
+            logger.info(f"[{location}] Initial run - Last processed timestamp: {last_processed_dt}, log position: {log_position}")
+        else:
+            logger.info(f"[{location}] Checking for data appended after log position: {log_position}")
+
+        # Sketches of the committed history; they move with the checkpoint
+        quantiles = self._load_quantiles().get(location)
+        if quantiles is None or not self._same_position(quantiles.position, log_position):
+            quantiles = await asyncio.to_thread(self._seed_quantiles, location, log_position)
+
+        semaphore = asyncio.Semaphore(UPLOAD_CONCURRENCY)
+        total = 0
+        while True:
+            # The crawler backfills newest-first, so hours older than last_processed_dt
+            # can still arrive: new data is whatever was appended after our log position
+            batch = await self.load_weather_data(location, log_position)
+            if not batch:
+                break
+
+            # Every logged observation is history, including those already sent
+            batch_quantiles = quantiles.copy()
+            batch_quantiles.update(record.get("data", [{}])[0] for record, _ in batch)
+            medians = batch_quantiles.values()
+
+            chunks = [batch[i:i + UPLOAD_CHUNK_SIZE] for i in range(0, len(batch), UPLOAD_CHUNK_SIZE)]
+            uploads = [
+                asyncio.create_task(self._upload_chunk(location, chunk, since_dt, medians, semaphore))
+                for chunk in chunks
+            ]
+            try:
+                # Chunks complete in any order; the checkpoint follows them in log order
+                for chunk, upload in zip(chunks, uploads):
+                    sent, latest_dt = await upload
+                    if sent is None:
+                        logger.error(f"[{location}] Failed to send bulk data")
+                        return False
+                    total += sent
+
+                    quantiles.update(record.get("data", [{}])[0] for record, _ in chunk)
+                    quantiles.position = log_position = chunk[-1][1]
+                    last_processed_dt = max(last_processed_dt, latest_dt)
+                    processed_data["locations"][location] = {
+                        "last_processed_dt": last_processed_dt,
+                        "log_position": log_position
+                    }
+                    await self._save_processed_data(processed_data)
+                    self._load_quantiles()[location] = quantiles
+                    await self._save_quantiles()
+            finally:
+                # Chunks after a failed one may still commit; the next run replays them by key
+                await asyncio.gather(*uploads, return_exceptions=True)
+
+        if total:
+            logger.info(f"[{location}] Successfully processed {total} new entries")
+        else:
+            logger.info(f"[{location}] No new data to process")
+        return True
+
+    async def consume_stream(self):
+        """
+        Ingest as soon as the crawler announces new observations.
+
+        Entries only wake ingestion up: the data itself is read from the
+        observation log after the checkpoint, so nothing is sent twice. Entries
+        are acknowledged once the run that covers them succeeded.
+        """
+        while True:
+            try:
+                entries = await self.consumer.read(count=STREAM_BATCH_SIZE)
+                if not entries:
+                    continue
+                logger.info(f"Received {len(entries)} new observations from the stream")
+                if await self.ingest():
+                    await self.consumer.ack([entry_id for entry_id, _ in entries])
                 else:
-                    logger.info("No new data to process")
+                    # Retried after a reconnect, which re-delivers unacknowledged entries
+                    raise RuntimeError("ingestion of streamed observations failed")
 
-        except Exception as e:
-            if is_initial_run:
-                logger.error(f"Error during initial ingestion: {e}")
-            else:
-                logger.error(f"Error during scheduled ingestion: {e}")
-            logger.exception("Full traceback:")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Observation stream error: {e}. Reconnecting in 5 seconds...")
+                await self.consumer.close()
+                await asyncio.sleep(5)
 
     async def start(self):
         """Start the Weather Data Ingestion service"""
         try:
             logger.info("Starting Weather Data Ingestion service")
+
+            # Join the stream before the first run so no announcement is missed
+            try:
+                await self.consumer.connect()
+            except Exception as e:
+                logger.warning(f"Observation stream unavailable, relying on polling for now: {e}")
             
             # First run - process all existing data
             await self.ingest(is_initial_run=True)
+
+            self.stream_task = asyncio.create_task(self.consume_stream())
             
-            # Schedule future runs
+            # Schedule fallback runs
             self.scheduler.add_job(
                 self.ingest,
                 'interval',
-                minutes=30,
+                minutes=POLL_INTERVAL_MINUTES,
                 id='weather_data_ingestion'
             )
             
@@ -358,6 +587,9 @@ class DataIngestion:
 
     async def stop(self):
         try:
+            if self.stream_task:
+                self.stream_task.cancel()
+            await self.consumer.close()
             self.scheduler.shutdown()
             if self.session:
                 await self.session.close()
@@ -1,18 +1,31 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Any
+from fastapi.responses import StreamingResponse
+from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from pydantic import TypeAdapter
 import aiomysql
 import os
 from dotenv import load_dotenv
 import asyncio
-from datetime import datetime
+import threading
+import time
+import concurrent.futures
+from datetime import date, datetime
+from decimal import Decimal
 import redis.asyncio as aioredis
 import json
+import base64
+import hashlib
 from pymysqlreplication import BinLogStreamReader
-from pymysqlreplication.row_event import WriteRowsEvent
+from pymysqlreplication.row_event import WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent
+from pymysqlreplication.event import HeartbeatLogEvent, XidEvent
 import pandas as pd
 
 from src.logger import logger
+from src.locations import DEFAULT_LOCATION
+from src import columnar_codec
+from src import arrow_codec
 from .weather import WeatherData
 from .cluster import ClusterData
 from .controid import Centroid
@@ -21,6 +34,8 @@ from .weather import Temp_pred
 from .weather import Spider
 from .correlationModel import CorrelationRecord
 from .seasonalModel import SeasonalRecord
+from .response_cache import ResponseCache
+from .rollup import ROLLUP_BUCKETS, ROLLUP_STATS, BucketStats, bucket_key, bucket_bounds, rollup_rows
 
 
 # Load environment variables
@@ -34,9 +49,569 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"], 
+    expose_headers=["X-Next-Cursor", "X-Row-Count", "ETag"],
 )
 weather_api = None
 
+# Explicit column list: the string `location` column must stay out of the numeric aggregations
+WEATHER_COLUMNS = "dt, temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg"
+# Largest page of /api/weather and /filter; without a limit the whole range is returned
+MAX_PAGE_SIZE = 10000
+# Streamed (NDJSON) responses: rows read from the server-side cursor per chunk
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+STREAM_BATCH_SIZE = 1000
+# Idempotency keys of bulk inserts are kept this long, far longer than any client retries
+IDEMPOTENCY_KEY_TTL_DAYS = 7
+# Insert order of /api/weather/bulk rows
+WEATHER_INSERT_COLUMNS = [column.strip() for column in WEATHER_COLUMNS.split(",")] + ["location"]
+CORRELATION_COLUMNS = ["temp", "pressure", "humidity", "clouds", "visibility", "wind_speed", "wind_deg"]
+SEASONAL_COLUMNS = ["dt"] + [
+    f"{component}_{feature}"
+    for feature in CORRELATION_COLUMNS
+    for component in ("observed", "trend", "seasonal", "residual")
+]
+CLUSTER_COLUMNS = [
+    "dt", "temp", "pressure", "humidity", "clouds", "visibility", "wind_speed", "wind_deg",
+    "date", "month", "scaled_temp", "kmean_label", "custom_label"
+]
+# Arrow types of the columns of Arrow/Parquet responses (``src/arrow_codec.py``)
+WEATHER_ARROW_TYPES = {
+    "dt": "int64", "temp": "double", "pressure": "int64", "humidity": "int64", "clouds": "int64",
+    "visibility": "int64", "wind_speed": "double", "wind_deg": "int64", "location": "string"
+}
+CLUSTER_ARROW_TYPES = dict(
+    WEATHER_ARROW_TYPES, date="timestamp[s]", month="int64", scaled_temp="double",
+    kmean_label="int64", custom_label="int64"
+)
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model):
+    return TypeAdapter(List[model])
+
+
+@lru_cache(maxsize=None)
+def _column_adapter(model, name):
+    return TypeAdapter(List[model.model_fields[name].annotation])
+
+
+def _model_defaults(model) -> Dict[str, Any]:
+    """Fields a client may leave out, with their default"""
+    return {name: field.default for name, field in model.model_fields.items() if not field.is_required()}
+
+
+async def read_bulk_rows(request: Request, model, columns: List[str], field: str = None) -> List[tuple]:
+    """
+    Rows of a bulk request body as tuples in ``columns`` order, for ``executemany``.
+
+    Columnar msgpack bodies (``src/columnar_codec.py``) are validated column by
+    column against the types of ``model``'s fields, without building a model
+    per row; JSON bodies are validated row by row with ``model`` as before.
+
+    Args:
+        model: Pydantic model of one row
+        columns (list): Columns to extract
+        field (str): Key of the row list in the body, None if the body is the list
+
+    Raises:
+        HTTPException: 415 if the body is columnar but msgpack is missing, 422 if it is invalid
+    """
+    body = await request.body()
+    try:
+        if columnar_codec.is_columnar(request.headers.get("content-type")):
+            if not columnar_codec.is_available():
+                raise HTTPException(status_code=415, detail="Columnar bodies are not supported, send JSON")
+            table = columnar_codec.decode(body)[field or columnar_codec.ROWS]
+            rows = table.rows(columns, defaults=_model_defaults(model))
+            values = []
+            for column, column_values in zip(columns, zip(*rows)):
+                try:
+                    values.append(_column_adapter(model, column).validate_python(list(column_values)))
+                except ValueError as e:
+                    raise ValueError(f"column {column}: {e}")
+            return list(zip(*values))
+
+        data = json.loads(body)
+        if field is not None:
+            data = data[field]
+        records = _list_adapter(model).validate_python(data)
+        return [tuple(getattr(record, column) for column in columns) for record in records]
+    except HTTPException:
+        raise
+    except (ValueError, KeyError, TypeError) as e:
+        raise HTTPException(status_code=422, detail=f"Invalid bulk body: {e}")
+
+# Integer bucket key of each row, computed from dt alone so the session time zone
+# does not matter (dt is stored in local time, like the legacy UTC rendering shows it)
+BUCKET_EXPRESSIONS = {
+    "hour": "dt - MOD(dt, 3600)",
+    "day": "dt - MOD(dt, 86400)",
+    # 1970-01-01 was a Thursday: step back to the Monday
+    "week": "dt - MOD(dt, 86400) - MOD(FLOOR(dt / 86400) + 3, 7) * 86400",
+    "month": "EXTRACT(YEAR_MONTH FROM DATE_ADD('1970-01-01', INTERVAL dt SECOND))",
+}
+AGGREGATE_FIELDS = [column.strip() for column in WEATHER_COLUMNS.split(",")]
+MEASUREMENT_FIELDS = [field for field in AGGREGATE_FIELDS if field != "dt"]
+SQL_STATS = {"mean": "AVG", "min": "MIN", "max": "MAX", "std": "STDDEV_POP"}
+# Conversions of the "metric" units; they commute with every statistic but count and std
+METRIC_CONVERSIONS = {
+    "temp": lambda value: value - 273.15,
+    "visibility": lambda value: value / 1000,
+}
+# ... and std only takes their scaling
+METRIC_SCALES = {
+    "visibility": lambda value: value / 1000,
+}
+
+ROLLUP_COLUMNS = (
+    "location, bucket, bucket_key, field, "
+    "value_count, value_sum, value_sum_squares, min_value, max_value, median_sketch"
+)
+ROLLUP_UPSERT = f"""
+    INSERT INTO weather_rollup ({ROLLUP_COLUMNS})
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        value_count = VALUES(value_count), value_sum = VALUES(value_sum),
+        value_sum_squares = VALUES(value_sum_squares), min_value = VALUES(min_value),
+        max_value = VALUES(max_value), median_sketch = VALUES(median_sketch)
+"""
+
+
+BINLOG_EVENT_KINDS = {WriteRowsEvent: "write", UpdateRowsEvent: "update", DeleteRowsEvent: "delete"}
+# Transactions read ahead of the consumer; the reader thread waits beyond that
+BINLOG_QUEUE_SIZE = 100
+# Name of db_api's row in binlog_checkpoint
+BINLOG_CONSUMER = "db_api"
+BINLOG_CHECKPOINT_UPSERT = """
+    INSERT INTO binlog_checkpoint (consumer, log_file, log_pos)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE log_file = VALUES(log_file), log_pos = VALUES(log_pos)
+"""
+# Readiness watermark of every location, written by the last request of a bulk ingest
+INGEST_WATERMARK_UPSERT = """
+    INSERT INTO ingest_watermark (location, max_dt, row_count)
+    SELECT location, MAX(dt), COUNT(*) FROM processed_weather_data GROUP BY location
+    ON DUPLICATE KEY UPDATE
+        max_dt = VALUES(max_dt), row_count = VALUES(row_count), completed_at = CURRENT_TIMESTAMP
+"""
+
+
+def binlog_weather_row(values, columns):
+    """
+    Row dict of processed_weather_data binlog values. Without the table
+    metadata the stream names the columns UNKNOWN_COL<position>: ``columns``,
+    the table's columns in ordinal order, gives them their names back.
+    """
+    row = {column: values.get(f'UNKNOWN_COL{i}', values.get(column)) for i, column in enumerate(columns)}
+    if row.get('location') is None:
+        row['location'] = DEFAULT_LOCATION
+    return row
+
+
+def binlog_batch(event, columns):
+    """
+    Queue item of a binlog event, or None for an event of no interest
+
+    Returns:
+        dict: ``kind`` (write, update, delete, watermark, commit or
+        heartbeat), ``rows``, the decoded processed_weather_data row dicts
+        (both images of an updated row), and ``timestamp``, when the master
+        wrote the event
+    """
+    if isinstance(event, HeartbeatLogEvent):
+        return {"kind": "heartbeat", "rows": [], "timestamp": None}
+    if isinstance(event, XidEvent):
+        return {"kind": "commit", "rows": [], "timestamp": event.timestamp}
+    kind = BINLOG_EVENT_KINDS.get(type(event))
+    if kind is None:
+        return None
+    if event.table == "ingest_watermark":
+        # Only its position in the binlog matters: see process_binlog_queue
+        return {"kind": "watermark", "rows": [], "timestamp": event.timestamp}
+    rows = [
+        binlog_weather_row(row[image], columns)
+        for row in event.rows
+        for image in ('values', 'before_values', 'after_values')
+        if image in row
+    ]
+    return {"kind": kind, "rows": rows, "timestamp": event.timestamp}
+
+
+def weather_tags(location: str) -> List[str]:
+    """Response cache tags of data built from the processed rows of a location"""
+    return ["weather", f"weather:{location}"]
+
+
+def parse_weather_fields(fields: Optional[str]) -> List[str]:
+    """
+    Columns of a ``fields=`` projection, in table order. dt is always
+    included since pages are keyed on it.
+
+    Raises:
+        ValueError: On an unknown field.
+    """
+    if not fields:
+        return AGGREGATE_FIELDS
+    selected = {f.strip() for f in fields.split(",") if f.strip()}
+    unknown = selected - set(AGGREGATE_FIELDS)
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(sorted(unknown))}")
+    return [field for field in AGGREGATE_FIELDS if field == "dt" or field in selected]
+
+
+def encode_cursor(dt: int) -> str:
+    """Opaque page token: the dt of the last row of the page"""
+    return base64.urlsafe_b64encode(json.dumps({"dt": int(dt)}).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    dt of a token from ``encode_cursor``.
+
+    Raises:
+        ValueError: If the token was not made by ``encode_cursor``.
+    """
+    try:
+        return int(json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))["dt"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def weather_page_query(location: str, fields: List[str], start: Optional[int] = None,
+                       end: Optional[int] = None, after: Optional[int] = None,
+                       limit: Optional[int] = None, descending: bool = False):
+    """
+    (SQL, params) reading processed rows of a location along the (location, dt)
+    primary key.
+
+    Args:
+        start: Inclusive lower bound on dt
+        end: Exclusive upper bound on dt
+        after: dt of the last row of the previous page (keyset pagination:
+            the next page starts right after it in ``descending`` order)
+        limit: Page size, every row of the range if None. One more row is
+            selected to tell whether there is a next page.
+    """
+    where = "location = %s"
+    params = [location]
+    if start is not None:
+        where += " AND dt >= %s"
+        params.append(start)
+    if end is not None:
+        where += " AND dt < %s"
+        params.append(end)
+    if after is not None:
+        where += " AND dt < %s" if descending else " AND dt > %s"
+        params.append(after)
+    sql = f"""
+        SELECT {', '.join(fields)}
+        FROM processed_weather_data
+        WHERE {where}
+        ORDER BY dt {'DESC' if descending else 'ASC'}
+    """
+    if limit is not None:
+        sql += " LIMIT %s"
+        params.append(limit + 1)
+    return sql, params
+
+
+async def fetch_weather_page(location: str, fields: List[str], start: Optional[int] = None,
+                             end: Optional[int] = None, after: Optional[int] = None,
+                             limit: Optional[int] = None, descending: bool = False):
+    """
+    Processed rows of a location (see ``weather_page_query`` for the arguments).
+
+    Returns:
+        tuple: (row dicts, cursor of the next page or None on the last page)
+    """
+    sql, params = weather_page_query(location, fields, start, end, after, limit, descending)
+    async with weather_api.pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(sql, params)
+            rows = list(await cur.fetchall())
+
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]["dt"])
+    return rows, next_cursor
+
+
+def columnar_response(request: Request, rows, types, columns=None, headers=None) -> Optional[Response]:
+    """
+    Rows as an Arrow IPC stream or Parquet file if the Accept header asks for
+    one of them (and pyarrow is installed), else None for a JSON response.
+    Endpoints using it must send ``Vary: Accept`` with their JSON bodies too.
+    """
+    media_type = arrow_codec.negotiate(request.headers.get("accept"))
+    if media_type is None:
+        return None
+    body = arrow_codec.encode(rows, media_type, types, columns)
+    return Response(content=body, media_type=media_type, headers=dict(headers or {}, Vary="Accept"))
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Whether the client asked for a streamed NDJSON body with its Accept header"""
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+def stream_ndjson(query: str, params=()) -> StreamingResponse:
+    """
+    Stream the rows of a query as NDJSON, one JSON object per line.
+
+    Rows are read from an unbuffered server-side cursor STREAM_BATCH_SIZE at a
+    time and sent as they come, so memory stays flat however large the table
+    grows and the first rows leave before the last ones are read.
+    """
+    async def chunks():
+        async with weather_api.pool.acquire() as conn:
+            cur = await conn.cursor(aiomysql.SSDictCursor)
+            finished = False
+            try:
+                await cur.execute(query, params)
+                while True:
+                    rows = await cur.fetchmany(STREAM_BATCH_SIZE)
+                    if not rows:
+                        break
+                    yield "".join(json.dumps(row, default=_json_default) + "\n" for row in rows).encode()
+                finished = True
+            except Exception as e:
+                logger.error(f"Error streaming rows: {e}")
+                raise
+            finally:
+                if finished:
+                    await cur.close()
+                else:
+                    # Client gone or query failed: drop the connection rather than read the rest of the result
+                    conn.close()
+
+    return StreamingResponse(chunks(), media_type=NDJSON_MEDIA_TYPE, headers={"Vary": "Accept"})
+
+
+def parse_aggregate_request(bucket: str, stats: str, fields: Optional[str], units: str):
+    """
+    Validate the parameters of /api/weather/aggregate.
+
+    Returns:
+        tuple: (bucket, [(stat name, quantile or None)], fields, units)
+
+    Raises:
+        ValueError: On an unknown bucket, statistic, field or unit system.
+    """
+    if bucket not in BUCKET_EXPRESSIONS:
+        raise ValueError(f"Unknown bucket {bucket}, expected one of {', '.join(BUCKET_EXPRESSIONS)}")
+    if units not in ("standard", "metric"):
+        raise ValueError("units must be standard or metric")
+
+    parsed_stats = []
+    for stat in (s.strip() for s in stats.split(",") if s.strip()):
+        if stat in SQL_STATS or stat == "count":
+            parsed_stats.append((stat, None))
+        elif stat == "median":
+            parsed_stats.append((stat, 0.5))
+        elif stat.startswith("p"):
+            try:
+                quantile = float(stat[1:]) / 100
+            except ValueError:
+                raise ValueError(f"Unknown statistic {stat}")
+            if not 0 <= quantile <= 1:
+                raise ValueError(f"Quantile {stat} is out of range")
+            parsed_stats.append((stat, quantile))
+        else:
+            raise ValueError(f"Unknown statistic {stat}")
+    if not parsed_stats:
+        raise ValueError("No statistic requested")
+
+    selected = [f.strip() for f in fields.split(",") if f.strip()] if fields else MEASUREMENT_FIELDS
+    unknown = [field for field in selected if field not in AGGREGATE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}")
+    return bucket, parsed_stats, selected, units
+
+
+def _bucket_label(bucket: str, key: int):
+    """(label, dt of the bucket start) of a bucket key"""
+    if bucket == "month":
+        year, month = divmod(int(key), 100)
+        start = datetime(year, month, 1)
+        return start.strftime('%Y-%m'), int((start - datetime(1970, 1, 1)).total_seconds())
+
+    start = datetime.utcfromtimestamp(int(key))
+    if bucket == "hour":
+        return start.strftime('%Y-%m-%d %H:00:00'), int(key)
+    if bucket == "day":
+        return start.strftime('%Y-%m-%d'), int(key)
+    iso_year, iso_week, _ = start.isocalendar()
+    return f"{iso_year}-W{iso_week}", int(key)
+
+
+async def _aggregate_scan(location: str, bucket: str, stats: list, fields: list,
+                          start: Optional[int], end: Optional[int]):
+    """
+    Bucket statistics computed from the hourly rows.
+
+    Mean, min, max, std and count are computed by MySQL with GROUP BY on the
+    (location, dt) primary key range. MySQL has no percentile function, so
+    median and quantiles fetch only the bucket key and requested columns of
+    the range and are computed with one vectorized pandas groupby.
+
+    Returns:
+        tuple: (grouped rows, {stat: DataFrame of quantiles by bucket} or None)
+    """
+    bucket_expression = BUCKET_EXPRESSIONS[bucket]
+    where = "location = %s"
+    params = [location]
+    if start is not None:
+        where += " AND dt >= %s"
+        params.append(start)
+    if end is not None:
+        where += " AND dt < %s"
+        params.append(end)
+
+    sql_stats = [name for name, quantile in stats if name in SQL_STATS]
+    quantiles = [(name, quantile) for name, quantile in stats if quantile is not None]
+    select = [f"{bucket_expression} AS bucket", "COUNT(*) AS count"] + [
+        f"{SQL_STATS[stat]}({field}) AS {field}_{stat}" for field in fields for stat in sql_stats
+    ]
+
+    async with weather_api.pool.acquire() as conn:
+        async with conn.cursor(aiomysql.DictCursor) as cur:
+            await cur.execute(f"""
+                SELECT {', '.join(select)}
+                FROM processed_weather_data
+                WHERE {where}
+                GROUP BY bucket
+                ORDER BY bucket
+            """, params)
+            grouped = await cur.fetchall()
+
+            quantile_values = None
+            if quantiles:
+                await cur.execute(f"""
+                    SELECT {bucket_expression} AS bucket, {', '.join(fields)}
+                    FROM processed_weather_data
+                    WHERE {where}
+                """, params)
+                df = pd.DataFrame(await cur.fetchall(), columns=["bucket"] + fields)
+                df[fields] = df[fields].astype("float64")
+                by_bucket = df.groupby("bucket")[fields]
+                quantile_values = {name: by_bucket.quantile(quantile) for name, quantile in quantiles}
+    return grouped, quantile_values
+
+
+async def _aggregate_rollup(location: str, bucket: str, stats: list, fields: list) -> List[Dict[str, Any]]:
+    """Bucket statistics read from the weather_rollup rows of the buckets, in the shape of the scan"""
+    columns = "bucket_key, field, value_count, value_sum, value_sum_squares, min_value, max_value"
+    if any(name == "median" for name, _ in stats):
+        columns += ", median_sketch"
+    # dt is never NULL: its value count is the row count of the bucket, the COUNT(*) of the scan
+    read_fields = fields if "dt" in fields else fields + ["dt"]
+
+    async with weather_api.pool.acquire() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute(f"""
+                SELECT {columns}
+                FROM weather_rollup
+                WHERE location = %s AND bucket = %s AND field IN ({', '.join(['%s'] * len(read_fields))})
+                ORDER BY bucket_key
+            """, [location, bucket] + read_fields)
+            stored = await cur.fetchall()
+
+    grouped = {}
+    for key, field, *values in stored:
+        bucket_stats = BucketStats.from_row(*values)
+        row = grouped.setdefault(key, {"bucket": key})
+        if field == "dt":
+            row["count"] = bucket_stats.count
+        if field in fields:
+            for name, _ in stats:
+                row[f"{field}_{name}"] = bucket_stats.value(name)
+    for row in grouped.values():
+        # Fields that are NULL in every row of the bucket have no rollup row, like NULL in the scan
+        for field in fields:
+            for name, _ in stats:
+                row.setdefault(f"{field}_{name}", None)
+    return list(grouped.values())
+
+
+async def aggregate_weather(location: str, bucket: str, stats: list, fields: list, units: str = "standard",
+                            start: Optional[int] = None, end: Optional[int] = None,
+                            exact: bool = False) -> List[Dict[str, Any]]:
+    """
+    Group processed weather data of a location into buckets.
+
+    Whole day, week and month buckets are read from the incrementally
+    maintained weather_rollup table, a few rows per bucket, when every
+    requested statistic is kept there; the median is then the P² estimate.
+    A ``start``/``end`` range, hourly buckets, other quantiles or ``exact``
+    compute the statistics from the hourly rows instead.
+    """
+    use_rollup = (
+        not exact and weather_api.rollup_ready and bucket in ROLLUP_BUCKETS
+        and start is None and end is None
+        and all(name in ROLLUP_STATS for name, _ in stats)
+    )
+    if use_rollup:
+        grouped, quantile_values = await _aggregate_rollup(location, bucket, stats, fields), None
+    else:
+        grouped, quantile_values = await _aggregate_scan(location, bucket, stats, fields, start, end)
+
+    result = []
+    for row in grouped:
+        label, bucket_start = _bucket_label(bucket, row["bucket"])
+        item = {"bucket": label, "start": bucket_start}
+        if any(name == "count" for name, _ in stats):
+            item["count"] = row["count"]
+        for field in fields:
+            for name, _ in stats:
+                if name == "count":
+                    continue
+                if f"{field}_{name}" in row:
+                    value = row[f"{field}_{name}"]
+                    value = float(value) if value is not None else None
+                else:
+                    value = quantile_values[name].at[row["bucket"], field]
+                    value = None if pd.isna(value) else float(value)
+                convert = None
+                if units == "metric":
+                    convert = (METRIC_SCALES if name == "std" else METRIC_CONVERSIONS).get(field)
+                if convert and value is not None:
+                    value = convert(value)
+                item[f"{field}_{name}"] = value
+        result.append(item)
+    return result
+
+
+async def legacy_bucket_view(location: str, bucket: str, stat: str, label_key: str,
+                             label_first: bool = True) -> List[Dict[str, Any]]:
+    """
+    Shape of the old pandas-based /filter* and /resample* endpoints: the bucket
+    label under ``label_key``, the ``stat`` of dt as a datetime string and the
+    ``stat`` of every measurement in °C / km. Medians stay exact, computed from
+    the hourly rows: the rollup only holds P² estimates of them.
+    """
+    _, stats, fields, _ = parse_aggregate_request(bucket, stat, None, "metric")
+    rows = await aggregate_weather(
+        location, bucket, stats, ["dt"] + fields, units="metric", exact=stat == "median"
+    )
+    result = []
+    for row in rows:
+        item = {label_key: row["bucket"]} if label_first else {}
+        item["dt"] = datetime.utcfromtimestamp(row[f"dt_{stat}"]).isoformat()
+        item.update({field: row[f"{field}_{stat}"] for field in fields})
+        if not label_first:
+            item[label_key] = row["bucket"]
+        result.append(item)
+    return result
+
 @app.on_event("startup")
 async def startup_event():
     """Initialize database connection on startup"""
@@ -47,6 +622,10 @@ async def startup_event():
         # Connect database
         await weather_api.connect_pool()
         logger.info("Database connection initialized")
+        await weather_api.purge_idempotency_keys()
+        # Before the binlog stream starts, so no insert is both rebuilt and replayed
+        await weather_api.ensure_rollup()
+        await weather_api.restore_readiness()
         
         # Start binlog listener in background
         weather_api.binlog_task = asyncio.create_task(weather_api.start_binlog_listener())
@@ -62,9 +641,26 @@ class WeatherAPI:
         self.is_listening = False
         self.binlog_stream = None
         self.redis = None
-        self.initial_count = 0
-        self.is_initial_load = True
-        self.binlog_queue = asyncio.Queue()
+        # Whether a bulk ingest completed (ingest_watermark): rows are published from then on
+        self.data_ready = False
+        # Items are the batches of one transaction, its commit batch last, or a heartbeat
+        self.binlog_queue = asyncio.Queue(maxsize=BINLOG_QUEUE_SIZE)
+        # Reader thread owning the BinLogStreamReader, and its stop flag
+        self.binlog_thread = None
+        self.binlog_stop = threading.Event()
+        self.table_columns = WEATHER_INSERT_COLUMNS
+        # (log file, position) of the last commit read, where the reader thread reconnects
+        self.binlog_position = None
+        # Set when ensure_rollup rebuilt the rollup: the stored checkpoint is behind it
+        self.rollup_rebuilt = False
+        # Seconds the last processed event was behind the master, 0 once caught up
+        self.binlog_lag = None
+        self.binlog_events = 0
+        self.binlog_rows = 0
+        # Whether weather_rollup exists and is maintained from the binlog
+        self.rollup_ready = False
+        self.rollup_lock = asyncio.Lock()
+        self.cache = ResponseCache()
 
     async def connect_pool(self):
         """Initialize database and redis connection pools"""
@@ -84,175 +680,432 @@ class WeatherAPI:
                 f'redis://redis:6379',
                 password=os.getenv('REDIS_PASSWORD')
             )
+            self.cache.redis = self.redis
 
-    async def start_binlog_stream(self):
-        """Start MySQL binlog stream"""
+    async def purge_idempotency_keys(self):
+        """Forget bulk insert idempotency keys older than IDEMPOTENCY_KEY_TTL_DAYS"""
         try:
-            if self.binlog_stream:
-                self.binlog_stream.close()
-                
-            mysql_settings = {
-                "host": os.getenv('DB_HOST'),
-                "port": int(os.getenv('DB_PORT')),
-                "user": os.getenv('DB_USER'),
-                "passwd": os.getenv('DB_PASSWORD')
-            }
-            
-            # Get current binlog position
             async with self.pool.acquire() as conn:
                 async with conn.cursor() as cur:
+                    await cur.execute(
+                        "DELETE FROM bulk_requests WHERE created_at < NOW() - INTERVAL %s DAY",
+                        (IDEMPOTENCY_KEY_TTL_DAYS,)
+                    )
+                    logger.info(f"Purged {cur.rowcount} expired bulk idempotency keys")
+        except Exception as e:
+            logger.warning(f"Could not purge bulk idempotency keys: {e}")
+
+    async def ensure_rollup(self):
+        """Build weather_rollup from the processed rows if it is empty, e.g. right after its migration"""
+        try:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT EXISTS(SELECT 1 FROM weather_rollup)")
+                    (has_rows,) = await cur.fetchone()
+            if not has_rows:
+                written = await self.rebuild_rollup()
+                self.rollup_rebuilt = True
+                logger.info(f"Built weather rollup with {written} rows")
+            self.rollup_ready = True
+        except Exception as e:
+            logger.warning(f"Weather rollup unavailable, trend queries will scan the hourly rows: {e}")
+
+    async def rebuild_rollup(self, location=None, keys=None):
+        """
+        Recompute weather_rollup rows from processed_weather_data.
+
+        Args:
+            location (str): Location to recompute, every location if None
+            keys (set): (bucket, bucket key) pairs to recompute, every bucket if None
+
+        Returns:
+            int: Number of rollup rows written
+        """
+        written = 0
+        async with self.rollup_lock:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor(aiomysql.DictCursor) as cur:
+                    if location is None:
+                        await cur.execute("SELECT DISTINCT location FROM processed_weather_data")
+                        locations = [row["location"] for row in await cur.fetchall()]
+                    else:
+                        locations = [location]
+
+                    for current in locations:
+                        await conn.begin()
+                        try:
+                            written += await self._recompute_rollup(cur, current, keys)
+                            await conn.commit()
+                        except Exception:
+                            await conn.rollback()
+                            raise
+        return written
+
+    async def _recompute_rollup(self, cur, location, keys=None):
+        """Replace the rollup rows of a location (only ``keys`` buckets if given) with statistics of the table"""
+        where = "location = %s"
+        params = [location]
+        if keys:
+            bounds = [bucket_bounds(bucket, key) for bucket, key in keys]
+            where += " AND dt >= %s AND dt < %s"
+            params += [min(start for start, _ in bounds), max(end for _, end in bounds)]
+        await cur.execute(f"""
+            SELECT location, {WEATHER_COLUMNS}
+            FROM processed_weather_data
+            WHERE {where}
+            ORDER BY dt
+        """, params)
+        columns = ["location"] + AGGREGATE_FIELDS
+        rows = [row if isinstance(row, dict) else dict(zip(columns, row)) for row in await cur.fetchall()]
+        rollup = rollup_rows(rows, AGGREGATE_FIELDS)
+
+        if keys:
+            # Only whole buckets were read: drop the partial ones at the range ends
+            rollup = {key: stats for key, stats in rollup.items() if key[1:3] in keys}
+            await cur.execute(f"""
+                DELETE FROM weather_rollup
+                WHERE location = %s AND (bucket, bucket_key) IN ({', '.join(['(%s, %s)'] * len(keys))})
+            """, [location] + [value for key in sorted(keys) for value in key])
+        else:
+            await cur.execute("DELETE FROM weather_rollup WHERE location = %s", (location,))
+        if rollup:
+            await cur.executemany(ROLLUP_UPSERT, [key + stats.to_row() for key, stats in rollup.items()])
+        return len(rollup)
+
+    async def _add_to_rollup(self, cur, rows):
+        """Add newly inserted processed rows to the stored statistics of their buckets"""
+        keys = sorted({(row["location"], bucket, bucket_key(bucket, row["dt"])) for row in rows for bucket in ROLLUP_BUCKETS})
+        if not keys:
+            return
+        await cur.execute(f"""
+            SELECT {ROLLUP_COLUMNS}
+            FROM weather_rollup
+            WHERE (location, bucket, bucket_key) IN ({', '.join(['(%s, %s, %s)'] * len(keys))})
+            FOR UPDATE
+        """, [value for key in keys for value in key])
+        rollup = {tuple(row[:4]): BucketStats.from_row(*row[4:]) for row in await cur.fetchall()}
+        rollup_rows(rows, AGGREGATE_FIELDS, rollup=rollup)
+        await cur.executemany(ROLLUP_UPSERT, [key + stats.to_row() for key, stats in rollup.items()])
+
+    async def apply_binlog_transaction(self, batches, commit):
+        """
+        Apply the rollup changes of one binlog transaction and move the
+        checkpoint past it, in a single MySQL transaction
+
+        Running statistics cannot absorb a row twice, so the rollup and the
+        position it is up to date with must never diverge: a failure or a
+        cancellation (the connection is then closed, which rolls it back)
+        leaves both as they were, and a restart replays the transaction.
+
+        Args:
+            batches (list): Write, update and delete batches of the transaction
+            commit (dict): Its commit batch, holding the binlog position after it
+        """
+        # Running statistics cannot take a value back: buckets of updated or
+        # deleted rows are recomputed from the table, which also covers the
+        # rows written to them in the same transaction
+        changed = {}
+        for batch in batches:
+            if batch["kind"] in ("update", "delete"):
+                for values in batch["rows"]:
+                    changed.setdefault(values['location'], set()).update(
+                        (bucket, bucket_key(bucket, values['dt'])) for bucket in ROLLUP_BUCKETS
+                    )
+        written = [
+            values for batch in batches if batch["kind"] == "write" for values in batch["rows"]
+            if not any(
+                (bucket, bucket_key(bucket, values['dt'])) in changed.get(values['location'], ())
+                for bucket in ROLLUP_BUCKETS
+            )
+        ]
+
+        async with self.rollup_lock:
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await conn.begin()
+                    try:
+                        if self.rollup_ready:
+                            await self._add_to_rollup(cur, written)
+                            for location, keys in changed.items():
+                                await self._recompute_rollup(cur, location, keys)
+                        await cur.execute(
+                            BINLOG_CHECKPOINT_UPSERT, (BINLOG_CONSUMER, commit["log_file"], commit["log_pos"])
+                        )
+                        await conn.commit()
+                    except Exception:
+                        await conn.rollback()
+                        raise
+
+    async def binlog_start_settings(self, position=None):
+        """
+        (log file, log position, column names) the binlog stream starts from
+
+        In order of preference: ``position`` (the last commit the reader thread
+        read, on a reconnect), the stored checkpoint (on a restart) and the
+        current master position. The checkpoint is skipped if its log file was
+        purged, or if ensure_rollup just rebuilt the rollup from the table.
+        """
+        async with self.pool.acquire() as conn:
+            async with conn.cursor() as cur:
+                log_file, log_pos = position or (None, None)
+                if position is None and not self.rollup_rebuilt:
+                    try:
+                        await cur.execute(
+                            "SELECT log_file, log_pos FROM binlog_checkpoint WHERE consumer = %s", (BINLOG_CONSUMER,)
+                        )
+                        checkpoint = await cur.fetchone()
+                        if checkpoint:
+                            await cur.execute("SHOW BINARY LOGS")
+                            if checkpoint[0] in {row[0] for row in await cur.fetchall()}:
+                                log_file, log_pos = checkpoint
+                            else:
+                                logger.warning(
+                                    f"Binlog checkpoint {checkpoint[0]}:{checkpoint[1]} was purged, starting from the "
+                                    "master position: rebuild the rollup with POST /api/weather/rollup/rebuild"
+                                )
+                    except Exception as e:
+                        logger.warning(f"Binlog checkpoint unavailable, starting from the master position: {e}")
+
+                if log_file is None:
                     await cur.execute("SHOW MASTER STATUS")
                     result = await cur.fetchone()
                     if result:
                         log_file, log_pos = result[0], result[1]
-                    else:
-                        log_file, log_pos = None, None
-                        
-                    # Get column names
-                    await cur.execute("""
-                        SELECT COLUMN_NAME 
-                        FROM INFORMATION_SCHEMA.COLUMNS 
-                        WHERE TABLE_SCHEMA = %s 
-                        AND TABLE_NAME = 'processed_weather_data'
-                        ORDER BY ORDINAL_POSITION
-                    """, (os.getenv('DB_NAME'),))
-                    columns = [row[0] for row in await cur.fetchall()]
-            
-            self.binlog_stream = BinLogStreamReader(
-                connection_settings=mysql_settings,
-                server_id=1000,
-                only_events=[WriteRowsEvent],
-                only_tables=['processed_weather_data'],
-                only_schemas=[os.getenv('DB_NAME')],
-                log_file=log_file,
-                log_pos=log_pos,
-                resume_stream=True,
-                blocking=True,
-                slave_heartbeat=30.0,
-                freeze_schema=False
-            )
-            logger.info(f"Started MySQL binlog stream from {log_file}:{log_pos}")
+
+                # Get column names
+                await cur.execute("""
+                    SELECT COLUMN_NAME 
+                    FROM INFORMATION_SCHEMA.COLUMNS 
+                    WHERE TABLE_SCHEMA = %s 
+                    AND TABLE_NAME = 'processed_weather_data'
+                    ORDER BY ORDINAL_POSITION
+                """, (os.getenv('DB_NAME'),))
+                columns = [row[0] for row in await cur.fetchall()]
+        return log_file, log_pos, columns
+
+    def start_binlog_stream(self, loop):
+        """Start MySQL binlog stream; runs in the reader thread"""
+        if self.binlog_stream:
+            self.binlog_stream.close()
             
-            # Store column names for later use
+        mysql_settings = {
+            "host": os.getenv('DB_HOST'),
+            "port": int(os.getenv('DB_PORT')),
+            "user": os.getenv('DB_USER'),
+            "passwd": os.getenv('DB_PASSWORD')
+        }
+        
+        # Get the start position and column names through the pool of the event loop
+        log_file, log_pos, columns = asyncio.run_coroutine_threadsafe(
+            self.binlog_start_settings(self.binlog_position), loop
+        ).result(timeout=30)
+        
+        self.binlog_stream = BinLogStreamReader(
+            connection_settings=mysql_settings,
+            server_id=1000,
+            # Heartbeats tell an idle master from a lagging stream; commits
+            # (XidEvent) are the positions it is safe to resume from
+            only_events=[WriteRowsEvent, UpdateRowsEvent, DeleteRowsEvent, XidEvent, HeartbeatLogEvent],
+            # ingest_watermark marks where the data became ready
+            only_tables=['processed_weather_data', 'ingest_watermark'],
+            only_schemas=[os.getenv('DB_NAME')],
+            log_file=log_file,
+            log_pos=log_pos,
+            resume_stream=True,
+            blocking=True,
+            slave_heartbeat=30.0,
+            freeze_schema=False
+        )
+        logger.info(f"Started MySQL binlog stream from {log_file}:{log_pos}")
+        
+        # Store column names for later use
+        if columns:
             self.table_columns = columns
-            
-        except Exception as e:
-            logger.error(f"Error starting binlog stream: {e}")
-            self.binlog_stream = None
-            await asyncio.sleep(5)
 
     async def start_binlog_listener(self):
-        """Start binlog listener in background"""
+        """Start the binlog reader thread and process what it reads"""
         try:
-            # Start binlog reader in a separate task
-            reader_task = asyncio.create_task(self.read_binlog())
-            # Start processor in a separate task
-            processor_task = asyncio.create_task(self.process_binlog_queue())
-            
-            # Wait for both tasks
-            await asyncio.gather(reader_task, processor_task)
+            self.binlog_stop.clear()
+            self.binlog_thread = threading.Thread(
+                target=self.read_binlog, args=(asyncio.get_running_loop(),),
+                name="binlog-reader", daemon=True
+            )
+            self.binlog_thread.start()
+            await self.process_binlog_queue()
             
         except Exception as e:
             logger.error(f"Error in binlog listener: {e}")
             raise
 
-    async def read_binlog(self):
-        """Read binlog in background thread"""
-        while True:
+    def read_binlog(self, loop):
+        """
+        Body of the binlog reader thread
+
+        The thread owns the BinLogStreamReader and blocks on it, so neither the
+        event loop nor its default executor ever waits on the binlog. Each
+        event is decoded with the table's column names into one batch (see
+        ``binlog_batch``). The batches of a transaction are queued together
+        when it commits, followed by a commit batch holding the binlog position
+        after it: a stream cut mid-transaction resumes from the previous commit
+        without queueing its first rows twice. ``binlog_queue`` is bounded, so
+        the thread stops reading while the consumer is behind.
+        """
+        while not self.binlog_stop.is_set():
             try:
                 if not self.binlog_stream:
-                    await self.start_binlog_stream()
-                    continue
-
-                def read_next():
-                    try:
-                        # Sử dụng fetchone() thay vì next()
-                        for event in self.binlog_stream:
-                            return event
-                    except Exception as e:
-                        logger.error(f"Error reading binlog: {e}")
-                        return None
-
-                # Read binlog in thread pool
-                event = await asyncio.get_event_loop().run_in_executor(None, read_next)
-                
-                if event and isinstance(event, WriteRowsEvent):
-                    logger.info(f"Received WriteRowsEvent with {len(event.rows)} rows")
-                    # Put event into queue for processing
-                    await self.binlog_queue.put(event)
+                    self.start_binlog_stream(loop)
+
+                transaction = []
+                for event in self.binlog_stream:
+                    batch = binlog_batch(event, self.table_columns)
+                    if batch is None:
+                        pass
+                    elif batch["kind"] == "heartbeat":
+                        self.queue_binlog_item(loop, [batch])
+                    elif batch["kind"] != "commit":
+                        transaction.append(batch)
+                    elif transaction:
+                        # Commits of transactions without rows of the two tables are skipped
+                        self.binlog_position = (self.binlog_stream.log_file, self.binlog_stream.log_pos)
+                        batch["log_file"], batch["log_pos"] = self.binlog_position
+                        transaction.append(batch)
+                        self.queue_binlog_item(loop, transaction)
+                        transaction = []
+                    if self.binlog_stop.is_set():
+                        break
                     
             except Exception as e:
+                if self.binlog_stop.is_set():
+                    break
                 logger.error(f"Error in binlog reader: {e}")
                 if self.binlog_stream:
                     self.binlog_stream.close()
                     self.binlog_stream = None
-                await asyncio.sleep(0.1)
+                time.sleep(5)
 
-    async def process_binlog_queue(self):
-        """Process events from binlog queue"""
-        initial_events = []
-        redis = await aioredis.from_url('redis://redis:6379', password=os.getenv('REDIS_PASSWORD'))
+    def queue_binlog_item(self, loop, item):
+        """Queue an item from the reader thread, waiting while the queue is full or until stopped"""
+        future = asyncio.run_coroutine_threadsafe(self.binlog_queue.put(item), loop)
+        while not self.binlog_stop.is_set():
+            try:
+                future.result(timeout=1)
+                return
+            except concurrent.futures.TimeoutError:
+                continue
+        future.cancel()
 
-        try:
-            while True:
-                event = await self.binlog_queue.get()
-                
-                if self.is_initial_load:
-                    initial_events.extend(event.rows)
-                    logger.info(f"Added to initial load buffer. Current size: {len(initial_events)}")
-                    
-                    if len(initial_events) >= 34400:
-                        logger.info(f"Initial load complete with {len(initial_events)} rows")
-                        self.is_initial_load = False
-                        
-                        # Gửi signal qua Redis
-                        await redis.set('db_initial_load_complete', '1')
-                        await redis.publish('db_status', 'initial_load_complete')
-                        
-                        # Process all initial events
-                        for row in initial_events:
-                            await self.process_weather_event(row['values'], is_initial=True)
-                        initial_events.clear()
+    async def apply_binlog_commit(self, batches, commit):
+        """
+        Apply a transaction with ``apply_binlog_transaction``, retrying until
+        it succeeds: the stream does not move on past changes the rollup missed
+        """
+        delay = 1
+        while True:
+            try:
+                await self.apply_binlog_transaction(batches, commit)
+                return
+            except Exception as e:
+                logger.error(
+                    f"Error applying binlog transaction ending at {commit['log_file']}:{commit['log_pos']}, "
+                    f"retrying in {delay}s: {e}"
+                )
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60)
+
+    async def process_binlog_queue(self):
+        """
+        Process batches from binlog queue
+
+        Each queued transaction is applied to the rollup together with the
+        checkpoint. Readiness follows the binlog too: it is turned on by the
+        transaction that wrote the ingest_watermark, once everything committed
+        before it has been processed, so no row of the initial load is
+        published. An error is handled per transaction, so the queue is
+        always drained.
+        """
+        while True:
+            transaction = await self.binlog_queue.get()
+            try:
+                *batches, commit = transaction
+                if commit["kind"] == "heartbeat":
+                    # The master sends heartbeats when it has no unsent events:
+                    # everything queued before this one has been processed
+                    self.binlog_lag = 0.0
                 else:
-                    # Process normal binlog event
-                    for row in event.rows:
-                        await self.process_weather_event(row['values'], is_initial=False)
-                
+                    await self.process_binlog_transaction(batches, commit)
+            except Exception as e:
+                logger.error(f"Error processing binlog transaction: {e}")
+            finally:
                 self.binlog_queue.task_done()
-                
+
+    async def process_binlog_transaction(self, batches, commit):
+        """Apply one committed transaction, then invalidate, publish and signal what it changed"""
+        changes = [batch for batch in batches if batch["kind"] != "watermark"]
+        for batch in changes:
+            logger.info(f"Received {batch['kind']} event with {len(batch['rows'])} rows")
+        # Retried until applied: the transaction is not lost on an error
+        await self.apply_binlog_commit(changes, commit)
+        self.binlog_events += len(changes)
+        self.binlog_rows += sum(len(batch["rows"]) for batch in changes)
+        self.binlog_lag = max(0.0, time.time() - commit["timestamp"])
+
+        # After the rollup commit, so no response is rebuilt from the old rollup
+        locations = sorted({values['location'] for batch in changes for values in batch["rows"]})
+        if locations:
+            await self.cache.invalidate(*(f"weather:{location}" for location in locations))
+
+        # Updates and deletes only concern the rollup. Rows written
+        # before the data is ready are not published: subscribers
+        # wait for readiness and then read them from the API
+        if self.data_ready:
+            for batch in changes:
+                if batch["kind"] == "write":
+                    await self.publish_weather_rows(batch["rows"])
+        if len(changes) < len(batches):
+            await self.signal_ready()
+
+    async def signal_ready(self):
+        """Tell the services waiting for db_initial_load_complete that the data is ready"""
+        self.data_ready = True
+        try:
+            await self.redis.set('db_initial_load_complete', '1')
+            await self.redis.publish('db_status', 'initial_load_complete')
+            logger.info("Signalled initial load complete")
         except Exception as e:
-            logger.error(f"Error processing binlog event: {e}")
-        finally:
-            await redis.close()
+            logger.error(f"Error signalling initial load complete: {e}")
 
-    async def process_weather_event(self, values, is_initial=False):
-        """Process a weather event"""
+    async def restore_readiness(self):
+        """Signal readiness at start-up if a bulk ingest completed before, e.g. after a Redis restart"""
         try:
-            
-            # Map UNKNOWN_COL to actual column names
-            weather_data = {
-                'dt': values['UNKNOWN_COL0'],
-                'temp': values['UNKNOWN_COL1'],
-                'pressure': values['UNKNOWN_COL2'],
-                'humidity': values['UNKNOWN_COL3'],
-                'clouds': values['UNKNOWN_COL4'],
-                'visibility': values['UNKNOWN_COL5'],
-                'wind_speed': values['UNKNOWN_COL6'],
-                'wind_deg': values['UNKNOWN_COL7']
-            }
-            
-            # Chỉ publish khi không phải initial load
-            if not is_initial:
-                await self.publish_weather_data(weather_data)
-            
+            async with self.pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    await cur.execute("SELECT EXISTS(SELECT 1 FROM ingest_watermark)")
+                    (completed,) = await cur.fetchone()
+            if completed:
+                await self.signal_ready()
         except Exception as e:
-            logger.error(f"Error processing weather event: {e}")
-            logger.error(f"Values received: {values}")
+            logger.warning(f"Could not read the ingest watermark, waiting for the next bulk ingest: {e}")
+
+    def binlog_stats(self):
+        return {
+            "lag_seconds": self.binlog_lag,
+            "position": self.binlog_position,
+            "queued": self.binlog_queue.qsize(),
+            "events": self.binlog_events,
+            "rows": self.binlog_rows,
+            "reader_alive": self.binlog_thread is not None and self.binlog_thread.is_alive(),
+            "consumer_alive": self.binlog_task is not None and not self.binlog_task.done()
+        }
 
     async def close_pool(self):
         """Close database connection"""
         self.is_listening = False
         
+        # Closing the stream wakes the reader thread up from its blocking read
+        self.binlog_stop.set()
+        if self.binlog_stream:
+            self.binlog_stream.close()
+
         if self.binlog_task:
             self.binlog_task.cancel()
             try:
@@ -265,19 +1118,34 @@ class WeatherAPI:
             await self.pool.wait_closed()
         logger.info("Database connection closed")
 
-    async def publish_weather_data(self, weather_data):
-        """Publish weather data to Redis"""
+    async def publish_weather_rows(self, rows):
+        """
+        Publish the rows of one WriteRowsEvent to Redis
+
+        Each location gets one message holding all its rows, encoded with
+        ``columnar_codec.encode_message``, so subscribers handle an insert of
+        many rows (a backfill, a bulk chunk) as one batch. All messages go out
+        in a single pipeline round trip.
+        """
         try:
-            # Convert to JSON string
-            data_str = json.dumps(weather_data)
-            
-            # Publish to Redis channel
-            await self.redis.publish('weather_data', data_str)
-            logger.info(f"Published weather data: {data_str}")
-            
+            batches = {}
+            for weather_data in rows:
+                batches.setdefault(weather_data.get('location', DEFAULT_LOCATION), []).append(weather_data)
+
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for location, batch in batches.items():
+                    message = columnar_codec.encode_message(batch)
+                    # Every location has its own channel; the original channel keeps
+                    # carrying the default location for the existing subscribers
+                    pipe.publish(f'weather_data:{location}', message)
+                    if location == DEFAULT_LOCATION:
+                        pipe.publish('weather_data', message)
+                await pipe.execute()
+            logger.info(f"Published {len(rows)} weather rows of {', '.join(sorted(batches))}")
+            logger.debug(f"Published weather rows: {batches}")
+
         except Exception as e:
             logger.error(f"Error publishing weather data: {e}")
-            logger.error(f"Weather data: {weather_data}")
 
 
 # FastAPI endpoints
@@ -287,6 +1155,16 @@ async def shutdown():
     if weather_api:
         await weather_api.close_pool()
 
+@app.get("/api/cache/stats")
+async def get_cache_stats() -> Dict[str, Any]:
+    """Hit/miss counters of the response cache since this process started"""
+    return weather_api.cache.stats()
+
+@app.get("/api/binlog/stats")
+async def get_binlog_stats() -> Dict[str, Any]:
+    """Lag in seconds of the binlog consumer behind the MySQL master, and its counters"""
+    return weather_api.binlog_stats()
+
 @app.get("/health")
 async def health_check():
     try:
@@ -304,30 +1182,87 @@ async def health_check():
         raise HTTPException(status_code=503, detail=str(e))
 
 @app.post("/api/weather/bulk")
-async def insert_weather_bulk(raw_data_list: List[WeatherData], processed_data_list: List[WeatherData]):
-    """Insert bulk weather data - both raw and processed"""
+async def insert_weather_bulk(
+    request: Request,
+    idempotency_key: Optional[str] = Header(None, max_length=128),
+    complete: bool = False
+):
+    """
+    Insert bulk weather data - both raw and processed
+
+    The body holds ``raw_data_list`` and ``processed_data_list``, as JSON or
+    as a columnar msgpack body (see ``read_bulk_rows``).
+
+    With an ``Idempotency-Key`` header the key is stored in the same transaction
+    as the rows: a retry of a request that was already committed inserts
+    nothing and gets the original count back (``"replayed": true``). Rows that
+    already exist are updated, so overlapping re-sends do not fail either.
+
+    ``complete=true`` marks the end of a bulk ingest (its lists may be empty):
+    the ingest_watermark of every location is written in the same transaction.
+    The services waiting for the initial load are signalled when the binlog
+    consumer reaches that transaction, after the rows committed before it.
+    """
+    raw_rows = await read_bulk_rows(request, WeatherData, WEATHER_INSERT_COLUMNS, "raw_data_list")
+    processed_rows = await read_bulk_rows(request, WeatherData, WEATHER_INSERT_COLUMNS, "processed_data_list")
     try:
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor() as cur:
-                # Insert raw data
-                await cur.executemany("""
-                    INSERT INTO raw_weather_data 
-                    (dt, temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg)
-                    VALUES (%(dt)s, %(temp)s, %(pressure)s, %(humidity)s, 
-                            %(clouds)s, %(visibility)s, %(wind_speed)s, %(wind_deg)s)
-                """, [data.model_dump() for data in raw_data_list])
-
-                # Insert processed data
-                await cur.executemany("""
-                    INSERT INTO processed_weather_data 
-                    (dt, temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg)
-                    VALUES (%(dt)s, %(temp)s, %(pressure)s, %(humidity)s, 
-                            %(clouds)s, %(visibility)s, %(wind_speed)s, %(wind_deg)s)
-                """, [data.model_dump() for data in processed_data_list])
+                await conn.begin()
+                try:
+                    if idempotency_key:
+                        # Blocks while a concurrent request with the same key is in flight
+                        await cur.execute("""
+                            INSERT IGNORE INTO bulk_requests (idempotency_key, row_count)
+                            VALUES (%s, %s)
+                        """, (idempotency_key, len(processed_rows)))
+                        if cur.rowcount == 0:
+                            await conn.rollback()
+                            await cur.execute(
+                                "SELECT row_count FROM bulk_requests WHERE idempotency_key = %s",
+                                (idempotency_key,)
+                            )
+                            row = await cur.fetchone()
+                            logger.info(f"Bulk request {idempotency_key} was already committed")
+                            return {
+                                "message": "Bulk insert already committed",
+                                "count": row[0] if row else len(processed_rows),
+                                "replayed": True
+                            }
+
+                    # Insert raw data
+                    await cur.executemany("""
+                        INSERT INTO raw_weather_data 
+                        (dt, temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg, location)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            temp = VALUES(temp), pressure = VALUES(pressure), humidity = VALUES(humidity),
+                            clouds = VALUES(clouds), visibility = VALUES(visibility),
+                            wind_speed = VALUES(wind_speed), wind_deg = VALUES(wind_deg)
+                    """, raw_rows)
+
+                    # Insert processed data
+                    await cur.executemany("""
+                        INSERT INTO processed_weather_data 
+                        (dt, temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg, location)
+                        VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+                        ON DUPLICATE KEY UPDATE
+                            temp = VALUES(temp), pressure = VALUES(pressure), humidity = VALUES(humidity),
+                            clouds = VALUES(clouds), visibility = VALUES(visibility),
+                            wind_speed = VALUES(wind_speed), wind_deg = VALUES(wind_deg)
+                    """, processed_rows)
+
+                    if complete:
+                        await cur.execute(INGEST_WATERMARK_UPSERT)
+                    await conn.commit()
+                except Exception:
+                    await conn.rollback()
+                    raise
                 
                 return {
                     "message": "Bulk insert successful",
-                    "count": len(processed_data_list)
+                    "count": len(processed_rows),
+                    "replayed": False
                 }
 
     except Exception as e:
@@ -335,44 +1270,130 @@ async def insert_weather_bulk(raw_data_list: List[WeatherData], processed_data_l
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/weather")
-async def get_weather_data():
-    """Get all weather data"""
+async def get_weather_data(
+    request: Request,
+    response: Response,
+    location: str = DEFAULT_LOCATION,
+    start: Optional[int] = Query(None, alias="from"),
+    end: Optional[int] = Query(None, alias="to"),
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """
+    Get the weather data of a location, newest first
+
+    Args:
+        from: Inclusive lower bound on ``dt``, optional
+        to: Exclusive upper bound on ``dt``, optional
+        fields: Comma-separated columns, defaults to all (``dt`` is always returned)
+        limit: Page size; without it every row of the range is returned
+        cursor: ``X-Next-Cursor`` header of the previous page
+
+    The ``X-Next-Cursor`` response header is set while more pages follow.
+    Without a limit, ``Accept: application/x-ndjson`` streams the rows
+    instead, one JSON object per line. ``Accept: application/vnd.apache.arrow.stream``
+    (or ``application/vnd.apache.parquet``) returns typed columns.
+    """
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor() as cur:
-                # Get all processed weather data
-                await cur.execute("""
-                    SELECT 
-                        dt, temp, pressure, humidity, 
-                        clouds, visibility, wind_speed, wind_deg
-                    FROM processed_weather_data 
-                    ORDER BY dt DESC
-                """)
-                
-                # Fetch all records
-                records = await cur.fetchall()
-                
-                # Convert to list of dicts
-                result = []
-                for record in records:
-                    result.append({
-                        'dt': record[0],
-                        'temp': record[1],
-                        'pressure': record[2],
-                        'humidity': record[3],
-                        'clouds': record[4],
-                        'visibility': record[5],
-                        'wind_speed': record[6],
-                        'wind_deg': record[7]
-                    })
-                
-                logger.info(f"Retrieved {len(result)} weather records")
-                return result
+        selected = parse_weather_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if limit is None and wants_ndjson(request):
+        return stream_ndjson(*weather_page_query(location, selected, start, end, after, descending=True))
+
+    try:
+        result, next_cursor = await fetch_weather_page(
+            location, selected, start, end, after, limit, descending=True
+        )
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        logger.info(f"Retrieved {len(result)} weather records for {location}")
+        columnar = columnar_response(request, result, WEATHER_ARROW_TYPES, selected, headers)
+        if columnar is not None:
+            return columnar
+        response.headers.update(headers)
+        response.headers["Vary"] = "Accept"
+        return result
 
     except Exception as e:
         logger.error(f"Error getting weather data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/weather/delta")
+async def get_weather_delta(
+    request: Request,
+    response: Response,
+    location: str = DEFAULT_LOCATION,
+    since: Optional[int] = None,
+    fields: Optional[str] = None
+):
+    """
+    Rows of a location with ``dt`` after the client watermark ``since``, oldest first
+
+    The ETag is a strong validator of the location's rows: their count and
+    latest ``dt``, plus a digest of the body format and ``fields`` so a
+    validator of one representation never matches another. A request whose
+    If-None-Match matches it gets 304 and no body. ``X-Row-Count`` carries
+    the count too: a client whose copy plus the delta has fewer rows missed
+    rows older than its watermark (a backfill) and should fetch again without
+    ``since``. In-place updates of existing rows do not change the validator.
+
+    Arrow and Parquet bodies are negotiated like on /api/weather.
+    """
+    try:
+        selected = parse_weather_fields(fields)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    media_type = arrow_codec.negotiate(request.headers.get("accept")) or "application/json"
+    representation = hashlib.sha1(f"{media_type};{','.join(selected)}".encode()).hexdigest()[:8]
+
+    try:
+        async with weather_api.pool.acquire() as conn:
+            async with conn.cursor(aiomysql.DictCursor) as cur:
+                # One snapshot for the validator and the rows
+                await conn.begin()
+                try:
+                    await cur.execute(
+                        "SELECT COUNT(*) AS row_count, MAX(dt) AS max_dt FROM processed_weather_data WHERE location = %s",
+                        (location,)
+                    )
+                    state = await cur.fetchone()
+                    etag = f'"{state["row_count"]}-{state["max_dt"] or 0}-{representation}"'
+                    if request.headers.get("if-none-match") == etag:
+                        return Response(status_code=304, headers={
+                            "ETag": etag, "X-Row-Count": str(state["row_count"]), "Vary": "Accept"
+                        })
+
+                    where = "location = %s"
+                    params = [location]
+                    if since is not None:
+                        where += " AND dt > %s"
+                        params.append(since)
+                    await cur.execute(f"""
+                        SELECT {', '.join(selected)}
+                        FROM processed_weather_data
+                        WHERE {where}
+                        ORDER BY dt
+                    """, params)
+                    result = await cur.fetchall()
+                finally:
+                    await conn.commit()
+
+        headers = {"ETag": etag, "X-Row-Count": str(state["row_count"])}
+        logger.info(f"Sent {len(result)} weather records of {location} after {since}")
+        columnar = columnar_response(request, result, WEATHER_ARROW_TYPES, selected, headers)
+        if columnar is not None:
+            return columnar
+        response.headers.update(headers)
+        response.headers["Vary"] = "Accept"
+        return result
+
+    except Exception as e:
+        logger.error(f"Error getting weather delta: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 @app.post("/api/weather/predictions")
 async def save_predictions(predictions: List[dict]):
     """Save weather predictions to database"""
@@ -399,257 +1420,153 @@ async def save_predictions(predictions: List[dict]):
         logger.error(f"Error saving predictions: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/api/weather/aggregate")
+async def get_weather_aggregate(
+    request: Request,
+    location: str = DEFAULT_LOCATION,
+    bucket: str = "day",
+    stats: str = "mean",
+    fields: Optional[str] = None,
+    start: Optional[int] = None,
+    end: Optional[int] = None,
+    units: str = "standard",
+    exact: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Time-bucketed statistics of processed weather data.
+
+    Args:
+        bucket: hour, day, week (ISO, Monday-based) or month
+        stats: Comma-separated list of mean, min, max, std (population),
+            count, median and pNN quantiles (e.g. p10,p90)
+        fields: Comma-separated columns, defaults to every measurement
+        start: Inclusive lower bound on ``dt``, optional
+        end: Exclusive upper bound on ``dt``, optional
+        units: standard (as stored) or metric (temp in °C, visibility in km)
+        exact: Compute from the hourly rows even when the rollup table could
+            answer; its median is a P² estimate
+
+    Returns one row per bucket, oldest first: ``bucket`` (label), ``start``
+    (``dt`` of the bucket start), ``count`` if requested, and ``<field>_<stat>``.
+    """
+    try:
+        spec = parse_aggregate_request(bucket, stats, fields, units)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    try:
+        return await weather_api.cache.respond(
+            request, weather_tags(location),
+            lambda: aggregate_weather(location, *spec, start=start, end=end, exact=exact)
+        )
+    except Exception as e:
+        logger.error(f"Error aggregating weather data: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.post("/api/weather/rollup/rebuild")
+async def rebuild_weather_rollup(location: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Recompute the day/week/month rollup rows from the hourly rows, of one
+    location or of all. Only needed if binlog events were missed.
+    """
+    try:
+        written = await weather_api.rebuild_rollup(location)
+        weather_api.rollup_ready = True
+        await weather_api.cache.invalidate(f"weather:{location}" if location else "weather")
+        return {"message": "Rollup rebuilt", "count": written}
+    except Exception as e:
+        logger.error(f"Error rebuilding weather rollup: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
 ###########api manhdung
 #FILTER
 @app.get("/filter")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(
+    request: Request,
+    location: str = DEFAULT_LOCATION,
+    start: Optional[int] = Query(None, alias="from"),
+    end: Optional[int] = Query(None, alias="to"),
+    fields: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+) -> List[Dict[str, Any]]:  
+    """Hourly rows oldest first, in °C and km; takes the range, projection and paging parameters of /api/weather"""
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển timestamp sang string để JSON serializable
-        df['dt'] = df['dt'].astype(str)
-        
-        result = df.to_dict(orient='records')   
+        selected = parse_weather_fields(fields)
+        after = decode_cursor(cursor) if cursor else None
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    headers = {}
+
+    async def filtered_rows():
+        result, next_cursor = await fetch_weather_page(location, selected, start, end, after, limit)
+        if next_cursor:
+            headers["X-Next-Cursor"] = next_cursor
+
+        for row in result:
+            # Chuyển timestamp sang định dạng datetime string
+            row['dt'] = datetime.utcfromtimestamp(int(row['dt'])).strftime('%Y-%m-%d %H:%M:%S')
+            # Nhiệt độ từ °K sang °C, tầm nhìn từ m sang km
+            for field, convert in METRIC_CONVERSIONS.items():
+                if field in row:
+                    row[field] = convert(row[field])
         return result
+
+    try:
+        return await weather_api.cache.respond(request, weather_tags(location), filtered_rows, headers=headers)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
 #nhóm theo ngày
 @app.get("/filterDay")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(request: Request, location: str = DEFAULT_LOCATION) -> List[Dict[str, Any]]:  
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển cột dt sang định dạng datetime
-        df['dt'] = pd.to_datetime(df['dt'])
-
-        # Tạo cột date
-        df['date'] = df['dt'].dt.date
-
-        # Nhóm dữ liệu theo ngày
-        daily_data = df.groupby('date').mean().reset_index()
-        
-        # Chuyển timestamp sang string để JSON serializable
-        daily_data['date'] = daily_data['date'].astype(str)
-        
-        result = daily_data.to_dict(orient='records')   
-        return result
+        return await weather_api.cache.respond(
+            request, weather_tags(location), lambda: legacy_bucket_view(location, "day", "mean", "date")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))   
  
 #nhóm theo tuần
 @app.get("/filterWeek")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(request: Request, location: str = DEFAULT_LOCATION) -> List[Dict[str, Any]]:  
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển cột dt sang định dạng datetime
-        df['dt'] = pd.to_datetime(df['dt'])
-
-        # Tạo cột week và year để nhóm
-        df['week'] = df['dt'].dt.isocalendar().week
-        df['year'] = df['dt'].dt.year
-
-        # Nhóm dữ liệu theo tuần và năm
-        weekly_data = df.groupby(['year', 'week']).mean().reset_index()
-
-        # Chuyển đổi cột week và year thành string để JSON serializable
-        weekly_data['week'] = weekly_data['week'].astype(str)
-        weekly_data['year'] = weekly_data['year'].astype(str)
-
-        # Kết hợp year và week vào một cột duy nhất để dễ hiểu
-        weekly_data['year_week'] = weekly_data['year'] + '-W' + weekly_data['week']
-
-        # Loại bỏ các cột không cần thiết
-        weekly_data = weekly_data.drop(columns=['year', 'week'])
-        
-        # Chuyển timestamp sang string để JSON serializable
-        weekly_data['year_week'] = weekly_data['year_week'].astype(str)
-        
-        result = weekly_data.to_dict(orient='records')   
-        return result
+        return await weather_api.cache.respond(
+            request, weather_tags(location),
+            lambda: legacy_bucket_view(location, "week", "mean", "year_week", label_first=False)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  
     
 #nhóm theo tháng
 @app.get("/filterMonth")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(request: Request, location: str = DEFAULT_LOCATION) -> List[Dict[str, Any]]:  
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển cột dt sang định dạng datetime
-        df['dt'] = pd.to_datetime(df['dt'])
-
-        # Tạo cột month để nhóm
-        df['month'] = df['dt'].dt.strftime('%Y-%m')
-
-        # Nhóm dữ liệu theo tuần và năm
-        monthly_data = df.groupby('month').mean().reset_index()
-  
-        # Chuyển timestamp sang string để JSON serializable
-        monthly_data['month'] = monthly_data['month'].astype(str)
-        
-        result = monthly_data.to_dict(orient='records')   
-        return result
+        return await weather_api.cache.respond(
+            request, weather_tags(location), lambda: legacy_bucket_view(location, "month", "mean", "month")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  
     
 #RE-SAMPLING về tháng TREND
 @app.get("/resampleMonth")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(request: Request, location: str = DEFAULT_LOCATION) -> List[Dict[str, Any]]:  
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển cột dt sang định dạng datetime
-        df['dt'] = pd.to_datetime(df['dt'])
-
-        # Tạo cột month để nhóm
-        df['month'] = df['dt'].dt.strftime('%Y-%m')
-
-        # Nhóm dữ liệu theo tháng
-        monthly_data = df.groupby('month').median().reset_index()
-  
-        # Chuyển timestamp sang string để JSON serializable
-        monthly_data['month'] = monthly_data['month'].astype(str)
-        
-        result = monthly_data.to_dict(orient='records')   
-        return result
+        return await weather_api.cache.respond(
+            request, weather_tags(location), lambda: legacy_bucket_view(location, "month", "median", "month")
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  
     
 #RE-SAMPLING về tuần TREND
 @app.get("/resampleWeek")
-async def get_filer() -> List[Dict[str, Any]]:  
+async def get_filer(request: Request, location: str = DEFAULT_LOCATION) -> List[Dict[str, Any]]:  
     try:
-        async with weather_api.pool.acquire() as conn:
-            async with conn.cursor(aiomysql.DictCursor) as cur:
-                query = "SELECT * FROM processed_weather_data ORDER BY dt DESC"
-                await cur.execute(query)
-                results = await cur.fetchall()
-        
-        # Chuyển đổi dữ liệu sang DataFrame
-        df = pd.DataFrame(results)
-        df = df.sort_values('dt')
-        
-        # Chuyển timestamp sang định dạng datetime string
-        df['dt'] = df['dt'].apply(lambda x: datetime.utcfromtimestamp(int(x)).strftime('%Y-%m-%d %H:%M:%S'))
-         
-        # Chuyển đổi nhiệt độ từ °K sang °C
-        df['temp'] = df['temp'].apply(lambda f: f-273.15)
-        
-        # Chuyển đổi đơn vị tầm nhìn từ m sang km
-        df['visibility'] = df['visibility'].apply(lambda f: f/1000)
-        
-        # Chuyển cột dt sang định dạng datetime
-        df['dt'] = pd.to_datetime(df['dt'])
-
-        # Tạo cột week và year để nhóm
-        df['week'] = df['dt'].dt.isocalendar().week
-        df['year'] = df['dt'].dt.year
-
-        # Nhóm dữ liệu theo tuần và năm
-        weekly_data = df.groupby(['year', 'week']).median().reset_index()
-
-        # Chuyển đổi cột week và year thành string để JSON serializable
-        weekly_data['week'] = weekly_data['week'].astype(str)
-        weekly_data['year'] = weekly_data['year'].astype(str)
-
-        # Kết hợp year và week vào một cột duy nhất để dễ hiểu
-        weekly_data['year_week'] = weekly_data['year'] + '-W' + weekly_data['week']
-
-        # Loại bỏ các cột không cần thiết
-        weekly_data = weekly_data.drop(columns=['year', 'week'])
-        
-        # Chuyển timestamp sang string để JSON serializable
-        weekly_data['year_week'] = weekly_data['year_week'].astype(str)
-        
-        result = weekly_data.to_dict(orient='records')   
-        return result
+        return await weather_api.cache.respond(
+            request, weather_tags(location),
+            lambda: legacy_bucket_view(location, "week", "median", "year_week", label_first=False)
+        )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e)) 
 
@@ -663,25 +1580,20 @@ async def delete_correlation_data():
                 query = "DELETE FROM correlation_table"
                 await cur.execute(query)
                 await conn.commit() # commit trên connection
+        await weather_api.cache.invalidate("correlation")
         return {"message":"Correlation old data deleted successfully"}
     except Exception as e:
         logger.error(f"error during delete operation: {e}") # log the error messag
         raise HTTPException(status_code=500, detail=str(e)) 
 
 @app.post("/api/correlation/bulk")
-async def save_correlation_bulk(data: List[CorrelationRecord]) -> Dict[str, Any]:
+async def save_correlation_bulk(request: Request) -> Dict[str, Any]:
     """
-    Save correlation data from a list of CorrelationRecord objects in bulk.
+    Save correlation data from a list of CorrelationRecord objects in bulk (JSON or columnar body).
     """
+    # Chuyển danh sách CorrelationRecord thành các tuple để insert
+    values = await read_bulk_rows(request, CorrelationRecord, CORRELATION_COLUMNS)
     try:
-        # Chuyển danh sách CorrelationRecord thành các tuple để insert
-        values = [
-            (
-                record.temp, record.pressure, record.humidity,
-                record.clouds, record.visibility, record.wind_speed, record.wind_deg
-            ) for record in data
-        ]
-
         query = """
         INSERT INTO correlation_table 
         (temp, pressure, humidity, clouds, visibility, wind_speed, wind_deg) 
@@ -692,6 +1604,7 @@ async def save_correlation_bulk(data: List[CorrelationRecord]) -> Dict[str, Any]
             async with conn.cursor() as cur:
                 await cur.executemany(query, values)
                 await conn.commit()
+        await weather_api.cache.invalidate("correlation")
 
         return {
             "count": len(values),
@@ -704,8 +1617,8 @@ async def save_correlation_bulk(data: List[CorrelationRecord]) -> Dict[str, Any]
 
 ##get data Correlation
 @app.get("/correlation")
-async def get_correlation_data():
-    try:
+async def get_correlation_data(request: Request):
+    async def correlation_rows():
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor() as cur:
                 await cur.execute("SELECT * FROM correlation_table")
@@ -715,58 +1628,22 @@ async def get_correlation_data():
                     logger.info(f"Retrieved {len(df)} correlation records")
                     return df.to_dict('records')
                 return []
+
+    try:
+        return await weather_api.cache.respond(request, ["correlation"], correlation_rows)
     except Exception as e:
         logger.error(f"Error getting correlation data: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 ##SEASONAL
 @app.post("/api/seasonal/bulk")
-async def save_seasonal_bulk(data: List[SeasonalRecord]) -> Dict[str, Any]:
+async def save_seasonal_bulk(request: Request) -> Dict[str, Any]:
     """
-    Save correlation data from a list of SeasonalRecord objects in bulk.
+    Save correlation data from a list of SeasonalRecord objects in bulk (JSON or columnar body).
     """
+    # Chuyển danh sách SeasonalRecord thành các tuple để insert
+    values = await read_bulk_rows(request, SeasonalRecord, SEASONAL_COLUMNS)
     try:
-        # Chuyển danh sách CorrelationRecord thành các tuple để insert
-        values = [
-            (
-                record.dt,
-                record.observed_temp, 
-                record.trend_temp, 
-                record.seasonal_temp, 
-                record.residual_temp, 
-                
-                record.observed_pressure, 
-                record.trend_pressure, 
-                record.seasonal_pressure, 
-                record.residual_pressure, 
-                
-                record.observed_humidity, 
-                record.trend_humidity, 
-                record.seasonal_humidity, 
-                record.residual_humidity, 
-                
-                record.observed_clouds, 
-                record.trend_clouds, 
-                record.seasonal_clouds, 
-                record.residual_clouds, 
-                
-                record.observed_visibility, 
-                record.trend_visibility, 
-                record.seasonal_visibility, 
-                record.residual_visibility, 
-                
-                record.observed_wind_speed, 
-                record.trend_wind_speed, 
-                record.seasonal_wind_speed, 
-                record.residual_wind_speed, 
-                
-                record.observed_wind_deg, 
-                record.trend_wind_deg, 
-                record.seasonal_wind_deg, 
-                record.residual_wind_deg
-            ) for record in data
-        ]
-
         query = """
         INSERT INTO seasonal_table 
         (   dt,
@@ -811,6 +1688,7 @@ async def save_seasonal_bulk(data: List[SeasonalRecord]) -> Dict[str, Any]:
             async with conn.cursor() as cur:
                 await cur.executemany(query, values)
                 await conn.commit()
+        await weather_api.cache.invalidate("seasonal")
 
         return {
             "count": len(values),
@@ -830,6 +1708,7 @@ async def delete_seasonal_data():
                 query = "DELETE FROM seasonal_table"
                 await cur.execute(query)
                 await conn.commit() # commit trên connection
+        await weather_api.cache.invalidate("seasonal")
         return {"message":"seasonal old data deleted successfully"}
     except Exception as e:
         logger.error(f"error during delete operation: {e}") # log the error messag
@@ -837,8 +1716,12 @@ async def delete_seasonal_data():
 
 ##get data seasonal
 @app.get("/seasonal")
-async def get_filer() -> List[Dict[str, Any]]:  
-    try:
+async def get_filer(request: Request) -> List[Dict[str, Any]]:  
+    """Seasonal decomposition rows; streamed as NDJSON on ``Accept: application/x-ndjson``"""
+    if wants_ndjson(request):
+        return stream_ndjson("SELECT * FROM seasonal_table")
+
+    async def seasonal_rows():
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 query = "SELECT * FROM seasonal_table"
@@ -848,15 +1731,22 @@ async def get_filer() -> List[Dict[str, Any]]:
         # Chuyển đổi dữ liệu sang DataFrame
         df = pd.DataFrame(results)
          
-        result = df.to_dict(orient='records')   
-        return result
+        return df.to_dict(orient='records')
+
+    try:
+        cached = await weather_api.cache.respond(request, ["seasonal"], seasonal_rows)
+        # JSON or NDJSON depending on Accept
+        cached.headers["Vary"] = "Accept"
+        return cached
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))  
 # ====================================================================
 
 # =========================== API Tuyen ==============================
 @app.post("/api/cluster_data/bulk")
-async def save_cluster_data_bulk(cluster_data: List[ClusterData]) -> Dict[str, Any]:
+async def save_cluster_data_bulk(request: Request) -> Dict[str, Any]:
+    """Save ClusterData rows in bulk (JSON or columnar body)"""
+    cluster_rows = await read_bulk_rows(request, ClusterData, CLUSTER_COLUMNS)
     try:
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor() as cur:
@@ -869,14 +1759,8 @@ async def save_cluster_data_bulk(cluster_data: List[ClusterData]) -> Dict[str, A
                 batch_size = 100
                 total_saved = 0
 
-                for i in range(0, len(cluster_data), batch_size):
-                    batch = cluster_data[i:i + batch_size]
-                    values = [
-                        (data.dt, data.temp, data.pressure, data.humidity,
-                         data.clouds, data.visibility, data.wind_speed, data.wind_deg,
-                         data.date, data.month, data.scaled_temp, data.kmean_label, data.custom_label)
-                        for data in batch
-                    ]
+                for i in range(0, len(cluster_rows), batch_size):
+                    values = cluster_rows[i:i + batch_size]
 
                     try:
                         await cur.executemany(query, values)
@@ -884,6 +1768,7 @@ async def save_cluster_data_bulk(cluster_data: List[ClusterData]) -> Dict[str, A
                     except Exception as e:
                         logger.error(f"Error saving batch starting at index {i}: {e}")
                         continue
+        await weather_api.cache.invalidate("cluster_data")
         return {
             "count": total_saved,
         }
@@ -907,6 +1792,7 @@ async def delete_all_cluster_data() -> Dict[str, Any]:
                 """
                 await cur.execute(query)  # Xóa toàn bộ dữ liệu trong bảng
                 logger.info("All data in 'cluster_data' table has been deleted successfully.")
+        await weather_api.cache.invalidate("cluster_data")
 
         return {
             "message": "Clustered weather data deleted successfully"
@@ -941,6 +1827,7 @@ async def save_spider(data: List[Spider]) -> Dict[str, Any]:
 
                 # Thực thi lệnh chèn dữ liệu hàng loạt
                 await cur.executemany(query, values)
+        await weather_api.cache.invalidate("spider")
 
         # Trả về kết quả thành công
         return {
@@ -954,14 +1841,17 @@ async def save_spider(data: List[Spider]) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/get_spider", response_model= List[Spider])
-async def get_spider():
-    try: 
+async def get_spider(request: Request):
+    async def spider_rows():
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 query = "SELECT * FROM spider"
                 await cur.execute(query)
                 results = await cur.fetchall()
                 return [Spider(**row) for row in results]
+
+    try: 
+        return await weather_api.cache.respond(request, ["spider"], spider_rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -975,6 +1865,7 @@ async def delete_all_cluster_data() -> Dict[str, Any]:
                 """
                 await cur.execute(query)  # Xóa toàn bộ dữ liệu trong bảng
                 logger.info("All data in 'centroids' table has been deleted successfully.")
+        await weather_api.cache.invalidate("centroids")
 
         return {
             "message": "centroids data deleted successfully"
@@ -1008,6 +1899,7 @@ async def save_centroid(data_centroids: List[Centroid]) -> Dict[str, Any]:
 
                 # Thực thi lệnh chèn dữ liệu hàng loạt
                 await cur.executemany(query, values)
+        await weather_api.cache.invalidate("centroids")
 
         # Trả về kết quả thành công
         return {
@@ -1021,26 +1913,51 @@ async def save_centroid(data_centroids: List[Centroid]) -> Dict[str, Any]:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/data_cluster", response_model=List[ClusterData])
-async def get_all_weather():
-    try:
+async def get_all_weather(request: Request):
+    """
+    Every cluster row; the cached response's ETag makes it conditional on
+    If-None-Match. Streamed as NDJSON on ``Accept: application/x-ndjson``,
+    typed columns on Arrow or Parquet ``Accept`` headers.
+    """
+    if wants_ndjson(request):
+        return stream_ndjson("SELECT * FROM cluster_data")
+    media_type = arrow_codec.negotiate(request.headers.get("accept"))
+
+    async def cluster_rows():
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 query = "SELECT * FROM cluster_data"
                 await cur.execute(query)
                 results = await cur.fetchall()
+                if media_type is not None:
+                    return results
                 return [ClusterData(**row) for row in results]
+
+    def encode(rows):
+        return arrow_codec.encode(rows, media_type, CLUSTER_ARROW_TYPES, CLUSTER_COLUMNS)
+
+    try:
+        cached = await weather_api.cache.respond(
+            request, ["cluster_data"], cluster_rows,
+            media_type=media_type, encode=encode if media_type is not None else None
+        )
+        cached.headers["Vary"] = "Accept"
+        return cached
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/api/get_centroids", response_model= List[Centroid])
-async def get_centroid():
-    try: 
+async def get_centroid(request: Request):
+    async def centroid_rows():
         async with weather_api.pool.acquire() as conn:
             async with conn.cursor(aiomysql.DictCursor) as cur:
                 query = "SELECT * FROM centroids"
                 await cur.execute(query)
                 results = await cur.fetchall()
                 return [Centroid(**row) for row in results]
+
+    try: 
+        return await weather_api.cache.respond(request, ["centroids"], centroid_rows)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -1119,7 +2036,7 @@ async def save_temp_pred(data: Temp_pred) -> Dict[str, Any]:
 # ====================================================================
 
 @app.get("/api/prediction_chart")
-async def get_prediction_chart_data() -> Dict[str, Any]:
+async def get_prediction_chart_data(location: str = DEFAULT_LOCATION) -> Dict[str, Any]:
     """
     Lấy dữ liệu nhiệt độ cho biểu đồ:
     - 9 giờ historical data từ processed_weather_data
@@ -1135,10 +2052,11 @@ async def get_prediction_chart_data() -> Dict[str, Any]:
                         temp - 273.15 as temp,
                         FROM_UNIXTIME(dt) as formatted_time
                     FROM processed_weather_data
+                    WHERE location = %s
                     ORDER BY dt DESC
                     LIMIT 9;
                 """
-                await cur.execute(historical_query)
+                await cur.execute(historical_query, (location,))
                 historical_results = await cur.fetchall()
 
                 # Query lấy 3 giờ dự đoán tiếp theo
@@ -0,0 +1,128 @@
+import os
+import json
+import hashlib
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response
+
+from src.logger import logger
+
+# Lifetime of a cached response; invalidation normally replaces it much sooner
+RESPONSE_CACHE_TTL = int(os.getenv('RESPONSE_CACHE_TTL', 3600))
+# Larger responses are served but not cached
+RESPONSE_CACHE_MAX_BYTES = int(os.getenv('RESPONSE_CACHE_MAX_BYTES', 8 * 1024 * 1024))
+KEY_PREFIX = "response_cache"
+JSON_MEDIA_TYPE = "application/json"
+
+
+class ResponseCache:
+    """
+    Read-through cache of JSON responses in Redis.
+
+    An entry is keyed by the request path, its query parameters, the media
+    type of the body and the generation of every tag its data depends on (e.g. ``weather:da_nang``).
+    Invalidating a tag increments its generation: every entry built from the
+    old data stops being read at once, including one a concurrent request is
+    still computing, and the orphans expire with their TTL.
+
+    Entries hold the serialized body, so a hit costs no query and no
+    serialization, and a content hash served as ETag, so a client that
+    already has the body gets 304. Redis errors only disable caching.
+    """
+
+    def __init__(self, redis=None, ttl=RESPONSE_CACHE_TTL, max_bytes=RESPONSE_CACHE_MAX_BYTES):
+        self.redis = redis
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        # Per path: hits, misses, not_modified (304s) and too_large (served uncached)
+        self.counters = {}
+
+    def _count(self, path, counter):
+        counters = self.counters.setdefault(path, {"hits": 0, "misses": 0, "not_modified": 0, "too_large": 0})
+        counters[counter] += 1
+
+    def _key(self, request: Request, generations, media_type):
+        query = sorted(request.query_params.multi_items())
+        digest = hashlib.sha1(json.dumps([request.url.path, query, media_type, generations]).encode()).hexdigest()
+        return f"{KEY_PREFIX}:entry:{digest}"
+
+    def _response(self, request: Request, path, body, etag, headers, media_type):
+        if request.headers.get("if-none-match") == etag:
+            self._count(path, "not_modified")
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type=media_type, headers=dict(headers, ETag=etag))
+
+    async def respond(self, request: Request, tags, compute, headers=None, media_type=None, encode=None):
+        """
+        Serve a request from the cache, or compute, cache and serve it.
+
+        Args:
+            request: The request, whose path and query parameters key the entry
+            tags (list): Tags of the data the response is built from
+            compute: Coroutine function returning the JSON content
+            headers (dict): Extra response headers, filled by ``compute`` and
+                cached along with the body
+            media_type (str): Media type of the body, JSON by default
+            encode: Function turning the content into the body of
+                ``media_type``, required unless the body is JSON
+
+        Returns:
+            Response: Body with an ETag, or 304 if If-None-Match matches
+        """
+        path = request.url.path
+        media_type = media_type or JSON_MEDIA_TYPE
+        headers = {} if headers is None else headers
+        key = None
+        if self.redis is not None:
+            try:
+                generations = await self.redis.mget([f"{KEY_PREFIX}:generation:{tag}" for tag in tags])
+                key = self._key(request, [int(generation or 0) for generation in generations], media_type)
+                etag, body, cached_headers = await self.redis.hmget(key, "etag", "body", "headers")
+                if body is not None:
+                    self._count(path, "hits")
+                    return self._response(request, path, body, etag.decode(), json.loads(cached_headers), media_type)
+            except Exception as e:
+                logger.warning(f"Response cache unavailable: {e}")
+                key = None
+
+        self._count(path, "misses")
+        content = await compute()
+        body = encode(content) if encode is not None else JSONResponse(jsonable_encoder(content)).body
+        etag = f'"{hashlib.sha1(body).hexdigest()[:20]}"'
+        if key is not None:
+            if len(body) > self.max_bytes:
+                self._count(path, "too_large")
+            else:
+                try:
+                    async with self.redis.pipeline(transaction=True) as pipe:
+                        pipe.hset(key, mapping={"etag": etag, "body": body, "headers": json.dumps(headers)})
+                        pipe.expire(key, self.ttl)
+                        await pipe.execute()
+                except Exception as e:
+                    logger.warning(f"Could not cache response of {path}: {e}")
+        return self._response(request, path, body, etag, headers, media_type)
+
+    async def invalidate(self, *tags):
+        """Make every cached response built from data of ``tags`` stale"""
+        if self.redis is None or not tags:
+            return
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for tag in tags:
+                    pipe.incr(f"{KEY_PREFIX}:generation:{tag}")
+                await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Could not invalidate cached responses of {', '.join(tags)}: {e}")
+
+    def stats(self):
+        hits = sum(counters["hits"] for counters in self.counters.values())
+        misses = sum(counters["misses"] for counters in self.counters.values())
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_ratio": hits / (hits + misses) if hits + misses else None,
+            "ttl": self.ttl,
+            "max_bytes": self.max_bytes,
+            "paths": self.counters
+        }
@@ -0,0 +1,124 @@
+import json
+import math
+import calendar
+from datetime import datetime
+
+from src.quantile_sketch import P2Quantile
+
+# Buckets kept in weather_rollup; hours stay computed from the raw rows
+ROLLUP_BUCKETS = ["day", "week", "month"]
+# Statistics a rollup row can answer (the median from its P² sketch)
+ROLLUP_STATS = {"mean", "min", "max", "std", "count", "median"}
+BUCKET_SECONDS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def bucket_key(bucket, dt):
+    """Python twin of the BUCKET_EXPRESSIONS of db_api: the bucket key of a dt"""
+    dt = int(dt)
+    if bucket == "month":
+        start = datetime.utcfromtimestamp(dt)
+        return start.year * 100 + start.month
+    if bucket == "week":
+        # 1970-01-01 was a Thursday: step back to the Monday
+        return dt - dt % 86400 - (dt // 86400 + 3) % 7 * 86400
+    return dt - dt % BUCKET_SECONDS[bucket]
+
+
+def bucket_bounds(bucket, key):
+    """The [start, end) dt range of a bucket"""
+    if bucket == "month":
+        year, month = divmod(int(key), 100)
+        start = calendar.timegm((year, month, 1, 0, 0, 0))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        return start, calendar.timegm((year, month, 1, 0, 0, 0))
+    return int(key), int(key) + BUCKET_SECONDS[bucket]
+
+
+class BucketStats:
+    """
+    Running statistics of one field in one bucket: count, sum, sum of squares,
+    min, max and a P² median sketch. Adding a value never needs the values
+    added before, so a bucket is updated from new rows alone.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.median = P2Quantile(0.5)
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.total_squares += value * value
+        self.minimum = value if self.minimum is None else min(self.minimum, value)
+        self.maximum = value if self.maximum is None else max(self.maximum, value)
+        self.median.add(value)
+
+    def value(self, stat):
+        """Value of one of ROLLUP_STATS, None for an empty bucket"""
+        if stat == "count":
+            return self.count
+        if self.count == 0:
+            return None
+        if stat == "mean":
+            return self.total / self.count
+        if stat == "std":
+            # Population standard deviation, like STDDEV_POP
+            mean = self.total / self.count
+            return math.sqrt(max(self.total_squares / self.count - mean * mean, 0.0))
+        if stat == "median":
+            return self.median.value()
+        return self.minimum if stat == "min" else self.maximum
+
+    def to_row(self):
+        """(value_count, value_sum, value_sum_squares, min_value, max_value, median_sketch)"""
+        return (
+            self.count, self.total, self.total_squares, self.minimum, self.maximum,
+            json.dumps(self.median.to_dict())
+        )
+
+    @classmethod
+    def from_row(cls, count, total, total_squares, minimum, maximum, sketch=None):
+        stats = cls()
+        stats.count = int(count)
+        stats.total = float(total)
+        stats.total_squares = float(total_squares)
+        stats.minimum = float(minimum)
+        stats.maximum = float(maximum)
+        if sketch is not None:
+            stats.median = P2Quantile.from_dict(json.loads(sketch) if isinstance(sketch, (str, bytes)) else sketch)
+        return stats
+
+
+def rollup_rows(rows, fields, buckets=None, rollup=None):
+    """
+    Add rows to per-bucket statistics.
+
+    Args:
+        rows (list): Row dicts with location, dt and ``fields``
+        fields (list): Fields to summarize
+        buckets (list): Bucket types, defaults to ROLLUP_BUCKETS
+        rollup (dict): Statistics to add to, e.g. the stored rows of the
+            buckets the new rows fall in
+
+    Returns:
+        dict: (location, bucket, bucket key, field) to ``BucketStats``
+    """
+    rollup = {} if rollup is None else rollup
+    # P² estimates depend on the order of the values: keep it chronological
+    for row in sorted(rows, key=lambda row: row["dt"]):
+        for bucket in buckets or ROLLUP_BUCKETS:
+            key = bucket_key(bucket, row["dt"])
+            for field in fields:
+                value = row.get(field)
+                if value is None:
+                    continue
+                stats = rollup.get((row["location"], bucket, key, field))
+                if stats is None:
+                    stats = rollup[(row["location"], bucket, key, field)] = BucketStats()
+                stats.add(value)
+    return rollup
@@ -2,6 +2,8 @@ from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
 
+from src.locations import DEFAULT_LOCATION
+
 class WeatherData(BaseModel):
     dt: int
     temp: float  
@@ -11,6 +13,7 @@ class WeatherData(BaseModel):
     visibility: Optional[int]
     wind_speed: float
     wind_deg: int
+    location: str = DEFAULT_LOCATION
 
     def get_formatted_time(self) -> str:
         return datetime.fromtimestamp(self.dt).strftime("%Y-%m-%d %H:%M:%S")
@@ -25,7 +28,8 @@ class WeatherData(BaseModel):
             clouds=raw_data.get("clouds"),
             visibility=raw_data.get("visibility"),  
             wind_speed=raw_data.get("wind_speed"),
-            wind_deg=raw_data.get("wind_deg")
+            wind_deg=raw_data.get("wind_deg"),
+            location=raw_data.get("location", DEFAULT_LOCATION)
         )
         
 class Centroid(BaseModel):
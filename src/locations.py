@@ -0,0 +1,38 @@
+import os
+from collections import namedtuple
+
+from src.config import cfg
+
+Location = namedtuple("Location", ["name", "lat", "lon"])
+
+DEFAULT_LOCATION = cfg.locations.get("default", "da_nang")
+
+
+def observation_dir(data_dir, location_name):
+    """Directory holding the observation log and crawl state of one location"""
+    return os.path.join(data_dir, "observations", location_name)
+
+
+def get_locations():
+    """
+    Locations configured in configs/locations.yml.
+
+    Falls back to a single default location built from the LAT/LON environment
+    variables when the file lists none.
+
+    Returns:
+        list: Location tuples, default location first.
+    """
+    locations = [
+        Location(str(entry["name"]), float(entry["lat"]), float(entry["lon"]))
+        for entry in cfg.locations.get("locations", None) or []
+    ]
+    if not locations:
+        locations = [Location(DEFAULT_LOCATION, float(os.getenv('LAT')), float(os.getenv('LON')))]
+
+    names = [location.name for location in locations]
+    if len(set(names)) != len(names):
+        raise ValueError(f"Duplicate location names in configs/locations.yml: {names}")
+
+    locations.sort(key=lambda location: location.name != DEFAULT_LOCATION)
+    return locations
@@ -3,28 +3,79 @@ CREATE DATABASE IF NOT EXISTS weather_db;
 USE weather_db;
 
 -- Create weather data table
+-- location is the last column so binlog rows keep dt..wind_deg at positions 0-7
 CREATE TABLE IF NOT EXISTS raw_weather_data (
-    dt INT PRIMARY KEY,
+    dt INT NOT NULL,
     temp FLOAT,
     pressure INT,
     humidity INT,
     clouds INT,
     visibility INT,
     wind_speed FLOAT,
-    wind_deg INT
+    wind_deg INT,
+    location VARCHAR(64) NOT NULL DEFAULT 'da_nang',
+    PRIMARY KEY (location, dt)
 ); 
 
 CREATE TABLE IF NOT EXISTS processed_weather_data (
-    dt INT PRIMARY KEY,
+    dt INT NOT NULL,
     temp FLOAT NOT NULL,
     pressure INT NOT NULL,
     humidity INT NOT NULL,
     clouds INT NOT NULL,
     visibility INT NOT NULL,
     wind_speed FLOAT NOT NULL,
-    wind_deg INT NOT NULL
+    wind_deg INT NOT NULL,
+    location VARCHAR(64) NOT NULL DEFAULT 'da_nang',
+    PRIMARY KEY (location, dt)
 ); 
 
+-- Idempotency keys of committed /api/weather/bulk requests, written in the same
+-- transaction as the rows so a retried chunk is never inserted twice
+CREATE TABLE IF NOT EXISTS bulk_requests (
+    idempotency_key VARCHAR(128) NOT NULL PRIMARY KEY,
+    row_count INT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_bulk_requests_created_at (created_at)
+);
+
+-- Day/week/month statistics of processed_weather_data, one row per location,
+-- bucket and field, kept up to date by db_api from the binlog. bucket_key is
+-- the bucket start dt (day, week) or YYYYMM (month); median_sketch holds the
+-- P² markers of the median
+CREATE TABLE IF NOT EXISTS weather_rollup (
+    location VARCHAR(64) NOT NULL,
+    bucket VARCHAR(8) NOT NULL,
+    bucket_key BIGINT NOT NULL,
+    field VARCHAR(32) NOT NULL,
+    value_count INT NOT NULL,
+    value_sum DOUBLE NOT NULL,
+    value_sum_squares DOUBLE NOT NULL,
+    min_value DOUBLE NOT NULL,
+    max_value DOUBLE NOT NULL,
+    median_sketch JSON NOT NULL,
+    PRIMARY KEY (location, bucket, bucket_key, field)
+);
+
+-- Binlog position up to which db_api has applied processed_weather_data
+-- changes (rollup, cache, pub/sub), saved at transaction commits so a restart
+-- resumes there instead of at the current master position
+CREATE TABLE IF NOT EXISTS binlog_checkpoint (
+    consumer VARCHAR(64) NOT NULL PRIMARY KEY,
+    log_file VARCHAR(255) NOT NULL,
+    log_pos BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Rows of each location when data_ingestion last completed a bulk ingest
+-- (/api/weather/bulk?complete=true); a watermark means the data is ready
+CREATE TABLE IF NOT EXISTS ingest_watermark (
+    location VARCHAR(64) NOT NULL PRIMARY KEY,
+    max_dt INT NOT NULL,
+    row_count INT NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
 CREATE TABLE IF NOT EXISTS predictions (
     id BIGINT AUTO_INCREMENT PRIMARY KEY,
     dt INT NOT NULL,
@@ -0,0 +1,15 @@
+-- Upgrade a single-location database to the multi-location schema of init_db/init.sql.
+-- init_db only runs on an empty volume, so run this once by hand on existing deployments:
+--   docker exec -i mysql_server mysql -uroot -p"$DB_PASSWORD" < src/mysql/migrations/001_partition_weather_by_location.sql
+USE weather_db;
+
+-- Existing rows all belong to the default location
+ALTER TABLE raw_weather_data
+    ADD COLUMN location VARCHAR(64) NOT NULL DEFAULT 'da_nang',
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (location, dt);
+
+ALTER TABLE processed_weather_data
+    ADD COLUMN location VARCHAR(64) NOT NULL DEFAULT 'da_nang',
+    DROP PRIMARY KEY,
+    ADD PRIMARY KEY (location, dt);
@@ -0,0 +1,11 @@
+-- Add the idempotency key store of /api/weather/bulk (see init_db/init.sql).
+-- Run once by hand on existing deployments:
+--   docker exec -i mysql_server mysql -uroot -p"$DB_PASSWORD" < src/mysql/migrations/002_bulk_request_idempotency_keys.sql
+USE weather_db;
+
+CREATE TABLE IF NOT EXISTS bulk_requests (
+    idempotency_key VARCHAR(128) NOT NULL PRIMARY KEY,
+    row_count INT NOT NULL,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_bulk_requests_created_at (created_at)
+);
@@ -0,0 +1,19 @@
+-- Add the day/week/month rollup of processed_weather_data (see init_db/init.sql).
+-- Run once by hand on existing deployments; db_api fills the table from the
+-- hourly rows on its next start:
+--   docker exec -i mysql_server mysql -uroot -p"$DB_PASSWORD" < src/mysql/migrations/003_weather_rollup.sql
+USE weather_db;
+
+CREATE TABLE IF NOT EXISTS weather_rollup (
+    location VARCHAR(64) NOT NULL,
+    bucket VARCHAR(8) NOT NULL,
+    bucket_key BIGINT NOT NULL,
+    field VARCHAR(32) NOT NULL,
+    value_count INT NOT NULL,
+    value_sum DOUBLE NOT NULL,
+    value_sum_squares DOUBLE NOT NULL,
+    min_value DOUBLE NOT NULL,
+    max_value DOUBLE NOT NULL,
+    median_sketch JSON NOT NULL,
+    PRIMARY KEY (location, bucket, bucket_key, field)
+);
@@ -0,0 +1,25 @@
+-- Add the binlog checkpoint and bulk ingest watermark tables (see init_db/init.sql).
+-- Run once by hand on existing deployments; without a checkpoint db_api starts
+-- from the current master position once, and without a watermark services wait
+-- until data_ingestion completes its next initial run:
+--   docker exec -i mysql_server mysql -uroot -p"$DB_PASSWORD" < src/mysql/migrations/004_binlog_checkpoint_ingest_watermark.sql
+USE weather_db;
+
+-- Binlog position up to which db_api has applied processed_weather_data
+-- changes (rollup, cache, pub/sub), saved at transaction commits so a restart
+-- resumes there instead of at the current master position
+CREATE TABLE IF NOT EXISTS binlog_checkpoint (
+    consumer VARCHAR(64) NOT NULL PRIMARY KEY,
+    log_file VARCHAR(255) NOT NULL,
+    log_pos BIGINT NOT NULL,
+    updated_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
+
+-- Rows of each location when data_ingestion last completed a bulk ingest
+-- (/api/weather/bulk?complete=true); a watermark means the data is ready
+CREATE TABLE IF NOT EXISTS ingest_watermark (
+    location VARCHAR(64) NOT NULL PRIMARY KEY,
+    max_dt INT NOT NULL,
+    row_count INT NOT NULL,
+    completed_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP
+);
@@ -0,0 +1,252 @@
+import os
+import time
+from datetime import datetime, timezone
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional: without it only the JSON log is kept
+    pa = None
+    pq = None
+
+from src.logger import logger
+
+# Parts written to the current month before they are merged into one file
+MAX_PARTS_PER_MONTH = 24
+COMPRESSION = "zstd"
+
+# (column, kind) of the flattened observation; kind drives the Arrow type
+ARCHIVE_COLUMNS = (
+    ("dt", "int64"),
+    ("temp", "float"),
+    ("feels_like", "float"),
+    ("pressure", "int"),
+    ("humidity", "int"),
+    ("dew_point", "float"),
+    ("uvi", "float"),
+    ("clouds", "int"),
+    ("visibility", "int"),
+    ("wind_speed", "float"),
+    ("wind_deg", "int"),
+    ("wind_gust", "float"),
+    ("rain_1h", "float"),
+    ("weather_id", "int"),
+    ("weather_main", "string"),
+    ("weather_description", "string"),
+)
+
+
+def is_available():
+    """Whether pyarrow is installed"""
+    return pa is not None
+
+
+def _arrow_schema():
+    types = {"int64": pa.int64(), "int": pa.int32(), "float": pa.float64(), "string": pa.string()}
+    return pa.schema([(name, types[kind]) for name, kind in ARCHIVE_COLUMNS])
+
+
+def _month_of(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m')
+
+
+def flatten_observation(record):
+    """
+    Flatten a raw One Call response into one archive row.
+
+    Returns:
+        dict: Column values, or None if the record has no observation.
+    """
+    try:
+        observation = record['data'][0]
+        dt = int(observation['dt'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+    weather = (observation.get('weather') or [{}])[0]
+    values = dict(observation, dt=dt)
+    values['rain_1h'] = (observation.get('rain') or {}).get('1h')
+    values['weather_id'] = weather.get('id')
+    values['weather_main'] = weather.get('main')
+    values['weather_description'] = weather.get('description')
+
+    row = {}
+    for name, kind in ARCHIVE_COLUMNS:
+        value = values.get(name)
+        if value is not None and kind in ("int", "int64"):
+            value = int(round(float(value)))
+        elif value is not None and kind == "float":
+            value = float(value)
+        row[name] = value
+    return row
+
+
+class ObservationArchive:
+    """
+    Columnar Parquet copy of the observation log, for readers that only need
+    numeric columns.
+
+    Layout of ``archive_dir`` (hive-style, readable by ``pyarrow.dataset``)::
+
+        location=<name>/month=YYYY-MM/part-<first_dt>-<ns>.parquet   one per write
+        location=<name>/month=YYYY-MM/data-<ns>.parquet              compacted month
+
+    Files are zstd-compressed and written under a temporary name, then renamed,
+    so readers never see a partial file. The JSON observation log stays the
+    source of truth; the archive can be rebuilt from it at any time.
+    """
+
+    def __init__(self, archive_dir, max_parts_per_month=MAX_PARTS_PER_MONTH):
+        if not is_available():
+            raise ImportError("pyarrow is required for the observation archive")
+        self.archive_dir = archive_dir
+        self.max_parts_per_month = max_parts_per_month
+        self.schema = _arrow_schema()
+
+    # ------------------------------------------------------------------ #
+    # Layout
+    # ------------------------------------------------------------------ #
+    def location_dir(self, location):
+        return os.path.join(self.archive_dir, f"location={location}")
+
+    def month_dir(self, location, month):
+        return os.path.join(self.location_dir(location), f"month={month}")
+
+    def months(self, location):
+        """Archived months of a location, oldest first"""
+        path = self.location_dir(location)
+        if not os.path.isdir(path):
+            return []
+        return sorted(name.split("=", 1)[1] for name in os.listdir(path) if name.startswith("month="))
+
+    def month_files(self, location, month):
+        path = self.month_dir(location, month)
+        if not os.path.isdir(path):
+            return []
+        return sorted(
+            os.path.join(path, name) for name in os.listdir(path) if name.endswith(".parquet")
+        )
+
+    def is_empty(self, location):
+        return not any(self.month_files(location, month) for month in self.months(location))
+
+    def _write_file(self, table, path):
+        """Write a table atomically"""
+        tmp_file = f"{path}.tmp"
+        pq.write_table(table, tmp_file, compression=COMPRESSION)
+        os.replace(tmp_file, path)
+
+    # ------------------------------------------------------------------ #
+    # Writer side
+    # ------------------------------------------------------------------ #
+    def write(self, location, records):
+        """
+        Archive raw One Call responses, one part file per month touched.
+
+        Returns:
+            int: Number of rows written.
+        """
+        by_month = {}
+        for record in records:
+            row = flatten_observation(record)
+            if row is not None:
+                by_month.setdefault(_month_of(row['dt']), []).append(row)
+
+        for month, rows in by_month.items():
+            rows.sort(key=lambda row: row['dt'])
+            path = self.month_dir(location, month)
+            os.makedirs(path, exist_ok=True)
+            table = pa.Table.from_pylist(rows, schema=self.schema)
+            self._write_file(table, os.path.join(path, f"part-{rows[0]['dt']}-{time.time_ns()}.parquet"))
+        return sum(len(rows) for rows in by_month.values())
+
+    def compact(self, location, force=False):
+        """
+        Merge the part files of each month into one sorted, de-duplicated file.
+
+        Closed months are merged as soon as they have more than one file; the
+        current month only once it reaches ``max_parts_per_month`` files.
+
+        Returns:
+            int: Number of months compacted.
+        """
+        current_month = _month_of(time.time())
+        compacted = 0
+        for month in self.months(location):
+            files = self.month_files(location, month)
+            threshold = self.max_parts_per_month if month == current_month and not force else 2
+            if len(files) < threshold:
+                continue
+
+            table = pa.concat_tables(pq.read_table(path, schema=self.schema) for path in files)
+            table = table.sort_by("dt")
+            # One row per hour, in case a crash during a previous compaction left duplicates
+            dts = table.column("dt").to_pylist()
+            keep = [i for i in range(len(dts)) if i + 1 == len(dts) or dts[i + 1] != dts[i]]
+            if len(keep) < len(dts):
+                table = table.take(keep)
+
+            self._write_file(table, os.path.join(self.month_dir(location, month), f"data-{time.time_ns()}.parquet"))
+            for path in files:
+                os.remove(path)
+            compacted += 1
+            logger.info(f"Compacted {len(files)} archive files of {location} {month} ({table.num_rows} rows)")
+        return compacted
+
+    def rebuild(self, location, records):
+        """Archive an existing log in one pass (records in any order)"""
+        written = self.write(location, records)
+        self.compact(location, force=True)
+        logger.info(f"Archived {written} existing observations of {location}")
+        return written
+
+    # ------------------------------------------------------------------ #
+    # Reader side
+    # ------------------------------------------------------------------ #
+    def read_table(self, location, columns=None, start=None, end=None):
+        """
+        Read archived observations as an Arrow table.
+
+        Files are memory-mapped and only the requested columns are decoded.
+
+        Args:
+            location (str): Location name
+            columns (list): Columns to read, or None for all of them
+            start (int): Inclusive lower bound on ``dt`` (UTC), optional
+            end (int): Exclusive upper bound on ``dt`` (UTC), optional
+
+        Returns:
+            pyarrow.Table: Rows sorted by ``dt``.
+        """
+        filters = []
+        if start is not None:
+            filters.append(("dt", ">=", int(start)))
+        if end is not None:
+            filters.append(("dt", "<", int(end)))
+
+        first_month = _month_of(start) if start is not None else None
+        last_month = _month_of(end - 1) if end is not None else None
+        tables = []
+        for month in self.months(location):
+            if (first_month and month < first_month) or (last_month and month > last_month):
+                continue
+            for path in self.month_files(location, month):
+                tables.append(pq.read_table(
+                    path,
+                    columns=columns,
+                    memory_map=True,
+                    filters=filters or None,
+                    schema=self.schema
+                ))
+
+        if not tables:
+            schema = self.schema if columns is None else pa.schema([self.schema.field(c) for c in columns])
+            return schema.empty_table()
+        table = pa.concat_tables(tables)
+        if "dt" in table.column_names:
+            table = table.sort_by("dt")
+        return table
+
+    def read_dataframe(self, location, columns=None, start=None, end=None):
+        """Same as ``read_table`` but returns a pandas DataFrame"""
+        return self.read_table(location, columns, start, end).to_pandas()
@@ -0,0 +1,375 @@
+import os
+import re
+import json
+from itertools import islice
+from filelock import FileLock
+
+from src.logger import logger
+
+# Roughly one month of hourly observations per segment
+SEGMENT_MAX_RECORDS = 744
+MANIFEST_VERSION = 1
+# Records appended per batch while migrating the legacy file
+LEGACY_IMPORT_BATCH = 1000
+# Characters read at a time from the legacy file
+LEGACY_READ_CHUNK = 1 << 20
+
+# Whitespace and separators between the elements of a JSON array
+_ARRAY_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def _fsync_dir(path):
+    """Flush directory entries (new/renamed files) to disk"""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _record_dt(record):
+    """Return the observation timestamp of a raw One Call response"""
+    try:
+        return int(record['data'][0]['dt'])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+
+def iter_json_array(path, chunk_size=LEGACY_READ_CHUNK):
+    """
+    Yield the elements of a file holding one top-level JSON array.
+
+    The file is decoded incrementally, so memory stays bounded by the chunk
+    size and the largest element instead of the file size.
+    """
+    decoder = json.JSONDecoder()
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            raise ValueError(f"{path} does not hold a JSON array")
+        pos, eof = 1, False
+        while True:
+            pos = _ARRAY_SEPARATOR.match(buffer, pos).end()
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos == len(buffer):
+                    raise json.JSONDecodeError("Need more data", buffer, pos)
+                value, pos = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # The element continues in the next chunk
+                if eof:
+                    raise
+                chunk = f.read(chunk_size)
+                eof = not chunk
+                buffer, pos = buffer[pos:] + chunk, 0
+                continue
+            yield value
+
+
+class ObservationLog:
+    """
+    Append-only, segmented log of raw One Call responses.
+
+    Layout of ``log_dir``::
+
+        manifest.json           sealed segments and the active segment name
+        segment-000001.jsonl    one compact JSON record per line
+
+    Appends write whole lines to the active segment and fsync them, so a crash
+    can at most leave a torn trailing line, which is truncated on open. Sealed
+    segments never change; the manifest is replaced atomically when a segment
+    is sealed.
+    """
+
+    def __init__(self, log_dir, legacy_file=None, segment_max_records=SEGMENT_MAX_RECORDS):
+        self.log_dir = log_dir
+        self.legacy_file = legacy_file
+        self.segment_max_records = segment_max_records
+        self.manifest_file = os.path.join(log_dir, "manifest.json")
+        self.lock = FileLock(os.path.join(log_dir, "log.lock"))
+        self.manifest = None
+        self.active_count = 0
+
+    # ------------------------------------------------------------------ #
+    # Manifest
+    # ------------------------------------------------------------------ #
+    @staticmethod
+    def segment_name(index):
+        return f"segment-{index:06d}.jsonl"
+
+    def segment_path(self, name):
+        return os.path.join(self.log_dir, name)
+
+    def _read_manifest(self):
+        """Read manifest from disk, returning an empty manifest if missing"""
+        if not os.path.exists(self.manifest_file):
+            return {
+                "version": MANIFEST_VERSION,
+                "segments": [],
+                "active": self.segment_name(1)
+            }
+        with open(self.manifest_file, 'r') as f:
+            return json.load(f)
+
+    def _write_manifest(self):
+        """Atomically replace manifest on disk"""
+        tmp_file = f"{self.manifest_file}.tmp"
+        with open(tmp_file, 'w') as f:
+            json.dump(self.manifest, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.manifest_file)
+        _fsync_dir(self.log_dir)
+
+    # ------------------------------------------------------------------ #
+    # Writer side
+    # ------------------------------------------------------------------ #
+    def open(self):
+        """Prepare the log for appending, recovering from torn writes"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        with self.lock:
+            self.manifest = self._read_manifest()
+            self.active_count = self._recover_active_segment()
+            if not os.path.exists(self.manifest_file):
+                self._write_manifest()
+
+        if self.legacy_file and os.path.exists(self.legacy_file):
+            self._import_legacy_file()
+
+        logger.info(
+            f"Opened observation log {self.log_dir}: "
+            f"{len(self.manifest['segments'])} sealed segments, "
+            f"{self.active_count} records in active segment"
+        )
+        return self
+
+    def _recover_active_segment(self):
+        """Truncate a torn trailing line in the active segment and count its records"""
+        path = self.segment_path(self.manifest["active"])
+        if not os.path.exists(path):
+            return 0
+
+        with open(path, 'rb+') as f:
+            content = f.read()
+            valid_length = content.rfind(b"\n") + 1
+            if valid_length < len(content):
+                logger.warning(
+                    f"Truncating {len(content) - valid_length} bytes of torn write "
+                    f"at end of {self.manifest['active']}"
+                )
+                f.truncate(valid_length)
+                f.flush()
+                os.fsync(f.fileno())
+            return content.count(b"\n", 0, valid_length)
+
+    def is_empty(self):
+        return not self.manifest["segments"] and self.active_count == 0
+
+    def _seal_active_segment(self):
+        """Move the full active segment into the sealed list and start a new one"""
+        name = self.manifest["active"]
+        first_dt, last_dt = None, None
+        for record in self._iter_segment(name):
+            dt = _record_dt(record)
+            if dt is None:
+                continue
+            first_dt = dt if first_dt is None else min(first_dt, dt)
+            last_dt = dt if last_dt is None else max(last_dt, dt)
+
+        self.manifest["segments"].append({
+            "name": name,
+            "count": self.active_count,
+            "first_dt": first_dt,
+            "last_dt": last_dt
+        })
+        self.manifest["active"] = self.segment_name(len(self.manifest["segments"]) + 1)
+        self.active_count = 0
+        self._write_manifest()
+        logger.info(f"Sealed segment {name}, next segment {self.manifest['active']}")
+
+    def append(self, record):
+        """Durably append one raw One Call response to the log"""
+        self.append_many([record])
+
+    def append_many(self, records):
+        """
+        Durably append a batch of raw One Call responses.
+
+        The batch costs one write and one fsync per segment it touches instead
+        of one per record.
+
+        Returns:
+            dict: Position just after the batch (see ``iter_since``), None if
+            ``records`` is empty.
+        """
+        if self.manifest is None:
+            self.open()
+
+        lines = [json.dumps(record, separators=(',', ':')) + "\n" for record in records]
+        position = None
+        with self.lock:
+            while lines:
+                if self.active_count >= self.segment_max_records:
+                    self._seal_active_segment()
+                room = self.segment_max_records - self.active_count
+                offset = self._write_lines(lines[:room])
+                lines = lines[room:]
+                position = {"segment": self.manifest["active"], "records": self.active_count, "offset": offset}
+        return position
+
+    def _write_lines(self, lines):
+        """Append lines to the active segment and fsync them; returns the segment's size in bytes"""
+        path = self.segment_path(self.manifest["active"])
+        is_new = not os.path.exists(path)
+        with open(path, 'ab') as f:
+            f.write("".join(lines).encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+            offset = f.tell()
+        if is_new:
+            _fsync_dir(self.log_dir)
+        self.active_count += len(lines)
+        return offset
+
+    def _import_legacy_file(self):
+        """
+        One-off migration of the monolithic weather_data.json into the log.
+
+        The file is streamed and appended in batches. The file is only renamed
+        once everything is imported, so an interrupted migration is resumed,
+        skipping hours that already made it into the log.
+        """
+        imported = {_record_dt(r) for r in self.iter_records()} if not self.is_empty() else set()
+        count = 0
+        try:
+            records = (
+                r for r in iter_json_array(self.legacy_file)
+                if _record_dt(r) is not None and _record_dt(r) not in imported
+            )
+            while True:
+                batch = list(islice(records, LEGACY_IMPORT_BATCH))
+                if not batch:
+                    break
+                self.append_many(batch)
+                count += len(batch)
+        except ValueError as e:
+            logger.error(f"Cannot migrate legacy file {self.legacy_file} after {count} records: {e}")
+            return
+
+        os.replace(self.legacy_file, f"{self.legacy_file}.migrated")
+        logger.info(f"Migrated {count} records from {self.legacy_file} into {self.log_dir}")
+
+    # ------------------------------------------------------------------ #
+    # Reader side
+    # ------------------------------------------------------------------ #
+    def _iter_segment(self, name):
+        """Yield complete records of one segment, skipping an in-progress trailing line"""
+        for record, _, _ in self._iter_segment_from(name):
+            yield record
+
+    def _iter_segment_from(self, name, offset=0, count=0):
+        """
+        Yield ``(record, records, offset)`` for the complete lines of a segment
+        after byte ``offset``, where ``records`` and ``offset`` locate the end
+        of that record. Lines before ``offset`` are not read at all.
+        """
+        path = self.segment_path(name)
+        if not os.path.exists(path):
+            return
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+                count += 1
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.error(f"Skipping corrupted line in {name}: {e}")
+                    continue
+                yield record, count, offset
+
+    def _line_offset(self, name, records):
+        """Byte offset after the first ``records`` lines of a segment, without parsing them"""
+        path = self.segment_path(name)
+        if records <= 0 or not os.path.exists(path):
+            return 0
+        offset = 0
+        with open(path, 'rb') as f:
+            for line in islice(f, records):
+                if not line.endswith(b"\n"):
+                    break
+                offset += len(line)
+        return offset
+
+    def segment_names(self):
+        """Names of all segments in append order, read fresh from the manifest"""
+        manifest = self._read_manifest()
+        return [segment["name"] for segment in manifest["segments"]] + [manifest["active"]]
+
+    def iter_records(self):
+        """Yield every record in append order"""
+        for name in self.segment_names():
+            yield from self._iter_segment(name)
+
+    def iter_since(self, position=None):
+        """
+        Lazily yield the records appended after ``position``.
+
+        The reader seeks straight to the byte offset of the position, so records
+        that were already read are neither read nor parsed again. Segments are
+        read one line at a time, so memory does not grow with the log.
+
+        Args:
+            position (dict): ``{"segment": name, "records": n, "offset": bytes}``
+                as yielded by a previous call, or None to read the whole log.
+                Positions without an offset (older checkpoints) are located by
+                counting lines.
+
+        Yields:
+            tuple: (record, position just after that record)
+        """
+        names = self.segment_names()
+        start_segment, count, offset = names[0], 0, 0
+        if position and position.get("segment") in names:
+            start_segment, count = position["segment"], position.get("records", 0)
+            offset = position.get("offset")
+            if offset is None:
+                offset = self._line_offset(start_segment, count)
+
+        for name in names[names.index(start_segment):]:
+            for record, records, end in self._iter_segment_from(name, offset, count):
+                yield record, {"segment": name, "records": records, "offset": end}
+            count, offset = 0, 0
+
+    def read_since(self, position=None):
+        """
+        Read records appended after ``position``.
+
+        Args:
+            position (dict): Position as returned by a previous call (see
+                ``iter_since``), or None to read the whole log.
+
+        Returns:
+            tuple: (list of records in append order, new position)
+        """
+        records, new_position = [], position
+        for record, new_position in self.iter_since(position):
+            records.append(record)
+        return records, new_position
+
+    def load_all(self):
+        """
+        Compatibility reader returning the same shape as the legacy weather_data.json:
+        a list of raw One Call responses sorted by observation timestamp.
+        """
+        records = [r for r in self.iter_records() if _record_dt(r) is not None]
+        records.sort(key=_record_dt)
+        return records
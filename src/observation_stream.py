@@ -0,0 +1,125 @@
+import os
+import json
+
+import redis.asyncio as aioredis
+from redis.exceptions import ResponseError
+
+from src.logger import logger
+
+STREAM_KEY = "weather:observations"
+# Entries kept in the stream (approximate trim); consumers only need the recent tail
+STREAM_MAXLEN = 100000
+
+
+def connect_redis():
+    """Redis client for the observation stream"""
+    return aioredis.from_url(
+        os.getenv('REDIS_URL', 'redis://redis:6379'),
+        password=os.getenv('REDIS_PASSWORD')
+    )
+
+
+class ObservationPublisher:
+    """
+    Publishes newly stored observations on a Redis stream.
+
+    Each entry carries the location, the observation timestamp and the raw One
+    Call response. Publishing is best effort: the observation log is already
+    durable, so a Redis outage only delays consumers until their fallback poll.
+    """
+
+    def __init__(self, stream_key=STREAM_KEY, maxlen=STREAM_MAXLEN):
+        self.stream_key = stream_key
+        self.maxlen = maxlen
+        self.redis = None
+
+    async def publish(self, location, records):
+        """Append one stream entry per record; returns the number published"""
+        if not records:
+            return 0
+        try:
+            if self.redis is None:
+                self.redis = connect_redis()
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for data in records:
+                    pipe.xadd(
+                        self.stream_key,
+                        {
+                            "location": location,
+                            "dt": int(data['data'][0]['dt']),
+                            "record": json.dumps(data, separators=(',', ':'))
+                        },
+                        maxlen=self.maxlen,
+                        approximate=True
+                    )
+                await pipe.execute()
+            return len(records)
+        except Exception as e:
+            logger.warning(f"Could not publish {len(records)} observations of {location}: {e}")
+            return 0
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
+
+
+class ObservationConsumer:
+    """
+    Consumer-group reader of the observation stream.
+
+    Entries stay pending until ``ack`` is called, so entries read before a
+    crash are delivered again on restart.
+    """
+
+    def __init__(self, group, consumer, stream_key=STREAM_KEY):
+        self.group = group
+        self.consumer = consumer
+        self.stream_key = stream_key
+        self.redis = None
+        self.pending_first = True
+
+    async def connect(self):
+        """Connect and create the consumer group (at the end of the stream) if needed"""
+        self.redis = connect_redis()
+        try:
+            await self.redis.xgroup_create(self.stream_key, self.group, id="$", mkstream=True)
+            logger.info(f"Created consumer group {self.group} on {self.stream_key}")
+        except ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+        self.pending_first = True
+
+    async def read(self, count=100, block_ms=5000):
+        """
+        Wait for entries.
+
+        Returns:
+            list: ``(entry_id, fields)`` tuples; our own unacknowledged entries
+            come first after a (re)connect.
+        """
+        if self.redis is None:
+            await self.connect()
+
+        if self.pending_first:
+            response = await self.redis.xreadgroup(
+                self.group, self.consumer, {self.stream_key: "0"}, count=count
+            )
+            entries = response[0][1] if response else []
+            if entries:
+                return entries
+            self.pending_first = False
+
+        response = await self.redis.xreadgroup(
+            self.group, self.consumer, {self.stream_key: ">"}, count=count, block=block_ms
+        )
+        return response[0][1] if response else []
+
+    async def ack(self, entry_ids):
+        if entry_ids:
+            await self.redis.xack(self.stream_key, self.group, *entry_ids)
+
+    async def close(self):
+        if self.redis is not None:
+            await self.redis.close()
+            self.redis = None
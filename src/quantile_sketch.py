@@ -0,0 +1,146 @@
+import math
+import bisect
+
+
+class P2Quantile:
+    """
+    Streaming estimate of one quantile with the P² algorithm (Jain & Chlamtac, 1985).
+
+    Five markers (minimum, p/2, p, (1+p)/2 quantiles and maximum) are adjusted
+    with a piecewise-parabolic formula on every value, so memory and update
+    cost are constant whatever the number of values. Until five values are
+    seen the markers hold the values themselves and the quantile is exact.
+    """
+
+    def __init__(self, p=0.5):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, value):
+        value = float(value)
+        self.count += 1
+        if self.count <= 5:
+            bisect.insort(self.heights, value)
+            return
+
+        heights, positions = self.heights, self.positions
+        if value < heights[0]:
+            heights[0] = value
+            cell = 0
+        elif value >= heights[4]:
+            heights[4] = value
+            cell = 3
+        else:
+            cell = bisect.bisect_right(heights, value) - 1
+
+        for i in range(cell + 1, 5):
+            positions[i] += 1
+        for i in range(5):
+            self.desired[i] += self.increments[i]
+
+        # Move the middle markers towards their desired positions
+        for i in (1, 2, 3):
+            offset = self.desired[i] - positions[i]
+            if (offset >= 1 and positions[i + 1] - positions[i] > 1) or \
+                    (offset <= -1 and positions[i - 1] - positions[i] < -1):
+                step = 1 if offset > 0 else -1
+                height = self._parabolic(i, step)
+                if not heights[i - 1] < height < heights[i + 1]:
+                    height = self._linear(i, step)
+                heights[i] = height
+                positions[i] += step
+
+    def _parabolic(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step / (n[i + 1] - n[i - 1]) * (
+            (n[i] - n[i - 1] + step) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+            + (n[i + 1] - n[i] - step) * (q[i] - q[i - 1]) / (n[i] - n[i - 1])
+        )
+
+    def _linear(self, i, step):
+        q, n = self.heights, self.positions
+        return q[i] + step * (q[i + step] - q[i]) / (n[i + step] - n[i])
+
+    def value(self):
+        """Current estimate, or None if no value was added"""
+        if self.count == 0:
+            return None
+        if self.count <= 5:
+            # Exact quantile of the values seen so far (linear interpolation)
+            rank = self.p * (self.count - 1)
+            low = int(rank)
+            high = min(low + 1, self.count - 1)
+            return self.heights[low] + (rank - low) * (self.heights[high] - self.heights[low])
+        return self.heights[2]
+
+    def to_dict(self):
+        return {
+            "p": self.p,
+            "count": self.count,
+            "estimate": self.value(),
+            "heights": self.heights,
+            "positions": self.positions,
+            "desired": self.desired
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(data["p"])
+        sketch.count = data["count"]
+        sketch.heights = list(data["heights"])
+        sketch.positions = list(data["positions"])
+        sketch.desired = list(data["desired"])
+        return sketch
+
+
+class ColumnQuantiles:
+    """
+    One ``P2Quantile`` per column, plus the observation log position up to
+    which values have been added.
+    """
+
+    def __init__(self, columns, p=0.5, position=None):
+        self.p = p
+        self.position = position
+        self.sketches = {column: P2Quantile(p) for column in columns}
+
+    def update(self, rows):
+        """Add the numeric values of each row; missing and non-numeric values are skipped"""
+        for row in rows:
+            for column, sketch in self.sketches.items():
+                value = row.get(column)
+                if value is None or isinstance(value, bool):
+                    continue
+                try:
+                    value = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if math.isfinite(value):
+                    sketch.add(value)
+
+    def values(self):
+        """Estimate of each column that has seen at least one value"""
+        estimates = {column: sketch.value() for column, sketch in self.sketches.items()}
+        return {column: value for column, value in estimates.items() if value is not None}
+
+    def copy(self):
+        return ColumnQuantiles.from_dict(self.to_dict())
+
+    def to_dict(self):
+        return {
+            "p": self.p,
+            "position": self.position,
+            "columns": {column: sketch.to_dict() for column, sketch in self.sketches.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        quantiles = cls([], data["p"], data.get("position"))
+        quantiles.sketches = {
+            column: P2Quantile.from_dict(sketch) for column, sketch in data["columns"].items()
+        }
+        return quantiles
@@ -0,0 +1,85 @@
+import pandas as pd
+
+from src import arrow_codec
+from src.logger import logger
+
+
+class WeatherHistory:
+    """
+    Local copy of the processed weather rows of a location, kept in sync with
+    db_api's /api/weather/delta.
+
+    Each ``sync`` asks only for rows after the newest ``dt`` already held and
+    sends the last ETag, so an unchanged history costs a 304 and a new hour
+    costs one row. If the server reports more rows than the copy holds after
+    the delta (rows older than the watermark were added, e.g. by a backfill),
+    the copy is fetched again in full.
+
+    Deltas are read as Arrow when pyarrow is installed (``src/arrow_codec.py``)
+    and kept as a DataFrame, so rows are never turned into dicts and back.
+    """
+
+    def __init__(self, db_api_url, location=None, fields=None):
+        self.url = f"{db_api_url}/api/weather/delta"
+        self.location = location
+        self.fields = fields
+        self.data = pd.DataFrame()
+        self.etag = None
+
+    def reset(self):
+        self.data = pd.DataFrame()
+        self.etag = None
+
+    async def _fetch(self, session, since):
+        """(DataFrame, ETag, server row count) of one delta request, DataFrame None on 304"""
+        params = {}
+        if self.location:
+            params["location"] = self.location
+        if self.fields:
+            params["fields"] = ",".join(self.fields)
+        if since is not None:
+            params["since"] = since
+        headers = {}
+        if self.etag and since is not None:
+            headers["If-None-Match"] = self.etag
+
+        status, body, response_headers = await arrow_codec.get_frame(session, self.url, params, headers)
+        if status == 304:
+            return None, self.etag, len(self.data)
+        if status != 200:
+            raise Exception(f"API error: {status}, {body}")
+        return body, response_headers.get("ETag"), int(response_headers.get("X-Row-Count", len(body)))
+
+    def _merge(self, rows):
+        if self.data.empty:
+            self.data = rows.reset_index(drop=True)
+        elif not rows.empty:
+            merged = pd.concat([self.data, rows], ignore_index=True)
+            self.data = merged.drop_duplicates("dt", keep="last", ignore_index=True)
+
+    async def sync(self, session):
+        """
+        Bring the copy up to date.
+
+        Returns:
+            int: Number of rows received
+        """
+        since = int(self.data["dt"].max()) if not self.data.empty else None
+        rows, etag, row_count = await self._fetch(session, since)
+        if rows is None:
+            return 0
+
+        self._merge(rows)
+        if len(self.data) != row_count and since is not None:
+            logger.info(f"Weather history has {row_count} rows, {len(self.data)} held: fetching it again")
+            self.reset()
+            rows, etag, row_count = await self._fetch(session, None)
+            self._merge(rows)
+        self.etag = etag
+        return len(rows)
+
+    def frame(self):
+        """The rows as a DataFrame, newest first like /api/weather"""
+        if self.data.empty:
+            return self.data.copy()
+        return self.data.sort_values("dt", ascending=False, ignore_index=True)